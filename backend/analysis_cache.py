@@ -0,0 +1,135 @@
+"""Persistent content-addressed cache for LLM extraction results."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for one cache instance."""
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class AnalysisCache:
+    """SQLite-backed cache of extracted methods keyed by normalized content.
+
+    The key covers the normalized post body, the model, the prompt text and the
+    analyzer version, so changing any of them naturally invalidates old entries.
+    When more than ``max_entries`` rows are stored the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, path: Path | str, *, max_entries: int = 100_000) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, max_entries)
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS analysis_cache_accessed_idx ON analysis_cache (accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(content: str, *, model: str, prompt: str, version: str) -> str:
+        digest = hashlib.sha256()
+        for part in (normalize_content(content), model, prompt, version):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.stats.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, methods: List[Dict[str, Any]]) -> None:
+        payload = json.dumps(methods, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO analysis_cache (key, payload, created_at, accessed_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET payload = excluded.payload,
+                                                accessed_at = excluded.accessed_at
+                """,
+                (key, payload, now, now),
+            )
+            if not existed:
+                self._size += 1
+            self.stats.writes += 1
+            self._evict_locked()
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict_locked(self) -> None:
+        excess = self._size - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            """
+            DELETE FROM analysis_cache WHERE key IN (
+                SELECT key FROM analysis_cache ORDER BY accessed_at ASC LIMIT ?
+            )
+            """,
+            (excess,),
+        )
+        self._size -= excess
+        self.stats.evictions += excess
+
+
+def normalize_content(content: str) -> str:
+    """Collapse formatting differences that do not change the post's meaning."""
+    text = unicodedata.normalize("NFKC", content)
+    return " ".join(text.split())
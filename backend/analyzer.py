@@ -2,12 +2,54 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from openai import OpenAI
+from openai import (
+    APIConnectionError,
+    APIError,
+    AsyncOpenAI,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+
+from analysis_cache import AnalysisCache
+from rate_limiter import RateLimiter, backoff_delay, in_event_loop, retry_after_seconds
+
+
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+class AnalysisError(RuntimeError):
+    """Raised when a post could not be analyzed, as opposed to having no methods."""
+
+    def __init__(self, message: str, *, transient: bool = False) -> None:
+        super().__init__(message)
+        self.transient = transient
+
+
+class AnalysisResults(dict):
+    """Post ID → extracted methods, plus the posts whose analysis failed."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.failed: Dict[str, str] = {}
+
+    def fill(
+        self, items: List[Tuple[str, str]], outcomes: Dict[str, Any]
+    ) -> "AnalysisResults":
+        for post_id, _ in items:
+            outcome = outcomes.get(post_id)
+            if outcome is None or isinstance(outcome, BaseException):
+                self.failed[post_id] = str(outcome or "no result")
+            else:
+                self[post_id] = outcome
+        return self
 
 
 @dataclass
@@ -24,6 +66,37 @@ class ExtractedMethod:
     spam_flag: bool  # True if likely spam/affiliate
     raw_response: Dict[str, Any]  # Full LLM response
 
+    @classmethod
+    def from_raw(cls, m: Dict[str, Any]) -> "ExtractedMethod":
+        """Build from one entry of the LLM's ``methods`` array."""
+        return cls(
+            method_slug=m["method_slug"],
+            method_display_name=m["method_display_name"],
+            action_text=m["action_text"],
+            effect_text=m["effect_text"],
+            effect_label=m["effect_label"],
+            sentiment_score=float(m["sentiment_score"]),
+            confidence=float(m.get("confidence", 0.8)),
+            spam_flag=bool(m.get("spam_flag", False)),
+            raw_response=m,
+        )
+
+    def to_event_record(self, post_id: str, analyzer_version: str) -> dict:
+        """Row for the ``method_events`` table."""
+        return {
+            "post_id": post_id,
+            "method_slug": self.method_slug,
+            "method_display_name": self.method_display_name,
+            "action_text": self.action_text,
+            "effect_text": self.effect_text,
+            "effect_label": self.effect_label,
+            "sentiment_score": self.sentiment_score,
+            "spam_flag": self.spam_flag,
+            "confidence": self.confidence,
+            "analyzer_version": analyzer_version,
+            "raw_response": self.raw_response,
+        }
+
 
 class MethodAnalyzer:
     """Extract mental health methods and effects using OpenAI."""
@@ -86,61 +159,529 @@ JSON形式で出力（複数ある場合は配列）：
   ]
 }}"""
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    PACKED_USER_PROMPT_TEMPLATE = """以下の{count}件の投稿それぞれから、メンタルヘルスの方法と効果を抽出してください。
+各投稿は <post id="..."> で区切られています。必ず全ての post_id について結果を返し、方法が無い投稿は "methods" を空配列にしてください。
+
+{posts}
+
+JSON形式で出力：
+{{
+  "posts": [
+    {{
+      "post_id": "1",
+      "methods": [
+        {{
+          "method_slug": "method-id",
+          "method_display_name": "表示名",
+          "action_text": "実際の行動",
+          "effect_text": "得られた効果",
+          "effect_label": "positive|negative|neutral|unknown",
+          "sentiment_score": 0.85,
+          "confidence": 0.9,
+          "spam_flag": false
+        }}
+      ]
+    }}
+  ]
+}}"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        *,
+        max_concurrency: int = 8,
+        cache: Optional[AnalysisCache] = None,
+        packed_token_budget: int = 4000,
+        max_pack_size: int = 25,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 5,
+        expected_output_tokens: int = 300,
+    ):
         """Initialize analyzer with OpenAI API key."""
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not set")
         
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are handled here so they can share the rate limiter's view.
+        self.client = OpenAI(api_key=self.api_key, max_retries=0)
         self.model = model
         self.version = "1.0.0"
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self.packed_token_budget = packed_token_budget
+        self.max_pack_size = max(1, max_pack_size)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.expected_output_tokens = expected_output_tokens
 
     def analyze(self, content: str) -> List[ExtractedMethod]:
-        """Analyze a post and extract methods."""
+        """Analyze a post and extract methods.
+
+        Failures are logged and returned as ``[]``; use ``analyze_batch`` to
+        tell failed posts apart from posts without methods.
+        """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {"role": "user", "content": self.USER_PROMPT_TEMPLATE.format(content=content)}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-            )
-            
-            raw_text = response.choices[0].message.content
-            if not raw_text:
-                return []
-            
-            data = json.loads(raw_text)
-            methods = data.get("methods", [])
-            
-            return [
-                ExtractedMethod(
-                    method_slug=m["method_slug"],
-                    method_display_name=m["method_display_name"],
-                    action_text=m["action_text"],
-                    effect_text=m["effect_text"],
-                    effect_label=m["effect_label"],
-                    sentiment_score=float(m["sentiment_score"]),
-                    confidence=float(m.get("confidence", 0.8)),
-                    spam_flag=bool(m.get("spam_flag", False)),
-                    raw_response=m,
+            return self._analyze_checked(content)
+        except AnalysisError as e:
+            print(f"Error analyzing content: {e}")
+            return []
+
+    async def analyze_async(self, content: str) -> List[ExtractedMethod]:
+        """Async variant of ``analyze`` backed by ``AsyncOpenAI``."""
+        try:
+            async with self._async_client() as client:
+                return await self._analyze_checked_async(client, content)
+        except AnalysisError as e:
+            print(f"Error analyzing content: {e}")
+            return []
+
+    def analyze_batch(
+        self,
+        posts: List[Dict[str, Any]],
+        *,
+        concurrency: int = 1,
+        packed: bool = False,
+    ) -> "AnalysisResults":
+        """Analyze multiple posts and return results keyed by post ID.
+
+        With ``concurrency > 1`` the posts are analyzed through the async client,
+        with at most ``concurrency`` requests in flight. With ``packed=True``
+        several posts share one chat completion (see ``plan_packs``). Posts that
+        could not be analyzed are left out of the mapping and listed in
+        ``results.failed`` instead.
+        """
+        if concurrency > 1:
+            if in_event_loop():
+                raise RuntimeError(
+                    "analyze_batch(concurrency > 1) cannot run inside an event loop; "
+                    "await analyze_batch_async() instead"
                 )
-                for m in methods
-            ]
-            
+            return asyncio.run(
+                self.analyze_batch_async(posts, concurrency=concurrency, packed=packed)
+            )
+        items = list(self._iter_batch(posts))
+        results = AnalysisResults()
+        if packed:
+            cached = self._lookup_cached_items(items, self.PACKED_USER_PROMPT_TEMPLATE)
+            misses = [item for item in items if item[0] not in cached]
+            for pack in self.plan_packs(misses):
+                self._analyze_pack(pack, cached)
+            return results.fill(items, cached)
+        for post_id, content in items:
+            try:
+                results[post_id] = self._analyze_checked(content)
+            except AnalysisError as e:
+                print(f"Error analyzing post {post_id}: {e}")
+                results.failed[post_id] = str(e)
+        return results
+
+    async def analyze_batch_async(
+        self,
+        posts: List[Dict[str, Any]],
+        *,
+        concurrency: Optional[int] = None,
+        packed: bool = False,
+    ) -> "AnalysisResults":
+        """Analyze posts concurrently, preserving input order in the result.
+
+        A failure on one post (or one pack) is recorded in ``results.failed``
+        without cancelling the remaining requests. The ``AsyncOpenAI`` client
+        is opened and closed here, so its connections never outlive the loop.
+        """
+        async with self._async_client() as client:
+            return await self._analyze_batch_async(client, posts, concurrency, packed)
+
+    async def _analyze_batch_async(
+        self,
+        client: AsyncOpenAI,
+        posts: List[Dict[str, Any]],
+        concurrency: Optional[int],
+        packed: bool,
+    ) -> "AnalysisResults":
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.max_concurrency))
+        items = list(self._iter_batch(posts))
+        results = AnalysisResults()
+
+        if packed:
+            cached = self._lookup_cached_items(items, self.PACKED_USER_PROMPT_TEMPLATE)
+            misses = [item for item in items if item[0] not in cached]
+            packs = self.plan_packs(misses)
+
+            async def run_pack(pack: List[Tuple[str, str]]) -> None:
+                async with semaphore:
+                    await self._analyze_pack_async(client, pack, cached)
+
+            await asyncio.gather(*(run_pack(pack) for pack in packs))
+            return results.fill(items, cached)
+
+        async def run(content: str) -> List[ExtractedMethod]:
+            async with semaphore:
+                return await self._analyze_checked_async(client, content)
+
+        outcomes = await asyncio.gather(
+            *(run(content) for _, content in items),
+            return_exceptions=True,
+        )
+        for (post_id, _), outcome in zip(items, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"Error analyzing post {post_id}: {outcome}")
+                results.failed[post_id] = str(outcome)
+            else:
+                results[post_id] = outcome
+        return results
+
+    def build_batch_request(self, post_id: str, content: str) -> Dict[str, Any]:
+        """One line of a Batch API request file for ``post_id``."""
+        return {
+            "custom_id": post_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self._completion_params(content),
+        }
+
+    def parse_batch_result(self, line: Dict[str, Any]) -> Tuple[str, List[ExtractedMethod]]:
+        """Decode one line of a Batch API output file into ``(post_id, methods)``.
+
+        Failed requests and malformed bodies yield an empty method list.
+        """
+        post_id = line.get("custom_id")
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            print(f"Batch request for post {post_id} failed: {line.get('error') or response}")
+            return post_id, []
+        try:
+            body = response.get("body") or {}
+            raw_text = body["choices"][0]["message"]["content"]
+            raw_methods = self._parse_raw_methods(raw_text)
         except Exception as e:
-            print(f"Error analyzing content: {e}")
+            print(f"Error parsing batch result for post {post_id}: {e}")
+            return post_id, []
+        return post_id, [self._to_method(m) for m in raw_methods]
+
+    def plan_packs(self, items: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """Group ``(post_id, content)`` pairs into packs that fit the token budget.
+
+        Packs are filled greedily in input order until adding the next post
+        would exceed ``packed_token_budget`` prompt tokens or ``max_pack_size``
+        posts. A post that alone exceeds the budget gets a pack of its own.
+        """
+        overhead = estimate_tokens(self.SYSTEM_PROMPT + self.PACKED_USER_PROMPT_TEMPLATE)
+        packs: List[List[Tuple[str, str]]] = []
+        current: List[Tuple[str, str]] = []
+        used = overhead
+        for item in items:
+            cost = estimate_tokens(item[1]) + _PACKED_POST_OVERHEAD_TOKENS
+            if current and (used + cost > self.packed_token_budget or len(current) >= self.max_pack_size):
+                packs.append(current)
+                current = []
+                used = overhead
+            current.append(item)
+            used += cost
+        if current:
+            packs.append(current)
+        return packs
+
+    def _analyze_checked(self, content: str) -> List[ExtractedMethod]:
+        cache_key = self._cache_key(content)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
+        raw_text = self._complete(self._completion_params(content), self.expected_output_tokens)
+        return self._store_and_build(cache_key, self._parse_checked(raw_text))
+
+    async def _analyze_checked_async(
+        self, client: AsyncOpenAI, content: str
+    ) -> List[ExtractedMethod]:
+        cache_key = self._cache_key(content)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
+        raw_text = await self._complete_async(
+            client, self._completion_params(content), self.expected_output_tokens
+        )
+        return self._store_and_build(cache_key, self._parse_checked(raw_text))
+
+    def _analyze_pack(
+        self,
+        pack: List[Tuple[str, str]],
+        results: Dict[str, Any],
+    ) -> None:
+        """Analyze one pack into ``results`` (post ID → methods or ``AnalysisError``)."""
+        try:
+            raw_text = self._complete(
+                self._packed_completion_params(pack),
+                self.expected_output_tokens * len(pack),
+            )
+            parsed = self._parse_packed(raw_text, pack)
+        except (AnalysisError, ValueError) as e:
+            print(f"Error analyzing pack of {len(pack)} posts: {e}")
+            if isinstance(e, AnalysisError) and e.transient:
+                results.update({post_id: e for post_id, _ in pack})
+                return
+            # A permanent failure may come from one bad post; isolate it below.
+            parsed = {}
+        results.update(self._store_pack(pack, parsed))
+        for post_id, content in pack:
+            if post_id in results:
+                continue
+            try:
+                results[post_id] = self._analyze_checked(content)
+            except AnalysisError as e:
+                results[post_id] = e
+
+    async def _analyze_pack_async(
+        self,
+        client: AsyncOpenAI,
+        pack: List[Tuple[str, str]],
+        results: Dict[str, Any],
+    ) -> None:
+        try:
+            raw_text = await self._complete_async(
+                client,
+                self._packed_completion_params(pack),
+                self.expected_output_tokens * len(pack),
+            )
+            parsed = self._parse_packed(raw_text, pack)
+        except (AnalysisError, ValueError) as e:
+            print(f"Error analyzing pack of {len(pack)} posts: {e}")
+            if isinstance(e, AnalysisError) and e.transient:
+                results.update({post_id: e for post_id, _ in pack})
+                return
+            # A permanent failure may come from one bad post; isolate it below.
+            parsed = {}
+        results.update(self._store_pack(pack, parsed))
+        for post_id, content in pack:
+            if post_id in results:
+                continue
+            try:
+                results[post_id] = await self._analyze_checked_async(client, content)
+            except AnalysisError as e:
+                results[post_id] = e
+
+    def _complete(self, params: Dict[str, Any], expected_output_tokens: int) -> Optional[str]:
+        """Run one chat completion under the rate limiter, retrying transient errors."""
+        estimated = self._estimate_request_tokens(params, expected_output_tokens)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(estimated)
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(**params)
+            except _RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise AnalysisError(
+                        f"giving up after {attempt + 1} attempts: {e}", transient=True
+                    ) from e
+                time.sleep(delay)
+                continue
+            except APIError as e:
+                raise AnalysisError(str(e)) from e
+            return self._handle_completion(raw, estimated)
+        raise AnalysisError("retries exhausted", transient=True)
+
+    async def _complete_async(
+        self, client: AsyncOpenAI, params: Dict[str, Any], expected_output_tokens: int
+    ) -> Optional[str]:
+        estimated = self._estimate_request_tokens(params, expected_output_tokens)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire_async(estimated)
+            try:
+                raw = await client.chat.completions.with_raw_response.create(**params)
+            except _RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise AnalysisError(
+                        f"giving up after {attempt + 1} attempts: {e}", transient=True
+                    ) from e
+                await asyncio.sleep(delay)
+                continue
+            except APIError as e:
+                raise AnalysisError(str(e)) from e
+            return self._handle_completion(raw, estimated)
+        raise AnalysisError("retries exhausted", transient=True)
+
+    def _async_client(self) -> AsyncOpenAI:
+        # AsyncOpenAI's connection pool is bound to the loop that first used it,
+        # so each analyze_*_async call opens (and closes) its own client.
+        return AsyncOpenAI(api_key=self.api_key, max_retries=0)
+
+    def _handle_completion(self, raw: Any, estimated: int) -> Optional[str]:
+        self.rate_limiter.update_from_headers(raw.headers)
+        completion = raw.parse()
+        usage = getattr(completion, "usage", None)
+        self.rate_limiter.record_usage(estimated, getattr(usage, "total_tokens", None))
+        return completion.choices[0].message.content
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Delay before the next attempt, or ``None`` once retries are used up."""
+        if attempt >= self.max_retries:
+            return None
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else None
+        delay = backoff_delay(attempt, retry_after=retry_after_seconds(headers))
+        if isinstance(error, RateLimitError):
+            if headers is not None:
+                self.rate_limiter.update_from_headers(headers)
+            self.rate_limiter.block_for(delay)
+        return delay
+
+    def _estimate_request_tokens(self, params: Dict[str, Any], expected_output_tokens: int) -> int:
+        prompt = "".join(message["content"] for message in params["messages"])
+        return estimate_tokens(prompt) + expected_output_tokens
+
+    def _parse_checked(self, raw_text: Optional[str]) -> List[Dict[str, Any]]:
+        try:
+            return self._parse_raw_methods(raw_text)
+        except (KeyError, TypeError, ValueError) as e:
+            raise AnalysisError(f"malformed response: {e}") from e
+
+    def _packed_completion_params(self, pack: List[Tuple[str, str]]) -> Dict[str, Any]:
+        blocks = "\n\n".join(
+            f'<post id="{index}">\n{content}\n</post>'
+            for index, (_, content) in enumerate(pack, start=1)
+        )
+        user_prompt = self.PACKED_USER_PROMPT_TEMPLATE.format(count=len(pack), posts=blocks)
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3,
+        }
+
+    def _parse_packed(
+        self, raw_text: Optional[str], pack: List[Tuple[str, str]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Map a packed response back to post IDs.
+
+        Posts that are missing from the response, or whose methods fail
+        validation, are left out so the caller can retry them individually.
+        """
+        if not raw_text:
+            return {}
+        data = json.loads(raw_text)
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+        by_local_id = {str(index): post_id for index, (post_id, _) in enumerate(pack, start=1)}
+        parsed: Dict[str, List[Dict[str, Any]]] = {}
+        entries = data.get("posts")
+        for entry in entries if isinstance(entries, list) else ():
+            if not isinstance(entry, dict):
+                continue
+            post_id = by_local_id.get(str(entry.get("post_id")))
+            if post_id is None:
+                continue
+            methods = entry.get("methods") or []
+            if not isinstance(methods, list):
+                continue
+            try:
+                for m in methods:
+                    self._to_method(m)
+            except (KeyError, TypeError, ValueError):
+                continue
+            parsed[post_id] = methods
+        return parsed
+
+    def _store_pack(
+        self,
+        pack: List[Tuple[str, str]],
+        parsed: Dict[str, List[Dict[str, Any]]],
+    ) -> Dict[str, List[ExtractedMethod]]:
+        results: Dict[str, List[ExtractedMethod]] = {}
+        for post_id, content in pack:
+            if post_id not in parsed:
+                continue
+            cache_key = self._cache_key(content, self.PACKED_USER_PROMPT_TEMPLATE)
+            results[post_id] = self._store_and_build(cache_key, parsed[post_id])
+        return results
+
+    def _lookup_cached_items(
+        self, items: List[Tuple[str, str]], template: str
+    ) -> Dict[str, List[ExtractedMethod]]:
+        results: Dict[str, List[ExtractedMethod]] = {}
+        if self.cache is None:
+            return results
+        for post_id, content in items:
+            cached = self._cache_lookup(self._cache_key(content, template))
+            if cached is not None:
+                results[post_id] = cached
+        return results
+
+    def _completion_params(self, content: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": self.USER_PROMPT_TEMPLATE.format(content=content)},
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3,
+        }
+
+    def _parse_raw_methods(self, raw_text: Optional[str]) -> List[Dict[str, Any]]:
+        if not raw_text:
             return []
+        data = json.loads(raw_text)
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+        methods = data.get("methods", [])
+        if not isinstance(methods, list):
+            raise ValueError(f"'methods' is {type(methods).__name__}, not a list")
+        # Validate eagerly so malformed responses are reported, not cached.
+        for m in methods:
+            self._to_method(m)
+        return methods
 
-    def analyze_batch(self, posts: List[Dict[str, Any]]) -> Dict[str, List[ExtractedMethod]]:
-        """Analyze multiple posts and return results keyed by post ID."""
-        results = {}
+    def _cache_key(self, content: str, template: Optional[str] = None) -> Optional[str]:
+        if self.cache is None:
+            return None
+        prompt = self.SYSTEM_PROMPT + (template or self.USER_PROMPT_TEMPLATE)
+        return AnalysisCache.make_key(
+            content, model=self.model, prompt=prompt, version=self.version
+        )
+
+    def _cache_lookup(self, cache_key: Optional[str]) -> Optional[List[ExtractedMethod]]:
+        if self.cache is None or cache_key is None:
+            return None
+        raw_methods = self.cache.get(cache_key)
+        if raw_methods is None:
+            return None
+        return [self._to_method(m) for m in raw_methods]
+
+    def _store_and_build(
+        self, cache_key: Optional[str], raw_methods: List[Dict[str, Any]]
+    ) -> List[ExtractedMethod]:
+        if self.cache is not None and cache_key is not None:
+            self.cache.put(cache_key, raw_methods)
+        return [self._to_method(m) for m in raw_methods]
+
+    @staticmethod
+    def _to_method(m: Dict[str, Any]) -> ExtractedMethod:
+        if not isinstance(m, dict):
+            raise TypeError(f"method entry is {type(m).__name__}, not an object")
+        return ExtractedMethod.from_raw(m)
+
+    @staticmethod
+    def _iter_batch(posts: List[Dict[str, Any]]) -> Iterator[Tuple[str, str]]:
         for post in posts:
             post_id = post.get("id") or post.get("platform_id")
             content = post.get("content", "")
             if content:
-                results[post_id] = self.analyze(content)
-        return results
+                yield post_id, content
+
+
+# Per-post framing in packed prompts: the <post> tags plus its share of the
+# per-post JSON scaffolding in the response.
+_PACKED_POST_OVERHEAD_TOKENS = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate without a tokenizer.
+
+    Japanese text encodes to roughly one token per character, ASCII to roughly
+    one token per four characters.
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
@@ -0,0 +1,254 @@
+"""Offline analysis through the OpenAI Batch API (submit / poll / ingest)."""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from analyzer import MethodAnalyzer
+from supabase_client import SupabaseClient
+from synonyms import SynonymNormalizer
+
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# States after which the job directory can be reused for a new job.
+FINISHED_STATUSES = {"ingested", "failed", "expired", "cancelled"}
+# Columns that tell one post's method_events apart when re-checking a chunk.
+EVENT_IDENTITY = ("method_slug", "method_display_name", "action_text", "effect_text")
+
+
+class BatchJobError(RuntimeError):
+    """Raised when a batch job cannot be submitted or finishes unsuccessfully."""
+
+
+@dataclass
+class BatchJobState:
+    """On-disk progress of one batch job, so any step can be resumed."""
+
+    request_path: str
+    model: str
+    analyzer_version: str
+    post_count: int = 0
+    input_file_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    status: str = "prepared"
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+    ingested_lines: int = 0
+    # Last output line of a chunk whose insert was started but not confirmed.
+    inflight_lines: int = 0
+    inserted_events: int = 0
+    request_counts: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "BatchJobState":
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
+
+    def save(self, path: Path) -> None:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self), ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(path)
+
+
+class BatchJobRunner:
+    """Drive one Batch API job for ``MethodAnalyzer`` through its lifecycle.
+
+    Every transition is written to ``job_dir/state.json`` before the next step
+    starts, so re-running ``run()`` after a crash continues where it stopped,
+    including part-way through ingesting the output file.
+    """
+
+    def __init__(
+        self,
+        analyzer: MethodAnalyzer,
+        supabase: SupabaseClient,
+        job_dir: Path,
+        *,
+        poll_interval: float = 60.0,
+        ingest_chunk_size: int = 500,
+        normalizer: Optional[SynonymNormalizer] = None,
+    ) -> None:
+        self.analyzer = analyzer
+        self.supabase = supabase
+        self.job_dir = Path(job_dir)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.job_dir / "state.json"
+        self.poll_interval = poll_interval
+        self.ingest_chunk_size = ingest_chunk_size
+        self.normalizer = normalizer
+        self.state: Optional[BatchJobState] = (
+            BatchJobState.load(self.state_path) if self.state_path.exists() else None
+        )
+
+    def prepare(self, posts: Sequence[Dict[str, Any]]) -> BatchJobState:
+        """Write the JSONL request file for ``posts`` and start a new job state."""
+        if self.state is not None and self.state.status not in FINISHED_STATUSES:
+            raise BatchJobError(
+                f"Job in {self.job_dir} is still {self.state.status}; resume it instead"
+            )
+        request_path = self.job_dir / "requests.jsonl"
+        count = 0
+        with request_path.open("w", encoding="utf-8") as fh:
+            for post in posts:
+                post_id = post.get("id")
+                content = post.get("content") or ""
+                if not post_id or not content:
+                    continue
+                request = self.analyzer.build_batch_request(post_id, content)
+                fh.write(json.dumps(request, ensure_ascii=False) + "\n")
+                count += 1
+        self.state = BatchJobState(
+            request_path=str(request_path),
+            model=self.analyzer.model,
+            analyzer_version=self.analyzer.version,
+            post_count=count,
+        )
+        self._save()
+        return self.state
+
+    def submit(self) -> BatchJobState:
+        state = self._require_state()
+        if state.batch_id:
+            return state
+        if state.post_count == 0:
+            raise BatchJobError("No posts to submit")
+        if not state.input_file_id:
+            with open(state.request_path, "rb") as fh:
+                uploaded = self.analyzer.client.files.create(file=fh, purpose="batch")
+            state.input_file_id = uploaded.id
+            self._save()
+        batch = self.analyzer.client.batches.create(
+            input_file_id=state.input_file_id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        state.batch_id = batch.id
+        state.status = batch.status
+        self._save()
+        return state
+
+    def poll(self, *, wait: bool = True) -> BatchJobState:
+        """Refresh the job status, optionally blocking until it is terminal."""
+        state = self._require_state()
+        if not state.batch_id:
+            raise BatchJobError("Job has not been submitted")
+        while True:
+            batch = self.analyzer.client.batches.retrieve(state.batch_id)
+            state.status = batch.status
+            state.output_file_id = batch.output_file_id
+            state.error_file_id = batch.error_file_id
+            if batch.request_counts is not None:
+                state.request_counts = batch.request_counts.model_dump()
+            self._save()
+            if not wait or state.status in TERMINAL_STATUSES:
+                return state
+            time.sleep(self.poll_interval)
+
+    def ingest(self) -> BatchJobState:
+        """Stream the output file into ``method_events``.
+
+        Progress is checkpointed after every inserted chunk, so lines already
+        ingested are skipped when resuming. A chunk is marked in flight before
+        its insert; if a run dies before the insert is confirmed, the resumed
+        run looks up the events those posts already have and only inserts the
+        rest, so method_events never gets the chunk twice.
+        """
+        state = self._require_state()
+        if state.status == "ingested":
+            return state
+        if state.status != "completed" or not state.output_file_id:
+            raise BatchJobError(f"Batch {state.batch_id} is {state.status}; nothing to ingest")
+
+        pending: List[dict] = []
+        recheck: Set[str] = set()
+        line_no = 0
+        with self.analyzer.client.files.with_streaming_response.content(
+            state.output_file_id
+        ) as response:
+            for raw_line in response.iter_lines():
+                if not raw_line.strip():
+                    continue
+                line_no += 1
+                if line_no <= state.ingested_lines:
+                    continue
+                post_id, methods = self.analyzer.parse_batch_result(json.loads(raw_line))
+                if line_no <= state.inflight_lines:
+                    recheck.add(post_id)
+                if self.normalizer is not None:
+                    methods = self.normalizer.normalize_all(methods)
+                pending.extend(
+                    method.to_event_record(post_id, state.analyzer_version) for method in methods
+                )
+                if len(pending) >= self.ingest_chunk_size:
+                    self._flush(pending, line_no, recheck)
+                    pending = []
+                    recheck = set()
+        self._flush(pending, line_no, recheck)
+        state.status = "ingested"
+        self._save()
+        return state
+
+    def run(self, posts: Optional[Sequence[Dict[str, Any]]] = None) -> BatchJobState:
+        """Prepare (if ``posts`` is given and no job is active), then resume to completion."""
+        if posts is not None and (self.state is None or self.state.status in FINISHED_STATUSES):
+            self.prepare(posts)
+        state = self._require_state()
+        if state.status == "prepared":
+            self.submit()
+        if self.state.status not in TERMINAL_STATUSES | {"ingested"}:
+            self.poll(wait=True)
+        if self.state.status == "completed":
+            self.ingest()
+        elif self.state.status != "ingested":
+            raise BatchJobError(f"Batch {self.state.batch_id} finished as {self.state.status}")
+        return self.state
+
+    def _flush(self, records: List[dict], line_no: int, recheck: Set[str]) -> None:
+        state = self._require_state()
+        if recheck:
+            records = self._drop_landed(records, recheck)
+        if records:
+            state.inflight_lines = max(state.inflight_lines, line_no)
+            self._save()
+            state.inserted_events += self.supabase.insert_method_events(records)
+        state.ingested_lines = max(state.ingested_lines, line_no)
+        if state.inflight_lines <= state.ingested_lines:
+            state.inflight_lines = 0
+        self._save()
+
+    def _drop_landed(self, records: List[dict], post_ids: Set[str]) -> List[dict]:
+        """Skip events of ``post_ids`` that an interrupted insert already stored.
+
+        Chunks of one insert may land in any order, so stored events are
+        matched by content rather than position.
+        """
+        rows = self.supabase.fetch_method_events_for_posts(
+            sorted(post_ids),
+            columns=("post_id", *EVENT_IDENTITY),
+            analyzer_version=self._require_state().analyzer_version,
+        )
+        landed = Counter(_event_identity(row) for row in rows)
+        remaining: List[dict] = []
+        for record in records:
+            key = _event_identity(record)
+            if landed[key] > 0:
+                landed[key] -= 1
+                continue
+            remaining.append(record)
+        return remaining
+
+    def _require_state(self) -> BatchJobState:
+        if self.state is None:
+            raise BatchJobError(f"No batch job state in {self.job_dir}")
+        return self.state
+
+    def _save(self) -> None:
+        self._require_state().save(self.state_path)
+
+
+def _event_identity(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (row["post_id"], *(row.get(column) for column in EVENT_IDENTITY))
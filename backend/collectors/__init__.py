@@ -1,16 +1,24 @@
 """Data collection utilities for Mental Collective Intelligence PoC."""
 
+from .http_cache import HttpResponseCache
 from .note_scraper import NoteHashtagCollector, NoteCollectorError
+from .replay import FixtureMissingError, RecordingTransport, ReplayTransport
 from .twitter_search import (
     CollectedPost,
     TwitterApiCollector,
     TwitterSearchCollector,
 )
+from .watermarks import WatermarkStore
 
 __all__ = [
     "CollectedPost",
+    "FixtureMissingError",
+    "HttpResponseCache",
     "NoteCollectorError",
     "NoteHashtagCollector",
+    "RecordingTransport",
+    "ReplayTransport",
     "TwitterApiCollector",
     "TwitterSearchCollector",
+    "WatermarkStore",
 ]
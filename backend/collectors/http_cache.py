@@ -0,0 +1,291 @@
+"""Opt-in disk cache for collector GET requests with conditional revalidation."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import httpx
+
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "https://note.com/api/": 600.0,
+    "https://api.twitter.com/2/": 300.0,
+    "https://twitter.com/i/api/": 300.0,
+}
+
+# Quota headers describe the moment of the original request; replaying them
+# would mislead the collectors' rate-limit pacing.
+_UNCACHED_HEADERS = (
+    "x-rate-limit-",
+    "x-ratelimit-",
+    "set-cookie",
+    "date",
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+)
+
+
+@dataclass
+class HttpCacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class HttpResponseCache:
+    """SQLite cache of successful GET responses keyed by URL and query params.
+
+    Entries younger than the TTL of their endpoint (longest matching prefix in
+    ``ttls``, else ``default_ttl``) are served without any request. Stale
+    entries are revalidated with ``If-None-Match``/``If-Modified-Since``, and a
+    304 refreshes them. Once more than ``max_entries`` responses are stored
+    the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        max_entries: int = 20_000,
+        default_ttl: float = 300.0,
+        ttls: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.stats = HttpCacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS http_cache_accessed_idx ON http_cache (accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        payload = json.dumps([url, items], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, url: str) -> float:
+        best: Optional[Tuple[int, float]] = None
+        for prefix, ttl in self.ttls.items():
+            if url.startswith(prefix) and (best is None or len(prefix) > best[0]):
+                best = (len(prefix), ttl)
+        return best[1] if best else self.default_ttl
+
+    def get(
+        self,
+        client: httpx.Client,
+        url: str,
+        *,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """``client.get`` through the cache."""
+        cached = self.fresh(url, params)
+        if cached is not None:
+            return cached
+        resp = client.get(
+            url, params=params, headers=self.conditional_headers(url, params, headers), **kwargs
+        )
+        return self.resolve(url, params, resp)
+
+    async def aget(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        *,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """``await client.get`` through the cache."""
+        cached = self.fresh(url, params)
+        if cached is not None:
+            return cached
+        resp = await client.get(
+            url, params=params, headers=self.conditional_headers(url, params, headers), **kwargs
+        )
+        return self.resolve(url, params, resp)
+
+    def fresh(self, url: str, params: Optional[Mapping[str, Any]] = None) -> Optional[httpx.Response]:
+        """The cached response if it is still within its TTL."""
+        key = self.make_key(url, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, fetched_at FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time.time() - row[3] >= self.ttl_for(url):
+                return None
+            self._touch_locked(key)
+            self.stats.hits += 1
+        return _build_response(url, params, row[0], row[1], row[2])
+
+    def conditional_headers(
+        self,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Dict[str, str]:
+        """``headers`` plus validators from a stale cached copy, if any."""
+        merged = dict(headers or {})
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM http_cache WHERE key = ?",
+                (self.make_key(url, params),),
+            ).fetchone()
+        if row:
+            if row[0]:
+                merged["If-None-Match"] = row[0]
+            if row[1]:
+                merged["If-Modified-Since"] = row[1]
+        return merged
+
+    def resolve(
+        self, url: str, params: Optional[Mapping[str, Any]], resp: httpx.Response
+    ) -> httpx.Response:
+        """Store a 200, or answer a 304 from the cached copy."""
+        key = self.make_key(url, params)
+        now = time.time()
+        if resp.status_code == 304:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT status, headers, body FROM http_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE http_cache SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                        (now, now, key),
+                    )
+                    self._conn.commit()
+                    self.stats.revalidated += 1
+                    return _build_response(url, params, row[0], row[1], row[2], live=resp.headers)
+            return resp
+        with self._lock:
+            self.stats.misses += 1
+        if resp.status_code != 200:
+            return resp
+        stored_headers = {
+            name: value
+            for name, value in resp.headers.items()
+            if not name.lower().startswith(_UNCACHED_HEADERS)
+        }
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO http_cache
+                    (key, url, status, headers, body, etag, last_modified, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET status = excluded.status,
+                                                headers = excluded.headers,
+                                                body = excluded.body,
+                                                etag = excluded.etag,
+                                                last_modified = excluded.last_modified,
+                                                fetched_at = excluded.fetched_at,
+                                                accessed_at = excluded.accessed_at
+                """,
+                (
+                    key,
+                    url,
+                    resp.status_code,
+                    json.dumps(stored_headers),
+                    resp.content,
+                    resp.headers.get("etag"),
+                    resp.headers.get("last-modified"),
+                    now,
+                    now,
+                ),
+            )
+            if not existed:
+                self._size += 1
+            self._evict_locked()
+            self._conn.commit()
+        return resp
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _touch_locked(self, key: str) -> None:
+        self._conn.execute(
+            "UPDATE http_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+        )
+        self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        excess = self._size - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            """
+            DELETE FROM http_cache WHERE key IN (
+                SELECT key FROM http_cache ORDER BY accessed_at ASC LIMIT ?
+            )
+            """,
+            (excess,),
+        )
+        self._size -= excess
+        self.stats.evictions += excess
+
+
+def _build_response(
+    url: str,
+    params: Optional[Mapping[str, Any]],
+    status: int,
+    headers_json: str,
+    body: bytes,
+    *,
+    live: Optional[httpx.Headers] = None,
+) -> httpx.Response:
+    headers = json.loads(headers_json)
+    if live is not None:
+        # A 304 carries the current quota headers; keep them for pacing.
+        headers.update(
+            {
+                name: value
+                for name, value in live.items()
+                if name.lower().startswith(("x-rate-limit-", "x-ratelimit-"))
+            }
+        )
+    return httpx.Response(
+        status,
+        headers=headers,
+        content=body,
+        request=httpx.Request("GET", url, params=params),
+    )
@@ -2,21 +2,96 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import List, Optional, Sequence
-from urllib.parse import quote
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
 
 import httpx
 
+from .http_cache import HttpResponseCache
 from .twitter_search import CollectedPost
+from .watermarks import WatermarkStore
 
 
 class NoteCollectorError(RuntimeError):
     """Raised when note scraping fails."""
 
 
+class _HostThrottle:
+    """Per-host concurrency cap plus a minimum delay between request starts."""
+
+    def __init__(self, *, max_concurrency: int, interval: float) -> None:
+        self.interval = interval
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self) -> "_HostThrottle":
+        await self._semaphore.acquire()
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self._semaphore.release()
+
+
+@dataclass
+class _TagCrawl:
+    tag: str
+    since: Optional[datetime]
+    # Notes published in (taken_below, taken_newest], plus ``taken_at_below``
+    # (keys published exactly at taken_below), were already returned by an
+    # earlier crawl that ``max_results`` cut short before reaching ``since``.
+    taken_below: Optional[datetime] = None
+    taken_newest: Optional[datetime] = None
+    taken_at_below: Tuple[str, ...] = ()
+    newest: Optional[datetime] = None
+    oldest: Optional[datetime] = None
+    oldest_keys: List[str] = field(default_factory=list)
+    count: int = 0
+    finished: bool = False
+
+    def already_taken(self, published: datetime, key: Optional[str]) -> bool:
+        if self.taken_below is None or self.taken_newest is None:
+            return False
+        if published == self.taken_below:
+            return key in self.taken_at_below
+        return self.taken_below < published <= self.taken_newest
+
+    def took(self, published: datetime, key: Optional[str]) -> None:
+        if self.newest is None or published > self.newest:
+            self.newest = published
+        if self.oldest is None or published < self.oldest:
+            self.oldest = published
+            self.oldest_keys = []
+        if published == self.oldest and key:
+            self.oldest_keys.append(key)
+
+
 class NoteHashtagCollector:
-    """Scrape note hashtag pages rendered by Nuxt."""
+    """Scrape note hashtag pages rendered by Nuxt.
+
+    ``iter_batches`` walks tags serially and yields each page's posts as it
+    arrives; ``iter_batches_async`` crawls tags concurrently (pages of one tag
+    stay sequential) with at most ``max_concurrency`` requests in flight per
+    host, started at least ``request_interval`` seconds apart. ``collect`` and
+    ``collect_async`` gather those batches into one list in tag order.
+
+    With a ``watermarks`` store, each tag remembers the newest ``publishAt`` it
+    has returned; later crawls drop notes at or before it and stop paginating
+    on the first page that reaches it. The mark only moves once a crawl gets
+    back down to it (or runs out of pages). A crawl cut short by
+    ``max_results`` instead parks the range it returned as a checkpoint, and
+    the next crawl skips that range and carries on below it.
+    """
 
     BASE_URL = "https://note.com"
     API_BASE = f"{BASE_URL}/api/v3"
@@ -29,33 +104,230 @@ class NoteHashtagCollector:
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
             "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
         ),
+        max_concurrency: int = 4,
+        request_interval: float = 0.25,
+        watermarks: Optional[WatermarkStore] = None,
+        http_cache: Optional[HttpResponseCache] = None,
+        transport: Optional[httpx.BaseTransport] = None,
     ) -> None:
         self.max_results = max_results
         self.user_agent = user_agent
-        self._client = httpx.Client(timeout=20.0)
+        self.max_concurrency = max_concurrency
+        self.request_interval = request_interval
+        self.watermarks = watermarks
+        self.http_cache = http_cache
+        self.transport = transport
+        self._client = httpx.Client(timeout=20.0, transport=transport)
 
     def collect(self, tags: Sequence[str]) -> List[CollectedPost]:
-        dataset: List[CollectedPost] = []
+        return [post for batch in self.iter_batches(tags) for post in batch]
+
+    def iter_batches(self, tags: Sequence[str]) -> Iterator[List[CollectedPost]]:
+        """Yield the new posts of each fetched page, tag by tag."""
         for tag in tags:
-            tag_records: List[CollectedPost] = []
+            crawl = self._start_crawl(tag)
             page = 1
-            while len(tag_records) < self.max_results:
+            while crawl.count < self.max_results:
                 notes, next_page = self._fetch_tag_notes(tag, page)
-                if not notes:
-                    break
-                for entry in notes:
-                    if len(tag_records) >= self.max_results:
-                        break
-                    post = self._to_collected(tag, entry)
-                    if post:
-                        tag_records.append(post)
-                if not next_page or next_page == page:
+                batch, more = self._take(crawl, notes)
+                if batch:
+                    yield batch
+                if not more or not next_page or next_page == page:
+                    crawl.finished = True
                     break
                 page = next_page
-            dataset.extend(tag_records)
-        return dataset
+            self._advance_watermark(crawl)
+
+    async def collect_async(self, tags: Sequence[str]) -> List[CollectedPost]:
+        """Concurrent ``collect``: same posts, same per-tag order and limits."""
+        per_tag: Dict[str, List[CollectedPost]] = {tag: [] for tag in tags}
+
+        async def emit(tag: str, batch: List[CollectedPost]) -> None:
+            per_tag[tag].extend(batch)
+
+        await self._crawl_tags_async(tags, emit)
+        return [post for tag in tags for post in per_tag[tag]]
+
+    async def iter_batches_async(
+        self, tags: Sequence[str], *, max_pending: int = 16
+    ) -> AsyncIterator[List[CollectedPost]]:
+        """Yield page batches from all tags as they complete.
+
+        At most ``max_pending`` batches wait for the consumer; crawlers pause
+        when the queue is full, so memory stays bounded.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_pending))
+        done = object()
+
+        async def emit(tag: str, batch: List[CollectedPost]) -> None:
+            await queue.put(batch)
+
+        async def crawl() -> None:
+            try:
+                await self._crawl_tags_async(tags, emit)
+            finally:
+                await queue.put(done)
+
+        task = asyncio.create_task(crawl())
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is done:
+                    break
+                yield batch
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def _crawl_tags_async(
+        self,
+        tags: Sequence[str],
+        emit: Callable[[str, List[CollectedPost]], Awaitable[None]],
+    ) -> None:
+        throttles: Dict[str, _HostThrottle] = {}
+        limits = httpx.Limits(max_connections=max(1, self.max_concurrency))
+        transport = (
+            self.transport if isinstance(self.transport, httpx.AsyncBaseTransport) else None
+        )
+        async with httpx.AsyncClient(timeout=20.0, limits=limits, transport=transport) as client:
+            await asyncio.gather(
+                *(self._crawl_tag_async(client, throttles, tag, emit) for tag in tags)
+            )
+
+    async def _crawl_tag_async(
+        self,
+        client: httpx.AsyncClient,
+        throttles: Dict[str, _HostThrottle],
+        tag: str,
+        emit: Callable[[str, List[CollectedPost]], Awaitable[None]],
+    ) -> None:
+        crawl = self._start_crawl(tag)
+        page = 1
+        while crawl.count < self.max_results:
+            url, params, headers = self._tag_request(tag, page)
+            host = urlsplit(url).netloc
+            throttle = throttles.get(host)
+            if throttle is None:
+                throttle = throttles[host] = _HostThrottle(
+                    max_concurrency=self.max_concurrency, interval=self.request_interval
+                )
+            resp = self.http_cache.fresh(url, params) if self.http_cache is not None else None
+            if resp is None:
+                if self.http_cache is not None:
+                    headers = self.http_cache.conditional_headers(url, params, headers)
+                async with throttle:
+                    resp = await client.get(url, params=params, headers=headers)
+                if self.http_cache is not None:
+                    resp = self.http_cache.resolve(url, params, resp)
+            notes, next_page = self._parse_tag_notes(tag, page, resp)
+            batch, more = self._take(crawl, notes)
+            if batch:
+                await emit(tag, batch)
+            if not more or not next_page or next_page == page:
+                crawl.finished = True
+                break
+            page = next_page
+        self._advance_watermark(crawl)
+
+    def _take(self, crawl: "_TagCrawl", notes: List[dict]) -> Tuple[List[CollectedPost], bool]:
+        """New posts from one page up to ``max_results``, and whether to keep paginating."""
+        if not notes:
+            return [], False
+        batch: List[CollectedPost] = []
+        reached_seen = False
+        for entry in notes:
+            if crawl.count >= self.max_results:
+                break
+            published = self._published_at(entry)
+            if published is not None:
+                if crawl.since is not None and published <= crawl.since:
+                    reached_seen = True
+                    continue
+                if crawl.already_taken(published, entry.get("key")):
+                    continue
+                crawl.took(published, entry.get("key"))
+            post = self._to_collected(crawl.tag, entry)
+            if post:
+                batch.append(post)
+                crawl.count += 1
+        return batch, not reached_seen
+
+    def _start_crawl(self, tag: str) -> "_TagCrawl":
+        crawl = _TagCrawl(tag, self._watermark(tag))
+        if self.watermarks is not None:
+            checkpoint = self.watermarks.checkpoint(self._watermark_key(tag))
+            if checkpoint:
+                crawl.taken_below = datetime.fromisoformat(checkpoint["taken_below"])
+                crawl.taken_newest = datetime.fromisoformat(checkpoint["taken_newest"])
+                crawl.taken_at_below = tuple(checkpoint.get("taken_at_below", ()))
+        return crawl
+
+    def _watermark(self, tag: str) -> Optional[datetime]:
+        if self.watermarks is None:
+            return None
+        value = self.watermarks.get(self._watermark_key(tag))
+        return datetime.fromisoformat(value) if value else None
+
+    def _advance_watermark(self, crawl: "_TagCrawl") -> None:
+        """Move the mark once the crawl is complete, otherwise park what it returned.
+
+        Everything between the newest note returned and ``crawl.oldest`` has
+        been returned (the part of an earlier checkpoint in between was
+        skipped), so that is the range the next crawl may skip.
+        """
+        if self.watermarks is None:
+            return
+        key = self._watermark_key(crawl.tag)
+        newest = crawl.newest
+        if crawl.taken_newest is not None and (newest is None or crawl.taken_newest > newest):
+            newest = crawl.taken_newest
+        if crawl.finished:
+            self.watermarks.clear_checkpoint(key)
+            if newest is not None and (crawl.since is None or newest > crawl.since):
+                self.watermarks.advance(key, newest.isoformat())
+            return
+        if crawl.oldest is None or newest is None:
+            return
+        oldest_keys = list(crawl.oldest_keys)
+        if crawl.oldest == crawl.taken_below:
+            oldest_keys.extend(crawl.taken_at_below)
+        self.watermarks.set_checkpoint(
+            key,
+            {
+                "taken_below": crawl.oldest.isoformat(),
+                "taken_at_below": oldest_keys,
+                "taken_newest": newest.isoformat(),
+            },
+        )
 
-    def _fetch_tag_notes(self, tag: str, page: int) -> tuple[List[dict], Optional[int]]:
+    @staticmethod
+    def _watermark_key(tag: str) -> str:
+        return f"note:{tag.lstrip('#')}"
+
+    @staticmethod
+    def _published_at(note: dict) -> Optional[datetime]:
+        value = note.get("publishAt")
+        if not value:
+            return None
+        try:
+            published = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if published.tzinfo is None:
+            published = published.replace(tzinfo=timezone.utc)
+        return published
+
+    def _fetch_tag_notes(self, tag: str, page: int) -> Tuple[List[dict], Optional[int]]:
+        url, params, headers = self._tag_request(tag, page)
+        if self.http_cache is not None:
+            resp = self.http_cache.get(self._client, url, params=params, headers=headers)
+        else:
+            resp = self._client.get(url, params=params, headers=headers)
+        return self._parse_tag_notes(tag, page, resp)
+
+    def _tag_request(self, tag: str, page: int) -> Tuple[str, dict, dict]:
         slug = quote(tag.lstrip("#"))
         params = {
             "order": "new",
@@ -67,11 +339,11 @@ class NoteHashtagCollector:
             "Accept": "application/json",
             "Referer": f"{self.BASE_URL}/hashtag/{slug}",
         }
-        resp = self._client.get(
-            f"{self.API_BASE}/hashtags/{slug}/notes",
-            params=params,
-            headers=headers,
-        )
+        return f"{self.API_BASE}/hashtags/{slug}/notes", params, headers
+
+    def _parse_tag_notes(
+        self, tag: str, page: int, resp: httpx.Response
+    ) -> Tuple[List[dict], Optional[int]]:
         if resp.status_code != 200:
             raise NoteCollectorError(
                 f"Failed to fetch note hashtag '{tag}' page {page} (status {resp.status_code})"
@@ -0,0 +1,155 @@
+"""Record/replay httpx transports for offline collector tests and benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+
+# Headers that describe the original transfer rather than the payload; the
+# stored body is already decoded.
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+
+class FixtureMissingError(LookupError):
+    """Raised when a replayed request has no recorded fixture."""
+
+
+def fixture_key(request: httpx.Request) -> str:
+    """Stable name for a request: method, URL without query, sorted query params."""
+    url = request.url
+    params = sorted(url.params.multi_items())
+    payload = json.dumps(
+        [request.method, f"{url.scheme}://{url.host}{url.path}", params],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class RecordingTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Pass requests to the network and save every response as a fixture file.
+
+    Request headers (credentials) are never written; only the method, URL,
+    status, response headers and body are stored.
+    """
+
+    def __init__(
+        self,
+        fixture_dir: Path | str,
+        *,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.fixture_dir = Path(fixture_dir)
+        self.fixture_dir.mkdir(parents=True, exist_ok=True)
+        self._transport = transport or httpx.HTTPTransport()
+        self._async_transport = async_transport or httpx.AsyncHTTPTransport()
+        self.recorded = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._transport.handle_request(request)
+        response.read()
+        return self._save(request, response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._async_transport.handle_async_request(request)
+        await response.aread()
+        return self._save(request, response)
+
+    def close(self) -> None:
+        self._transport.close()
+
+    async def aclose(self) -> None:
+        await self._async_transport.aclose()
+
+    def _save(self, request: httpx.Request, response: httpx.Response) -> httpx.Response:
+        body = response.content
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        }
+        record: Dict[str, object] = {
+            "method": request.method,
+            "url": str(request.url),
+            "status": response.status_code,
+            "headers": headers,
+        }
+        try:
+            record["text"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            record["base64"] = base64.b64encode(body).decode("ascii")
+        path = self.fixture_dir / f"{fixture_key(request)}.json"
+        path.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+        self.recorded += 1
+        return httpx.Response(
+            response.status_code, headers=headers, content=body, request=request
+        )
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Serve recorded fixtures with optional simulated latency.
+
+    Each request waits ``latency`` seconds plus up to ``jitter`` seconds drawn
+    from a seeded RNG, so runs are deterministic. Unknown requests raise
+    ``FixtureMissingError`` instead of touching the network.
+    """
+
+    def __init__(
+        self,
+        fixture_dir: Path | str,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.fixture_dir = Path(fixture_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._fixtures: Dict[str, dict] = {}
+        for path in sorted(self.fixture_dir.glob("*.json")):
+            record = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(record, dict) and "status" in record:
+                self._fixtures[path.stem] = record
+
+    def __len__(self) -> int:
+        return len(self._fixtures)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self._respond(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(request)
+
+    def _delay(self) -> float:
+        return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        record = self._fixtures.get(fixture_key(request))
+        if record is None:
+            raise FixtureMissingError(f"No fixture for {request.method} {request.url}")
+        self.requests += 1
+        if "text" in record:
+            body = record["text"].encode("utf-8")
+        else:
+            body = base64.b64decode(record.get("base64", ""))
+        return httpx.Response(
+            record["status"], headers=record.get("headers") or {}, content=body, request=request
+        )
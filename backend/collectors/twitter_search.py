@@ -2,21 +2,34 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass, asdict
+import time
+import unicodedata
+from dataclasses import dataclass, asdict, replace
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # in requirements.txt; json is the fallback for bare installs
+    orjson = None
+
+from .http_cache import HttpResponseCache
+from .watermarks import WatermarkStore
+
 
 GRAPHQL_ENDPOINT = "https://twitter.com/i/api/graphql/7jT5GT59P8IFjgxwqnEdQw/SearchTimeline"
 GUEST_ACTIVATE_ENDPOINT = "https://api.twitter.com/1.1/guest/activate.json"
 API_V2_ENDPOINT = "https://api.twitter.com/2/tweets/search/recent"
+API_V2_MAX_QUERY_LENGTH = 512
 DEFAULT_BEARER = os.getenv(
     "X_BEARER_TOKEN",
     "AAAAAAAAAAAAAAAAAAAAANRILgAAAAAAnNwIzUejRCOuH5E6I8xnZz4puTs=1Zv7ttfk8LF81IUq16cHjhLTvJu4FA33AGWWjCpTnA",
 )
 
+_loads = orjson.loads if orjson is not None else json.loads
+
 FEATURE_FLAGS = {
     "rweb_lists_timeline_redesign_enabled": False,
     "blue_business_profile_image_shape_enabled": False,
@@ -44,6 +57,34 @@ FEATURE_FLAGS = {
 }
 
 
+_MONTHS = {
+    name: index
+    for index, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1
+    )
+}
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode a response body, with orjson when it is installed."""
+    return _loads(body)
+
+
+def _parse_created_at(value: Optional[str]) -> datetime:
+    """Parse ``"Wed Oct 10 20:19:24 +0000 2018"`` without ``strptime`` for UTC stamps."""
+    try:
+        _, month, day, clock, offset, year = value.split(" ")
+        if offset == "+0000":
+            hour, minute, second = clock.split(":")
+            return datetime(
+                int(year), _MONTHS[month], int(day), int(hour), int(minute), int(second),
+                tzinfo=timezone.utc,
+            )
+        return datetime.strptime(value, "%a %b %d %H:%M:%S %z %Y").astimezone(timezone.utc)
+    except Exception:
+        return datetime.now(timezone.utc)
+
+
 class TwitterCollectorError(RuntimeError):
     """Generic collector failure."""
 
@@ -82,38 +123,71 @@ class TwitterSearchCollector:
         csrf_token: Optional[str] = None,
         guest_token: Optional[str] = None,
         user_agent: str = "Mozilla/5.0",
+        watermarks: Optional[WatermarkStore] = None,
+        http_cache: Optional[HttpResponseCache] = None,
+        transport: Optional[httpx.BaseTransport] = None,
     ) -> None:
         self.lang = lang
         self.max_results = max_results
+        self.watermarks = watermarks
+        self.http_cache = http_cache
+        self.transport = transport
         self.bearer_token = bearer_token or DEFAULT_BEARER
         self.auth_token = auth_token or os.getenv("X_AUTH_TOKEN")
         self.csrf_token = csrf_token or os.getenv("X_CSRF_TOKEN")
         self._guest_token = guest_token or os.getenv("X_GUEST_TOKEN")
         self.user_agent = user_agent
-        self._client = httpx.Client(timeout=20.0)
+        self._client = httpx.Client(timeout=20.0, transport=transport)
         self._referer = "https://x.com/search"
 
     def collect(self, keywords: Sequence[str]) -> List[CollectedPost]:
-        dataset: List[CollectedPost] = []
+        return [post for batch in self.iter_batches(keywords) for post in batch]
+
+    def iter_batches(self, keywords: Sequence[str]) -> Iterator[List[CollectedPost]]:
+        """Yield the new posts of each fetched page, keyword by keyword."""
         for keyword in keywords:
-            dataset.extend(self._collect_keyword(keyword))
-        return dataset
-
-    def _collect_keyword(self, keyword: str) -> List[CollectedPost]:
-        cursor: Optional[str] = None
-        collected: List[CollectedPost] = []
-        while len(collected) < self.max_results:
-            variables = self._build_variables(keyword, cursor)
+            yield from self._iter_keyword(keyword)
+
+    def _iter_keyword(self, keyword: str) -> Iterator[List[CollectedPost]]:
+        """Page through ``keyword`` newest first and advance its mark.
+
+        The mark only advances once the timeline reaches it or runs out of
+        cursors. When ``max_results`` stops the crawl first, the cursor is
+        parked as a checkpoint and the next run continues below it; pages are
+        never split, so a run may overshoot ``max_results`` by part of a page.
+        """
+        watermark_key = f"x_graphql:{self.lang}:{keyword}"
+        checkpoint = self.watermarks.checkpoint(watermark_key) if self.watermarks else None
+        if checkpoint:
+            since_id = checkpoint.get("since_id")
+            cursor: Optional[str] = checkpoint.get("cursor")
+            newest: Optional[str] = checkpoint.get("newest_id")
+        else:
+            since_id = _read_since_id(self.watermarks, watermark_key)
+            cursor = None
+            newest = None
+        count = 0
+        while count < self.max_results:
+            variables = self._build_variables(keyword, cursor, since_id)
             params = {
                 "variables": json.dumps(variables, separators=(",", ":")),
                 "features": json.dumps(FEATURE_FLAGS, separators=(",", ":")),
             }
-            response = self._client.get(
-                GRAPHQL_ENDPOINT,
-                params=params,
-                headers=self._build_headers(),
-                cookies=self._build_cookies(),
-            )
+            if self.http_cache is not None:
+                response = self.http_cache.get(
+                    self._client,
+                    GRAPHQL_ENDPOINT,
+                    params=params,
+                    headers=self._build_headers(),
+                    cookies=self._build_cookies(),
+                )
+            else:
+                response = self._client.get(
+                    GRAPHQL_ENDPOINT,
+                    params=params,
+                    headers=self._build_headers(),
+                    cookies=self._build_cookies(),
+                )
 
             if response.status_code == 403:
                 raise TwitterAuthError("Forbidden: auth token or guest token rejected by X")
@@ -125,18 +199,39 @@ class TwitterSearchCollector:
                 )
             response.raise_for_status()
 
-            payload_json = response.json()
+            payload_json = decode_json(response.content)
             new_posts, cursor = self._parse_response(keyword, payload_json)
             if not new_posts:
                 break
-            collected.extend(new_posts)
-            if not cursor:
+            unseen = [post for post in new_posts if _is_newer(post.platform_id, since_id)]
+            count += len(unseen)
+            newest = _newest_id(unseen, newest)
+            if unseen:
+                yield unseen
+            if len(unseen) < len(new_posts) or not cursor:
                 break
-        return collected[: self.max_results]
-
-    def _build_variables(self, keyword: str, cursor: Optional[str]) -> Dict[str, object]:
+        else:
+            if self.watermarks is not None:
+                print(
+                    f"[TwitterSearchCollector] Reached max_results on '{keyword}' after "
+                    f"{count} posts; the next run continues from there."
+                )
+                self.watermarks.set_checkpoint(
+                    watermark_key, {"since_id": since_id, "cursor": cursor, "newest_id": newest}
+                )
+            return
+        if self.watermarks is not None:
+            self.watermarks.clear_checkpoint(watermark_key)
+        _advance_since_id(self.watermarks, watermark_key, newest)
+
+    def _build_variables(
+        self, keyword: str, cursor: Optional[str], since_id: Optional[str] = None
+    ) -> Dict[str, object]:
+        raw_query = f"{keyword} lang:{self.lang}"
+        if since_id:
+            raw_query = f"{raw_query} since_id:{since_id}"
         variables: Dict[str, object] = {
-            "rawQuery": f"{keyword} lang:{self.lang}",
+            "rawQuery": raw_query,
             "count": min(50, self.max_results),
             "product": "Latest",
             "withDownvotePerspective": False,
@@ -192,87 +287,71 @@ class TwitterSearchCollector:
         return token
 
     def _parse_response(self, keyword: str, payload: dict) -> tuple[List[CollectedPost], Optional[str]]:
-        data = (
-            payload.get("data", {})
-            .get("search_by_raw_query", {})
-            .get("search_timeline", {})
-            .get("timeline", {})
-        )
-        instructions = data.get("instructions", [])
+        """Extract posts and the bottom cursor, touching only the fields we keep."""
+        try:
+            instructions = payload["data"]["search_by_raw_query"]["search_timeline"]["timeline"][
+                "instructions"
+            ]
+        except (KeyError, TypeError):
+            return [], None
         posts: List[CollectedPost] = []
         next_cursor: Optional[str] = None
+        to_collected = self._to_collected
 
         for instruction in instructions:
             itype = instruction.get("type")
-            if itype == "TimelineClearCache" and instruction.get("direction") == "Forward" and instruction.get("cursor"):
-                next_cursor = instruction["cursor"].get("value")
-            if itype == "TimelinePinEntry" and instruction.get("entry"):
-                cursor = self._extract_cursor(instruction["entry"])
-                if cursor:
-                    next_cursor = cursor
-                else:
-                    posts.extend(self._parse_entries(keyword, [instruction["entry"]]))
             if itype == "TimelineAddEntries":
-                for entry in instruction.get("entries", []):
-                    cursor = self._extract_cursor(entry)
-                    if cursor:
-                        next_cursor = cursor
-                        continue
-                    posts.extend(self._parse_entries(keyword, [entry]))
-            if itype == "TimelineAddToModule":
-                for entry in instruction.get("moduleItems", []):
-                    cursor = self._extract_cursor(entry)
-                    if cursor:
-                        next_cursor = cursor
-                        continue
-                    posts.extend(self._parse_entries(keyword, [entry]))
-
-        return posts, next_cursor
-
-    def _parse_entries(self, keyword: str, entries: Iterable[dict]) -> List[CollectedPost]:
-        parsed: List[CollectedPost] = []
-        for entry in entries:
-            content = entry.get("content") or entry.get("item") or {}
-            item_content = content.get("itemContent") or {}
-            tweet_result = self._extract_tweet(item_content)
-            if not tweet_result:
+                entries = instruction.get("entries") or ()
+            elif itype == "TimelineAddToModule":
+                entries = instruction.get("moduleItems") or ()
+            elif itype == "TimelinePinEntry":
+                entries = (instruction["entry"],) if instruction.get("entry") else ()
+            else:
+                if itype == "TimelineClearCache" and instruction.get("direction") == "Forward" and instruction.get("cursor"):
+                    next_cursor = instruction["cursor"].get("value")
                 continue
-            normalized = self._to_collected(keyword, tweet_result)
-            if normalized:
-                parsed.append(normalized)
-        return parsed
+            for entry in entries:
+                content = entry.get("content") or entry.get("item")
+                if not content:
+                    continue
+                item_content = content.get("itemContent")
+                if item_content is None:
+                    if (
+                        content.get("entryType") == "TimelineTimelineCursor"
+                        and content.get("cursorType") == "Bottom"
+                        and content.get("value")
+                    ):
+                        next_cursor = content["value"]
+                    continue
+                tweet_results = item_content.get("tweet_results") or item_content.get("tweet")
+                if not isinstance(tweet_results, dict):
+                    continue
+                result = tweet_results.get("result")
+                if result and result.get("__typename") == "TweetWithVisibilityResults":
+                    result = result.get("tweet")
+                if result:
+                    post = to_collected(keyword, result)
+                    if post:
+                        posts.append(post)
 
-    def _extract_cursor(self, entry: dict) -> Optional[str]:
-        content = entry.get("content") or entry.get("item") or {}
-        if content.get("entryType") == "TimelineTimelineCursor" and content.get("cursorType") == "Bottom":
-            return content.get("value")
-        return None
-
-    def _extract_tweet(self, item_content: dict) -> Optional[dict]:
-        tweet_results = item_content.get("tweet_results") or item_content.get("tweet")
-        if not tweet_results:
-            return None
-        result = tweet_results.get("result") if isinstance(tweet_results, dict) else None
-        if not result:
-            return None
-        typename = result.get("__typename")
-        if typename == "TweetWithVisibilityResults":
-            result = result.get("tweet")
-        if not result:
-            return None
-        return result
+        return posts, next_cursor
 
     def _to_collected(self, keyword: str, tweet_result: dict) -> Optional[CollectedPost]:
         legacy = tweet_result.get("legacy")
-        core = tweet_result.get("core", {})
         if not legacy:
             return None
-        user_result = core.get("user_results", {}).get("result")
-        if isinstance(user_result, dict) and user_result.get("__typename") == "UserResults" and "result" in user_result:
-            user_result = user_result.get("result")
-        if isinstance(user_result, dict) and user_result.get("__typename") == "UserUnavailable" and "reason" in user_result:
+        user_result = (tweet_result.get("core") or {}).get("user_results", {}).get("result")
+        if not isinstance(user_result, dict):
             return None
-        user_legacy = user_result.get("legacy") if isinstance(user_result, dict) else None
+        typename = user_result.get("__typename")
+        if typename == "UserResults" and "result" in user_result:
+            user_result = user_result["result"]
+            if not isinstance(user_result, dict):
+                return None
+            typename = user_result.get("__typename")
+        if typename == "UserUnavailable" and "reason" in user_result:
+            return None
+        user_legacy = user_result.get("legacy")
         if not user_legacy:
             return None
 
@@ -282,33 +361,75 @@ class TwitterSearchCollector:
         text = legacy.get("full_text") or legacy.get("text")
         if not text:
             return None
-
-        created_raw = legacy.get("created_at")
-        try:
-            posted_at = datetime.strptime(created_raw, "%a %b %d %H:%M:%S %z %Y").astimezone(timezone.utc)
-        except Exception:
-            posted_at = datetime.now(timezone.utc)
-
         username = user_legacy.get("screen_name")
         display_name = user_legacy.get("name")
         if not username or not display_name:
             return None
 
-        url = f"https://x.com/{username}/status/{post_id}"
         return CollectedPost(
             source_keyword=keyword,
             platform_id=post_id,
             username=f"@{username}",
             display_name=display_name,
             content=text,
-            posted_at=posted_at,
-            url=url,
+            posted_at=_parse_created_at(legacy.get("created_at")),
+            url=f"https://x.com/{username}/status/{post_id}",
             lang=self.lang,
         )
 
 
+class _RateLimitWindow:
+    """Last ``x-rate-limit-*`` headers seen for the recent-search endpoint."""
+
+    def __init__(self) -> None:
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+
+    def update(self, headers: httpx.Headers) -> None:
+        limit = _parse_int(headers.get("x-rate-limit-limit"))
+        remaining = _parse_int(headers.get("x-rate-limit-remaining"))
+        reset_at = _parse_int(headers.get("x-rate-limit-reset"))
+        if limit is not None:
+            self.limit = limit
+        if remaining is not None:
+            self.remaining = remaining
+        if reset_at is not None:
+            self.reset_at = float(reset_at)
+
+    def seconds_until_reset(self, now: float) -> float:
+        if self.reset_at is None:
+            return 0.0
+        return max(0.0, self.reset_at - now)
+
+    def pacing_delay(self, now: float, threshold: float) -> float:
+        """Spread the last ``threshold`` share of the window evenly until reset."""
+        if self.remaining is None or self.reset_at is None:
+            return 0.0
+        if self.remaining <= 0:
+            return self.seconds_until_reset(now) + 1.0
+        if self.limit and self.remaining > self.limit * threshold:
+            return 0.0
+        return self.seconds_until_reset(now) / self.remaining
+
+
 class TwitterApiCollector:
-    """Collector that uses the official Twitter API v2 recent search endpoint."""
+    """Collector that uses the official Twitter API v2 recent search endpoint.
+
+    Requests follow the ``x-rate-limit-*`` headers: once the remaining quota
+    drops below ``pace_threshold`` of the window the rest is spread until the
+    reset, and a 429 sleeps until the reset and retries. If the wait would
+    exceed ``max_rate_limit_wait`` the crawl stops, returns what it has and
+    (with a ``watermarks`` store) parks the keyword's ``next_token`` so the
+    next run resumes the same pagination.
+
+    With ``batch_keywords`` the keywords are packed into ``(a) OR (b) ...``
+    queries up to ``max_query_length`` characters, and each returned tweet is
+    attributed locally to every keyword whose terms all appear in its text.
+    Watermarks and checkpoints stay keyed per keyword, so regrouping keywords
+    between runs loses nothing: a group searches from the oldest ``since_id``
+    of its members and drops tweets a member had already seen.
+    """
 
     def __init__(
         self,
@@ -317,10 +438,27 @@ class TwitterApiCollector:
         max_results: int = 200,
         bearer_token: Optional[str] = None,
         user_agent: str = "Mozilla/5.0",
+        watermarks: Optional[WatermarkStore] = None,
+        max_rate_limit_wait: float = 900.0,
+        pace_threshold: float = 0.1,
+        batch_keywords: bool = False,
+        max_query_length: int = API_V2_MAX_QUERY_LENGTH,
+        http_cache: Optional[HttpResponseCache] = None,
+        transport: Optional[httpx.BaseTransport] = None,
     ) -> None:
         self.lang = lang
         self.max_results = max_results
         self.user_agent = user_agent
+        self.watermarks = watermarks
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.pace_threshold = pace_threshold
+        self.batch_keywords = batch_keywords
+        self.max_query_length = max_query_length
+        self.http_cache = http_cache
+        self.transport = transport
+        self.pending: List[str] = []
+        self._window = _RateLimitWindow()
+        self._rate_limited = False
         self.bearer_token = (
             bearer_token
             or os.getenv("TWITTER_BEARER_TOKEN")
@@ -330,35 +468,179 @@ class TwitterApiCollector:
             raise TwitterAuthError(
                 "TWITTER_BEARER_TOKEN not set. Provide your official Twitter v2 bearer token."
             )
-        self._client = httpx.Client(timeout=20.0)
+        self._client = httpx.Client(timeout=20.0, transport=transport)
 
     def collect(self, keywords: Sequence[str]) -> List[CollectedPost]:
-        dataset: List[CollectedPost] = []
+        """Collect every keyword; ``pending`` lists those left unfinished by rate limits."""
+        return [post for batch in self.iter_batches(keywords) for post in batch]
+
+    def iter_batches(self, keywords: Sequence[str]) -> Iterator[List[CollectedPost]]:
+        """Yield the posts of each fetched page as it arrives."""
+        self.pending = []
+        self._rate_limited = False
+        groups = self._keyword_groups(keywords) if self.batch_keywords else [[k] for k in keywords]
+        for group in groups:
+            if self._rate_limited:
+                self.pending.extend(group)
+                continue
+            if len(group) == 1:
+                yield from self._iter_query(group[0], group)
+            else:
+                query = " OR ".join(f"({keyword})" for keyword in group)
+                marks = {
+                    keyword: _read_since_id(self.watermarks, self._watermark_key(keyword))
+                    for keyword in group
+                }
+                for batch in self._iter_query(
+                    query, group, max_results=self.max_results * len(group)
+                ):
+                    batch = [
+                        post
+                        for post in _attribute_keywords(group, batch)
+                        if _is_newer(post.platform_id, marks.get(post.source_keyword))
+                    ]
+                    if batch:
+                        yield batch
+            if self._rate_limited:
+                self.pending.extend(group)
+
+    def _keyword_groups(self, keywords: Sequence[str]) -> List[List[str]]:
+        """Greedily pack keywords into OR queries that fit ``max_query_length``."""
+        groups: List[List[str]] = []
+        current: List[str] = []
         for keyword in keywords:
-            dataset.extend(self._collect_keyword(keyword))
-        return dataset
-
-    def _collect_keyword(self, keyword: str) -> List[CollectedPost]:
-        collected: List[CollectedPost] = []
-        next_token: Optional[str] = None
-        while len(collected) < self.max_results:
-            remaining = self.max_results - len(collected)
+            candidate = current + [keyword]
+            query = " OR ".join(f"({k})" for k in candidate)
+            if current and len(self._build_query(query)) > self.max_query_length:
+                groups.append(current)
+                candidate = [keyword]
+            current = candidate
+        if current:
+            groups.append(current)
+        return groups
+
+    def _iter_query(
+        self, query: str, keywords: Sequence[str], *, max_results: Optional[int] = None
+    ) -> Iterator[List[CollectedPost]]:
+        """Paginate ``query``, which searches ``keywords``, and advance each keyword's mark.
+
+        Marks only advance once pagination reaches them or runs out of pages.
+        When ``max_results`` stops it first, the position is parked like a rate
+        limit, so the next run fills the gap instead of skipping it. Pages are
+        never split (recent search returns at least 10 tweets per page), so a
+        run may return up to 9 tweets more than ``max_results``.
+        """
+        max_results = max_results or self.max_results
+        watermark_keys = [self._watermark_key(keyword) for keyword in keywords]
+        checkpoint = self._shared_checkpoint(watermark_keys, query)
+        if checkpoint:
+            since_id = checkpoint.get("since_id")
+            next_token: Optional[str] = checkpoint.get("next_token")
+            newest = checkpoint.get("newest_id")
+        else:
+            since_id = _oldest_since_id(self.watermarks, watermark_keys)
+            next_token = None
+            newest = None
+        count = 0
+        while count < max_results:
+            remaining = max_results - count
             batch_size = max(10, min(100, remaining))
-            params = self._build_params(keyword, batch_size, next_token)
+            params = self._build_params(query, batch_size, next_token, since_id)
             payload = self._request(params)
-            posts = self._parse_tweets(keyword, payload)
+            if payload is None:
+                self._park(query, watermark_keys, since_id, next_token, newest, count)
+                return
+            posts = self._parse_tweets(query, payload)
             if not posts:
                 break
-            collected.extend(posts)
+            count += len(posts)
+            newest = _newest_id(posts, newest)
             next_token = payload.get("meta", {}).get("next_token")
+            yield posts
             if not next_token:
                 break
-        return collected[: self.max_results]
+        else:
+            if next_token:
+                self._park(
+                    query, watermark_keys, since_id, next_token, newest, count, rate_limited=False
+                )
+                return
+        for watermark_key in watermark_keys:
+            if self.watermarks is not None:
+                self.watermarks.clear_checkpoint(watermark_key)
+            _advance_since_id(self.watermarks, watermark_key, newest)
+
+    def _watermark_key(self, keyword: str) -> str:
+        return f"x_api:{self.lang}:{keyword}"
+
+    def _shared_checkpoint(
+        self, watermark_keys: Sequence[str], query: str
+    ) -> Optional[Dict[str, Any]]:
+        """The checkpoint parked by this exact query on every key, if there is one.
+
+        A ``next_token`` only continues the query that issued it; if the
+        keywords were regrouped, the group restarts from its members' marks,
+        which were never advanced past the interrupted pagination.
+        """
+        if self.watermarks is None:
+            return None
+        checkpoints = [self.watermarks.checkpoint(key) for key in watermark_keys]
+        first = checkpoints[0]
+        if not first or first.get("query", query) != query:
+            return None
+        if any(checkpoint != first for checkpoint in checkpoints[1:]):
+            return None
+        return first
 
-    def _build_params(self, keyword: str, limit: int, next_token: Optional[str]) -> Dict[str, Any]:
-        query = f"({keyword}) lang:{self.lang}" if self.lang else keyword
+    def _park(
+        self,
+        query: str,
+        watermark_keys: Sequence[str],
+        since_id: Optional[str],
+        next_token: Optional[str],
+        newest: Optional[str],
+        count: int,
+        *,
+        rate_limited: bool = True,
+    ) -> None:
+        """Remember where an interrupted pagination stopped, on every keyword it covers.
+
+        The watermarks themselves are not advanced until the resumed
+        pagination finishes, so tweets between the checkpoint and ``since_id``
+        are not skipped.
+        """
+        if rate_limited:
+            print(
+                f"[TwitterApiCollector] Rate limited on '{query}' after {count} posts; "
+                "resumable on the next run."
+            )
+        else:
+            print(
+                f"[TwitterApiCollector] Reached max_results on '{query}' after {count} posts; "
+                "the next run continues from there."
+            )
+        if self.watermarks is None:
+            return
+        for watermark_key in watermark_keys:
+            self.watermarks.set_checkpoint(
+                watermark_key,
+                {
+                    "query": query,
+                    "since_id": since_id,
+                    "next_token": next_token,
+                    "newest_id": newest,
+                },
+            )
+
+    def _build_params(
+        self,
+        keyword: str,
+        limit: int,
+        next_token: Optional[str],
+        since_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         params: Dict[str, Any] = {
-            "query": query,
+            "query": self._build_query(keyword),
             "max_results": limit,
             "tweet.fields": "id,text,author_id,created_at,lang,possibly_sensitive",
             "expansions": "author_id",
@@ -366,19 +648,49 @@ class TwitterApiCollector:
         }
         if next_token:
             params["next_token"] = next_token
+        if since_id:
+            params["since_id"] = since_id
         return params
 
-    def _request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_query(self, keyword: str) -> str:
+        return f"({keyword}) lang:{self.lang}" if self.lang else keyword
+
+    def _request(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """GET one page, waiting out rate limits; None if the wait is too long."""
         headers = {
             "Authorization": f"Bearer {self.bearer_token}",
             "User-Agent": self.user_agent,
         }
-        response = self._client.get(API_V2_ENDPOINT, params=params, headers=headers)
-        if response.status_code == 429:
-            retry_after = response.headers.get("Retry-After", "60")
-            raise TwitterCollectorError(
-                f"Twitter API rate limit hit (429). Retry after {retry_after} seconds."
-            )
+        cached = self.http_cache.fresh(API_V2_ENDPOINT, params) if self.http_cache is not None else None
+        if cached is not None:
+            return cached.json()
+        while True:
+            delay = self._window.pacing_delay(time.time(), self.pace_threshold)
+            if delay > self.max_rate_limit_wait:
+                self._rate_limited = True
+                return None
+            if delay > 0:
+                time.sleep(delay)
+            if self.http_cache is not None:
+                response = self.http_cache.get(
+                    self._client, API_V2_ENDPOINT, params=params, headers=headers
+                )
+            else:
+                response = self._client.get(API_V2_ENDPOINT, params=params, headers=headers)
+            self._window.update(response.headers)
+            if response.status_code != 429:
+                break
+            wait = self._window.seconds_until_reset(time.time())
+            retry_after = _parse_int(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                wait = max(wait, float(retry_after))
+            wait = max(wait, 1.0) + 1.0
+            if wait > self.max_rate_limit_wait:
+                self._rate_limited = True
+                return None
+            print(f"[TwitterApiCollector] 429 received; sleeping {wait:.0f}s until the window resets.")
+            self._window.remaining = None
+            time.sleep(wait)
         if response.status_code >= 400:
             try:
                 detail = response.json()
@@ -441,3 +753,95 @@ class TwitterApiCollector:
             return datetime.fromisoformat(normalized)
         except Exception:
             return datetime.now(timezone.utc)
+
+
+def _attribute_keywords(
+    keywords: Sequence[str], posts: Sequence[CollectedPost]
+) -> List[CollectedPost]:
+    """Re-tag posts from an OR query with each keyword they match.
+
+    A post matching several keywords is emitted once per keyword, as the
+    per-keyword queries would have returned it. Posts matching none (e.g.
+    matched on URL or hashtag entities) go to the group's first keyword, so
+    source_keyword always names a keyword that was searched.
+    """
+    keyword_terms = [(keyword, _keyword_terms(keyword)) for keyword in keywords]
+    attributed: List[CollectedPost] = []
+    for post in posts:
+        text = _fold(post.content)
+        matched = [
+            keyword
+            for keyword, terms in keyword_terms
+            if terms and all(term in text for term in terms)
+        ]
+        if not matched:
+            matched = [keywords[0]]
+        attributed.extend(replace(post, source_keyword=keyword) for keyword in matched)
+    return attributed
+
+
+def _keyword_terms(keyword: str) -> List[str]:
+    terms = []
+    for term in keyword.split():
+        if term.startswith("-") or ":" in term or term.upper() == "OR":
+            continue
+        term = _fold(term.strip('"()'))
+        if term:
+            terms.append(term)
+    return terms
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _read_since_id(watermarks: Optional[WatermarkStore], key: str) -> Optional[str]:
+    return watermarks.get(key) if watermarks is not None else None
+
+
+def _oldest_since_id(watermarks: Optional[WatermarkStore], keys: Sequence[str]) -> Optional[str]:
+    """The smallest mark among ``keys``; None if any key has none (search everything)."""
+    oldest: Optional[str] = None
+    for key in keys:
+        mark = _read_since_id(watermarks, key)
+        if mark is None:
+            return None
+        if oldest is None or _is_newer(oldest, mark):
+            oldest = mark
+    return oldest
+
+
+def _is_newer(post_id: str, since_id: Optional[str]) -> bool:
+    if not since_id:
+        return True
+    try:
+        return int(post_id) > int(since_id)
+    except ValueError:
+        return True
+
+
+def _advance_since_id(
+    watermarks: Optional[WatermarkStore], key: str, newest: Optional[str]
+) -> None:
+    """Move ``key`` to ``newest`` if it is a larger tweet id (snowflake ids grow over time)."""
+    if watermarks is None or not newest:
+        return
+    if _is_newer(newest, watermarks.get(key)):
+        watermarks.advance(key, newest)
+
+
+def _newest_id(posts: Sequence[CollectedPost], floor: Optional[str] = None) -> Optional[str]:
+    newest = floor
+    for post in posts:
+        if post.platform_id.isdigit() and _is_newer(post.platform_id, newest):
+            newest = post.platform_id
+    return newest
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
@@ -0,0 +1,51 @@
+"""Per-tag/per-keyword high-water marks for incremental crawling."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class WatermarkStore:
+    """JSON file of the newest item seen per crawl key.
+
+    Collectors read a key's mark before paginating and stop once they reach
+    items at or below it, then ``advance`` it to the newest item they saw.
+    Advances stay in memory until ``save`` is called, so a run that fails
+    before its posts are stored does not skip them next time. A crawl cut
+    short (e.g. by rate limits) can also park a resumable checkpoint next to
+    its mark.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._marks: Dict[str, Any] = {}
+        if self.path.exists():
+            self._marks = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._marks)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._marks.get(key)
+
+    def advance(self, key: str, value: str) -> None:
+        self._marks[key] = value
+
+    def checkpoint(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._marks.get(f"{key}#checkpoint")
+
+    def set_checkpoint(self, key: str, state: Dict[str, Any]) -> None:
+        self._marks[f"{key}#checkpoint"] = state
+
+    def clear_checkpoint(self, key: str) -> None:
+        self._marks.pop(f"{key}#checkpoint", None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(
+            json.dumps(self._marks, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8"
+        )
+        tmp_path.replace(self.path)
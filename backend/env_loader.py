@@ -0,0 +1,16 @@
+"""Environment loading shared by the backend scripts."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def load_env() -> None:
+    load_dotenv(dotenv_path=BACKEND_DIR / ".env", override=True)
+    # Load repo-root .env only to fill missing values without overriding backend settings
+    load_dotenv(override=False)
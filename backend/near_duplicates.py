@@ -0,0 +1,259 @@
+"""Near-duplicate clustering of raw_posts ahead of LLM analysis (MinHash LSH)."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import struct
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+_URL_PATTERN = re.compile(r"https?://\S+")
+_UINT64_MAX = (1 << 64) - 1
+
+
+class MinHasher:
+    """One-permutation MinHash over character shingles.
+
+    Each shingle is hashed once and dropped into one of ``num_perm`` bins, the
+    minimum per bin forming the signature; empty bins borrow from the next
+    non-empty bin. This costs one hash per shingle instead of ``num_perm``.
+    """
+
+    def __init__(self, *, num_perm: int = 64, shingle_size: int = 4) -> None:
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        bins = [_UINT64_MAX] * self.num_perm
+        for shingle in self.shingles(text):
+            value = int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+            )
+            index = value % self.num_perm
+            if value < bins[index]:
+                bins[index] = value
+        if all(value == _UINT64_MAX for value in bins):
+            return tuple(bins)
+        # Rotation densification: fill each empty bin from the next filled one.
+        for index in range(self.num_perm):
+            if bins[index] != _UINT64_MAX:
+                continue
+            offset = 1
+            while bins[(index + offset) % self.num_perm] == _UINT64_MAX:
+                offset += 1
+            bins[index] = bins[(index + offset) % self.num_perm] ^ offset
+        return tuple(bins)
+
+    def shingles(self, text: str) -> set:
+        normalized = normalize_for_shingles(text)
+        k = self.shingle_size
+        if len(normalized) <= k:
+            return {normalized} if normalized else set()
+        return {normalized[i : i + k] for i in range(len(normalized) - k + 1)}
+
+
+def normalize_for_shingles(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _URL_PATTERN.sub("", text)
+    return "".join(text.split())
+
+
+def estimate_jaccard(a: Sequence[int], b: Sequence[int]) -> float:
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class NearDuplicateIndex:
+    """Persistent MinHash LSH index that assigns posts to near-duplicate clusters.
+
+    Only cluster representatives are stored in the LSH band tables, and all
+    state lives in SQLite, so memory stays flat as the corpus grows and the
+    index is updated incrementally on every run. Each cluster can also carry
+    the analyzer result of its representative, which lets later members reuse
+    it without another LLM call.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        num_perm: int = 64,
+        bands: int = 8,
+        threshold: float = 0.8,
+        shingle_size: int = 4,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS members (
+                post_id TEXT PRIMARY KEY,
+                cluster_id TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS clusters (
+                cluster_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                size INTEGER NOT NULL DEFAULT 1,
+                analyzer_version TEXT,
+                result TEXT
+            );
+            CREATE TABLE IF NOT EXISTS lsh_bands (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                cluster_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS lsh_bands_lookup_idx ON lsh_bands (band, bucket);
+            """
+        )
+        self._conn.commit()
+
+    def assign(self, post_id: str, content: str) -> Tuple[str, bool]:
+        """Place a post in a cluster; returns ``(cluster_id, is_new_cluster)``."""
+        with self._lock:
+            assigned = self._assign_locked(post_id, content)
+            self._conn.commit()
+        return assigned
+
+    def group(
+        self, posts: Sequence[Dict[str, Any]], *, persist: bool = True
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Assign ``posts`` and return cluster ID → member posts, in input order.
+
+        With ``persist=False`` the assignments are rolled back afterwards, so
+        a dry run sees the same clusters without changing the index.
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for post in posts:
+                post_id = post.get("id") or post.get("platform_id")
+                content = post.get("content") or ""
+                if not post_id or not content:
+                    continue
+                cluster_id, _ = self._assign_locked(post_id, content)
+                groups.setdefault(cluster_id, []).append(post)
+            if persist:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        return groups
+
+    def _assign_locked(self, post_id: str, content: str) -> Tuple[str, bool]:
+        row = self._conn.execute(
+            "SELECT cluster_id FROM members WHERE post_id = ?", (post_id,)
+        ).fetchone()
+        if row:
+            return row[0], False
+        signature = self.hasher.signature(content)
+        band_keys = self._band_keys(signature)
+        cluster_id = self._best_match(signature, band_keys)
+        created = cluster_id is None
+        if created:
+            cluster_id = post_id
+            self._conn.execute(
+                "INSERT INTO clusters (cluster_id, signature) VALUES (?, ?)",
+                (cluster_id, _pack(signature)),
+            )
+            self._conn.executemany(
+                "INSERT INTO lsh_bands (band, bucket, cluster_id) VALUES (?, ?, ?)",
+                [(band, bucket, cluster_id) for band, bucket in band_keys],
+            )
+        else:
+            self._conn.execute(
+                "UPDATE clusters SET size = size + 1 WHERE cluster_id = ?", (cluster_id,)
+            )
+        self._conn.execute(
+            "INSERT INTO members (post_id, cluster_id) VALUES (?, ?)", (post_id, cluster_id)
+        )
+        return cluster_id, created
+
+    def get_result(self, cluster_id: str, analyzer_version: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM clusters WHERE cluster_id = ? AND analyzer_version = ?",
+                (cluster_id, analyzer_version),
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def store_result(
+        self, cluster_id: str, analyzer_version: str, raw_methods: List[Dict[str, Any]]
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE clusters SET analyzer_version = ?, result = ? WHERE cluster_id = ?",
+                (analyzer_version, json.dumps(raw_methods, ensure_ascii=False), cluster_id),
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            posts = self._conn.execute("SELECT COUNT(*) FROM members").fetchone()[0]
+            clusters = self._conn.execute("SELECT COUNT(*) FROM clusters").fetchone()[0]
+        return {"posts": posts, "clusters": clusters}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows : (band + 1) * self.rows]
+            digest = hashlib.blake2b(_pack(chunk), digest_size=8).digest()
+            # SQLite integers are signed 64-bit.
+            keys.append((band, int.from_bytes(digest, "big", signed=True)))
+        return keys
+
+    def _best_match(
+        self, signature: Tuple[int, ...], band_keys: List[Tuple[int, int]]
+    ) -> Optional[str]:
+        candidates = set()
+        for band, bucket in band_keys:
+            rows = self._conn.execute(
+                "SELECT cluster_id FROM lsh_bands WHERE band = ? AND bucket = ?", (band, bucket)
+            ).fetchall()
+            candidates.update(row[0] for row in rows)
+        best_id: Optional[str] = None
+        best_score = self.threshold
+        for cluster_id in candidates:
+            row = self._conn.execute(
+                "SELECT signature FROM clusters WHERE cluster_id = ?", (cluster_id,)
+            ).fetchone()
+            if not row:
+                continue
+            score = estimate_jaccard(signature, _unpack(row[0]))
+            if score >= best_score:
+                best_id, best_score = cluster_id, score
+        return best_id
+
+
+def mark_duplicate(record: dict, representative_id: str) -> dict:
+    """Tag a ``method_events`` row copied from a near-duplicate's representative."""
+    raw_response = dict(record.get("raw_response") or {})
+    raw_response["near_duplicate_of"] = representative_id
+    return {**record, "raw_response": raw_response}
+
+
+def _pack(values: Sequence[int]) -> bytes:
+    return struct.pack(f">{len(values)}Q", *values)
+
+
+def _unpack(blob: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f">{len(blob) // 8}Q", blob)
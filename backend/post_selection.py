@@ -0,0 +1,58 @@
+"""Choose the raw_posts an analysis run sends to the LLM."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from prefilter import TestimonyPrefilter
+from supabase_client import SupabaseClient
+
+
+def select_posts_for_analysis(
+    client: SupabaseClient,
+    filters: Dict[str, Any],
+    *,
+    prefilter: Optional[TestimonyPrefilter] = None,
+    prompt_tokens: int = 0,
+    price_per_1k_tokens: float = 0.0,
+    mark_skipped: bool = True,
+    pg: Optional[Any] = None,
+    batch_size: int = 2000,
+) -> Optional[List[Dict[str, Any]]]:
+    """raw_posts matching ``filters`` that still need analysis; None if none matched at all.
+
+    ``filters`` are the ``SupabaseClient.fetch_raw_posts`` keyword arguments.
+    Posts that already have method_events are dropped (inside the query when
+    ``pg`` is given), then ``prefilter`` removes posts without testimony
+    signals. Those are marked as skipped in raw_posts unless ``mark_skipped``
+    is false, so runs with ``exclude_flagged`` stop fetching them.
+    """
+    if pg is not None:
+        # The analyzed-posts check happens in the query itself.
+        raw_posts = [
+            post
+            for batch in pg.iter_unanalyzed_raw_posts(batch_size=batch_size, **filters)
+            for post in batch
+        ]
+    else:
+        raw_posts = client.fetch_raw_posts(**filters)
+
+    if not raw_posts:
+        print("No raw_posts found matching filters.")
+        return None
+
+    if pg is not None:
+        to_process = raw_posts
+    else:
+        post_ids = [post["id"] for post in raw_posts if post.get("id")]
+        processed_ids = client.fetch_method_event_post_ids(post_ids)
+        to_process = [post for post in raw_posts if post.get("id") not in processed_ids]
+
+    print(f"Fetched {len(raw_posts)} raw_posts, {len(to_process)} need analysis.")
+
+    if prefilter is not None:
+        to_process, skipped, report = prefilter.split(to_process)
+        print(report.summary(prompt_tokens=prompt_tokens, price_per_1k_tokens=price_per_1k_tokens))
+        if skipped and mark_skipped:
+            client.mark_posts_skipped(skipped)
+    return to_process
@@ -2,23 +2,85 @@
 
 from __future__ import annotations
 
+import io
+import json
 import os
-from typing import Any, List
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from urllib.parse import urlparse
 
 import psycopg2
-from psycopg2.extras import execute_batch
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor, execute_batch
+from psycopg2.pool import ThreadedConnectionPool
+
+
+RAW_POST_COLUMNS = (
+    "source_keyword",
+    "platform_id",
+    "username",
+    "display_name",
+    "content",
+    "posted_at",
+    "url",
+    "lang",
+    "ingestion_source",
+    "metadata",
+)
+METHOD_EVENT_COLUMNS = (
+    "post_id",
+    "method_slug",
+    "method_display_name",
+    "action_text",
+    "effect_text",
+    "effect_label",
+    "sentiment_score",
+    "spam_flag",
+    "confidence",
+    "analyzer_version",
+    "raw_response",
+)
 
 
 class PostgresClient:
-    """Direct PostgreSQL connection for Supabase."""
+    """Pooled PostgreSQL connections for Supabase.
+
+    Connections come from a thread-safe pool and are health-checked before
+    reuse when they have been idle for ``health_check_interval`` seconds.
+    Every operation runs inside one transaction and sets no session state,
+    so the client also works behind Supabase's transaction-mode pooler.
+    """
 
-    def __init__(self, connection_string: str) -> None:
+    def __init__(
+        self,
+        connection_string: str,
+        *,
+        min_connections: int = 1,
+        max_connections: int = 4,
+        health_check_interval: float = 30.0,
+        **connect_kwargs: Any,
+    ) -> None:
         self.connection_string = connection_string
-        self.conn = None
+        self.min_connections = max(0, min_connections)
+        self.max_connections = max(1, max_connections, self.min_connections)
+        self.health_check_interval = health_check_interval
+        self.connect_kwargs = {
+            "application_name": "mental-collective-backend",
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            **connect_kwargs,
+        }
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
 
     @classmethod
-    def from_env(cls) -> "PostgresClient":
+    def from_env(cls, **kwargs: Any) -> "PostgresClient":
         """Create client from environment variable."""
         # Try connection string first
         conn_str = os.getenv("SUPABASE_DB_CONNECTION_STRING", "").strip()
@@ -29,25 +91,172 @@ class PostgresClient:
                 "Get it from Supabase Dashboard → Project Settings → Database → Connection string → Connection pooling → Transaction mode"
             )
         
-        return cls(connection_string=conn_str)
+        return cls(connection_string=conn_str, **kwargs)
 
     def connect(self) -> None:
-        """Establish database connection."""
-        if not self.conn or self.conn.closed:
-            self.conn = psycopg2.connect(self.connection_string)
+        """Open the connection pool."""
+        with self._pool_lock:
+            if self._pool is None or self._pool.closed:
+                self._pool = ThreadedConnectionPool(
+                    self.min_connections,
+                    self.max_connections,
+                    self.connection_string,
+                    **self.connect_kwargs,
+                )
 
     def close(self) -> None:
-        """Close database connection."""
-        if self.conn and not self.conn.closed:
-            self.conn.close()
+        """Close every pooled connection."""
+        with self._pool_lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+            self._last_used.clear()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a healthy connection for one transaction.
+
+        Commits when the block succeeds, rolls back when it raises, and
+        returns the connection to the pool either way.
+        """
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            if conn.closed:
+                broken = True
+            else:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            raise
+        finally:
+            self._checkin(conn, broken=broken or bool(conn.closed))
+
+    def stream(
+        self,
+        query: str,
+        params: Optional[Sequence[Any] | Dict[str, Any]] = None,
+        *,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the rows of ``query`` as dicts, ``batch_size`` at a time.
+
+        A named (server-side) cursor keeps the result on the server, so only
+        one batch is in memory. The connection is held until the generator
+        is exhausted or closed.
+        """
+        with self.connection() as conn:
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor) as cur:
+                cur.itersize = batch_size
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [dict(row) for row in rows]
+
+    def iter_method_events_with_posts(
+        self,
+        batch_size: int = 1000,
+        *,
+        after: Optional[Tuple[str, str]] = None,
+        before: Optional[str] = None,
+        method_slugs: Optional[Sequence[str]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Batches of method_events shaped like ``SupabaseClient.fetch_method_events_with_posts``.
+
+        ``after`` skips events up to a ``(created_at, id)`` key, ``before``
+        stops at events created before that timestamp and ``method_slugs``
+        restricts the scan to those slugs.
+        """
+        conditions = []
+        params: List[Any] = []
+        if after is not None:
+            conditions.append("(e.created_at, e.id) > (%s::timestamptz, %s::uuid)")
+            params.extend(after)
+        if before is not None:
+            conditions.append("e.created_at < %s::timestamptz")
+            params.append(before)
+        if method_slugs is not None:
+            conditions.append("e.method_slug = ANY(%s)")
+            params.append(list(method_slugs))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.stream(
+            f"""
+            SELECT e.id, e.method_slug, e.method_display_name, e.effect_label,
+                   e.action_text, e.effect_text, e.sentiment_score, e.spam_flag,
+                   e.confidence, e.created_at, e.post_id,
+                   e.raw_response->>'near_duplicate_of' AS near_duplicate_of,
+                   json_build_object(
+                       'id', p.id, 'posted_at', p.posted_at, 'source_keyword', p.source_keyword,
+                       'url', p.url, 'content', p.content
+                   ) AS raw_posts
+            FROM method_events e
+            JOIN raw_posts p ON p.id = e.post_id
+            {where}
+            ORDER BY e.created_at, e.id
+            """,
+            params,
+            batch_size=batch_size,
+        )
+
+    def iter_unanalyzed_raw_posts(
+        self,
+        *,
+        limit: int = 100,
+        ingestion_source: Optional[str] = None,
+        url_contains: Optional[str] = None,
+        collected_after: Optional[str] = None,
+        source_keyword: Optional[str] = None,
+        exclude_flagged: bool = False,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Newest raw_posts without method_events, filtered like ``SupabaseClient.fetch_raw_posts``.
+
+        The "already analyzed" check runs in the same query, so ``limit``
+        counts posts that still need analysis. Rows go through ``to_jsonb`` to
+        come back in the same shape as the REST API returns them.
+        """
+        conditions = ["NOT EXISTS (SELECT 1 FROM method_events e WHERE e.post_id = p.id)"]
+        params: List[Any] = []
+        if ingestion_source:
+            conditions.append("p.ingestion_source = %s")
+            params.append(ingestion_source)
+        if url_contains:
+            conditions.append("p.url ILIKE %s")
+            params.append(f"%{url_contains}%")
+        if collected_after:
+            conditions.append("p.collected_at > %s::timestamptz")
+            params.append(collected_after)
+        if source_keyword:
+            conditions.append("p.source_keyword = %s")
+            params.append(source_keyword)
+        if exclude_flagged:
+            conditions.append("p.spam_reason IS NULL")
+        params.append(limit)
+        batches = self.stream(
+            f"""
+            SELECT to_jsonb(p) AS post
+            FROM raw_posts p
+            WHERE {' AND '.join(conditions)}
+            ORDER BY p.posted_at DESC
+            LIMIT %s
+            """,
+            params,
+            batch_size=batch_size,
+        )
+        for batch in batches:
+            yield [row["post"] for row in batch]
 
     def insert_raw_posts(self, records: List[dict]) -> int:
         """Insert raw posts directly into PostgreSQL."""
         if not records:
             return 0
 
-        self.connect()
-        
         sql = """
             INSERT INTO raw_posts (
                 source_keyword, platform_id, username, display_name,
@@ -59,22 +268,70 @@ class PostgresClient:
             ON CONFLICT (platform_id) DO NOTHING
         """
         
-        try:
-            with self.conn.cursor() as cur:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
                 execute_batch(cur, sql, records, page_size=100)
-                self.conn.commit()
-                inserted = cur.rowcount
-            return inserted
-        except Exception as e:
-            self.conn.rollback()
-            raise e
+                return cur.rowcount
+
+    def copy_raw_posts(self, records: Iterable[dict]) -> int:
+        """Bulk insert raw posts via COPY; returns how many were new."""
+        return self._copy_merge("raw_posts", RAW_POST_COLUMNS, records, conflict="(platform_id)")
+
+    def copy_method_events(self, records: Iterable[dict]) -> int:
+        """Bulk insert method events via COPY; returns how many were inserted."""
+        return self._copy_merge("method_events", METHOD_EVENT_COLUMNS, records)
+
+    def _copy_merge(
+        self,
+        table: str,
+        columns: Sequence[str],
+        records: Iterable[dict],
+        *,
+        conflict: str = "",
+    ) -> int:
+        """COPY ``records`` into a temp staging table, then merge into ``table``.
+
+        Rows are encoded lazily while the server reads them, so the input can
+        be any iterable. Conflicting rows are skipped and the merge's row count
+        is the number actually inserted. Staging lives for one transaction,
+        which also works behind a transaction-mode pooler.
+        """
+        stage = f"_stage_{table}"
+        column_list = sql.SQL(", ").join(sql.Identifier(name) for name in columns)
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                # Only the copied columns: no defaults (e.g. gen_random_uuid()) to evaluate twice.
+                cur.execute(
+                    sql.SQL(
+                        "CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+                        "SELECT {columns} FROM {table} WITH NO DATA"
+                    ).format(stage=sql.Identifier(stage), columns=column_list, table=sql.Identifier(table))
+                )
+                cur.copy_expert(
+                    sql.SQL("COPY {stage} ({columns}) FROM STDIN")
+                    .format(stage=sql.Identifier(stage), columns=column_list)
+                    .as_string(cur),
+                    _CopyStream(records, columns),
+                )
+                cur.execute(
+                    sql.SQL(
+                        "INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage} "
+                        "ON CONFLICT {conflict} DO NOTHING"
+                    ).format(
+                        table=sql.Identifier(table),
+                        columns=column_list,
+                        stage=sql.Identifier(stage),
+                        conflict=sql.SQL(conflict),
+                    )
+                )
+                return cur.rowcount
 
     def count_raw_posts(self) -> int:
         """Count total raw posts."""
-        self.connect()
-        with self.conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) FROM raw_posts")
-            return cur.fetchone()[0]
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM raw_posts")
+                return cur.fetchone()[0]
 
     def __enter__(self):
         self.connect()
@@ -82,3 +339,83 @@ class PostgresClient:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
+
+    def _checkout(self) -> Any:
+        self.connect()
+        # One retry per pool slot: every idle connection may have gone stale at once.
+        for _ in range(self.max_connections + 1):
+            conn = self._pool.getconn()
+            if self._healthy(conn):
+                return conn
+            self._pool.putconn(conn, close=True)
+            self._last_used.pop(id(conn), None)
+        raise psycopg2.OperationalError("No healthy PostgreSQL connection available")
+
+    def _checkin(self, conn: Any, *, broken: bool = False) -> None:
+        pool = self._pool
+        if pool is None or pool.closed:
+            conn.close()
+            return
+        if broken:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        pool.putconn(conn, close=broken)
+
+    def _healthy(self, conn: Any) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+
+class _CopyStream(io.RawIOBase):
+    """File-like view of records in COPY text format, encoded on demand."""
+
+    def __init__(self, records: Iterable[dict], columns: Sequence[str]) -> None:
+        self._rows = (_copy_line(record, columns) for record in records)
+        self._buffer = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._rows, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+
+_COPY_SPECIAL = re.compile(r"[\\\t\n\r]")
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_line(record: dict, columns: Sequence[str]) -> bytes:
+    return ("\t".join(_copy_value(record.get(name)) for name in columns) + "\n").encode("utf-8")
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    text = str(value)
+    return text.translate(_COPY_ESCAPES) if _COPY_SPECIAL.search(text) else text
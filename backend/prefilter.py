@@ -0,0 +1,160 @@
+"""Rule-based pre-filter that skips the LLM for posts with no testimony signal."""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from analyzer import estimate_tokens
+from segmenter import ACTION_PATTERN, CAUSAL_PATTERN, EFFECT_PATTERN
+
+
+# Symptom/diagnosis terms, mirroring frontend/lib/mentalTags.ts.
+SYMPTOM_PATTERN = re.compile(
+    "|".join(
+        [
+            r"うつ|鬱|抑うつ",
+            r"双極",
+            r"パニック",
+            r"不安障害|不安",
+            r"不眠|眠れな",
+            r"自律神経",
+            r"適応障害",
+            r"強迫",
+            r"摂食障害|過食|拒食",
+            r"統合失調",
+            r"発達障害|ADHD|ASD",
+            r"HSP",
+            r"PTSD|トラウマ",
+            r"解離",
+            r"希死念慮|動悸|倦怠感",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+# Promotional boilerplate typical of affiliate posts and paid-content ads.
+AD_PATTERN = re.compile(
+    "|".join(
+        [
+            r"#PR\b|#ad\b|【PR】|【広告】",
+            r"アフィリエイト",
+            r"今だけ|期間限定|先着",
+            r"無料(?:プレゼント|診断|相談)",
+            r"クーポン|割引コード",
+            r"LINE登録|公式LINE",
+            r"プロフ(?:ィール)?のリンク",
+            r"https?://\S+",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+_SIGNAL_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{name}>{pattern.pattern})"
+        for name, pattern in (
+            ("action", ACTION_PATTERN),
+            ("effect", EFFECT_PATTERN),
+            ("causal", CAUSAL_PATTERN),
+            ("symptom", SYMPTOM_PATTERN),
+            ("ad", AD_PATTERN),
+        )
+    ),
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class PrefilterThresholds:
+    """Minimum signal counts a post needs before it is worth an LLM call."""
+
+    min_action: int = 1
+    min_effect: int = 1
+    min_symptom: int = 0
+    max_ad: int = 2
+    min_chars: int = 15
+
+
+@dataclass
+class PrefilterDecision:
+    keep: bool
+    reason: Optional[str]
+    counts: Dict[str, int]
+
+
+@dataclass
+class PrefilterReport:
+    kept: int = 0
+    skipped: int = 0
+    skipped_tokens: int = 0
+    reasons: Counter = field(default_factory=Counter)
+
+    @property
+    def skip_rate(self) -> float:
+        total = self.kept + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def summary(self, *, prompt_tokens: int = 0, price_per_1k_tokens: float = 0.0) -> str:
+        saved_tokens = self.skipped_tokens + self.skipped * prompt_tokens
+        reasons = ", ".join(f"{reason}={count}" for reason, count in self.reasons.most_common())
+        text = (
+            f"Prefilter: kept {self.kept}, skipped {self.skipped} ({self.skip_rate:.1%})"
+            f"{f' [{reasons}]' if reasons else ''}; ~{saved_tokens} prompt tokens saved"
+        )
+        if price_per_1k_tokens:
+            text += f" (~${saved_tokens / 1000 * price_per_1k_tokens:.4f})"
+        return text
+
+
+class TestimonyPrefilter:
+    """Cheap lexicon/regex gate in front of ``MethodAnalyzer``.
+
+    All lexicons are compiled into one alternation with named groups, so each
+    post is scanned once regardless of how many terms are configured.
+    """
+
+    def __init__(self, thresholds: Optional[PrefilterThresholds] = None) -> None:
+        self.thresholds = thresholds or PrefilterThresholds()
+
+    def evaluate(self, content: str) -> PrefilterDecision:
+        counts = {"action": 0, "effect": 0, "causal": 0, "symptom": 0, "ad": 0}
+        for match in _SIGNAL_PATTERN.finditer(content):
+            counts[match.lastgroup] += 1
+
+        t = self.thresholds
+        reason: Optional[str] = None
+        if len(content.strip()) < t.min_chars:
+            reason = "too_short"
+        elif counts["ad"] > t.max_ad:
+            reason = "promotional"
+        elif counts["action"] < t.min_action:
+            reason = "no_action"
+        elif counts["effect"] < t.min_effect:
+            reason = "no_effect"
+        elif counts["symptom"] < t.min_symptom:
+            reason = "no_symptom"
+        return PrefilterDecision(keep=reason is None, reason=reason, counts=counts)
+
+    def split(
+        self, posts: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str], PrefilterReport]:
+        """Partition posts into ``(kept, {post_id: skip_reason}, report)``."""
+        kept: List[Dict[str, Any]] = []
+        skipped: Dict[str, str] = {}
+        report = PrefilterReport()
+        for post in posts:
+            content = post.get("content") or ""
+            decision = self.evaluate(content)
+            if decision.keep:
+                kept.append(post)
+                report.kept += 1
+                continue
+            post_id = post.get("id") or post.get("platform_id")
+            skipped[post_id] = decision.reason
+            report.skipped += 1
+            report.skipped_tokens += estimate_tokens(content)
+            report.reasons[decision.reason] += 1
+        return kept, skipped, report
@@ -0,0 +1,185 @@
+"""Adaptive request/token rate limiting and retry backoff for LLM calls."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Mapping, Optional
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class _Bucket:
+    """Token bucket refilled continuously at ``capacity`` units per minute."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.level = min(self.capacity, self.level + elapsed * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) * 60.0 / self.capacity
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared by all calls.
+
+    Callers reserve one request plus an estimated token count before each API
+    call. Limits start from the configured values and are corrected from the
+    ``x-ratelimit-*`` response headers, so the limiter converges on the real
+    quota. A 429 blocks every caller until its retry delay has passed.
+    """
+
+    def __init__(self, *, rpm: int = 500, tpm: int = 200_000) -> None:
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rpm(self) -> float:
+        return self._requests.capacity
+
+    @property
+    def tpm(self) -> float:
+        return self._tokens.capacity
+
+    def reserve(self, tokens: int) -> float:
+        """Consume capacity if available; otherwise return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            wait = max(
+                self._blocked_until - now,
+                self._requests.wait_time(1),
+                self._tokens.wait_time(tokens),
+            )
+            if wait > 0:
+                return wait
+            self._requests.level -= 1
+            self._tokens.level -= min(tokens, self._tokens.capacity)
+            return 0.0
+
+    def acquire(self, tokens: int) -> None:
+        while True:
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        while True:
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated: int, actual: Optional[int]) -> None:
+        """Return (or charge) the difference between estimated and actual tokens."""
+        if actual is None:
+            return
+        with self._lock:
+            self._tokens.level = min(
+                self._tokens.capacity, self._tokens.level + (estimated - actual)
+            )
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        limit_requests = _parse_int(headers.get("x-ratelimit-limit-requests"))
+        limit_tokens = _parse_int(headers.get("x-ratelimit-limit-tokens"))
+        remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"))
+        with self._lock:
+            now = time.monotonic()
+            for bucket, limit, remaining in (
+                (self._requests, limit_requests, remaining_requests),
+                (self._tokens, limit_tokens, remaining_tokens),
+            ):
+                bucket.refill(now)
+                if limit:
+                    bucket.capacity = float(limit)
+                    bucket.level = min(bucket.level, bucket.capacity)
+                if remaining is not None:
+                    bucket.level = min(bucket.level, float(remaining))
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back every caller for ``seconds`` (after a 429)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def backoff_delay(
+    attempt: int,
+    *,
+    base: float = 1.0,
+    cap: float = 60.0,
+    retry_after: Optional[float] = None,
+) -> float:
+    """Full-jitter exponential backoff, never shorter than ``retry_after``."""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def in_event_loop() -> bool:
+    """Whether the caller is running inside an asyncio event loop (so ``asyncio.run`` would fail)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Best wait hint from ``retry-after``/``x-ratelimit-reset-*`` headers."""
+    if not headers:
+        return None
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue
+        return seconds / 1000.0 if name == "retry-after-ms" else seconds
+    resets = [
+        parse_duration(headers.get(name))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    resets = [value for value in resets if value is not None]
+    return max(resets) if resets else None
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI-style durations such as ``"6m0s"``, ``"1.5s"`` or ``"20ms"``."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
+from analysis_cache import AnalysisCache
 from analyzer import MethodAnalyzer
 
 # Load environment
@@ -22,7 +23,8 @@ print()
 # Initialize analyzer
 print("1. Initializing OpenAI analyzer...")
 try:
-    analyzer = MethodAnalyzer()
+    cache = AnalysisCache(ROOT_DIR / "data/cache/analysis.sqlite3")
+    analyzer = MethodAnalyzer(cache=cache)
     print(f"   Model: {analyzer.model}")
     print(f"   Version: {analyzer.version}")
 except Exception as e:
@@ -51,6 +53,7 @@ sample_posts = [
 print("2. Analyzing sample posts...")
 results = analyzer.analyze_batch(sample_posts)
 print(f"   Analyzed {len(results)} posts")
+print(f"   Cache: {cache.stats.hits} hits, {cache.stats.misses} misses")
 print()
 
 print("3. Extracted methods:")
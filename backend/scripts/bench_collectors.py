@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Record collector traffic once, then benchmark every collector against the replay."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from collectors import (
+    NoteHashtagCollector,
+    RecordingTransport,
+    ReplayTransport,
+    TwitterApiCollector,
+    TwitterSearchCollector,
+)
+
+
+FIXTURE_SETS = {
+    "note": "note",
+    "note_async": "note",
+    "x_api": "x_api",
+    "x_graphql": "x_graphql",
+}
+DEFAULT_KEYWORDS = {
+    "note": ["うつ", "パニック障害"],
+    "x_api": ["うつ 治った", "パニック 改善"],
+    "x_graphql": ["うつ 治った"],
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=Path(__file__).resolve().parent / "fixtures/replay",
+        help="Root directory holding one recorded fixture set per collector",
+    )
+    parser.add_argument(
+        "--collectors",
+        nargs="+",
+        choices=sorted(FIXTURE_SETS),
+        default=sorted(FIXTURE_SETS),
+        help="Collectors to benchmark (default: all)",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Hit the live endpoints and (re)write the fixture sets instead of benchmarking",
+    )
+    parser.add_argument(
+        "--keywords",
+        nargs="+",
+        default=None,
+        help="Keywords/tags to record (default: a small per-collector set)",
+    )
+    parser.add_argument(
+        "--max-results",
+        type=int,
+        default=60,
+        help="max_results per keyword when recording",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Simulated seconds per replayed request",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Extra random latency (0..jitter seconds, seeded) per request",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Replay each collector this many times and keep the fastest run",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.record:
+        for fixture_set in sorted({FIXTURE_SETS[name] for name in args.collectors}):
+            record(args, fixture_set)
+        return
+
+    print(f"{'collector':>10} {'pages':>6} {'posts':>6} {'pages/s':>9} {'posts/s':>9} {'peak KiB':>9} {'blocks':>8}")
+    for name in args.collectors:
+        fixture_dir = args.fixtures / FIXTURE_SETS[name]
+        manifest_path = fixture_dir / "manifest.json"
+        if not manifest_path.exists():
+            print(f"{name:>10} no fixtures in {fixture_dir} (run with --record)")
+            continue
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+        best = None
+        for _ in range(max(1, args.repeat)):
+            transport = ReplayTransport(fixture_dir, latency=args.latency, jitter=args.jitter)
+            started = time.perf_counter()
+            posts = run_collector(name, manifest, transport)
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best[0]:
+                best = (elapsed, transport.requests, posts)
+        elapsed, pages, posts = best
+
+        # Allocations are measured on a separate run; tracemalloc slows everything down.
+        transport = ReplayTransport(fixture_dir, latency=args.latency, jitter=args.jitter)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        run_collector(name, manifest, transport)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+        print(
+            f"{name:>10} {pages:>6} {posts:>6} {pages / elapsed:>9.0f} {posts / elapsed:>9.0f} "
+            f"{peak / 1024:>9.0f} {blocks:>8}"
+        )
+
+
+def run_collector(name: str, manifest: Dict[str, Any], transport: httpx.BaseTransport) -> int:
+    keywords: List[str] = manifest["keywords"]
+    collector = build_collector(name, manifest, transport)
+    if name == "note_async":
+        return asyncio.run(_count_async(collector.iter_batches_async(keywords)))
+    return sum(len(batch) for batch in collector.iter_batches(keywords))
+
+
+def build_collector(name: str, manifest: Dict[str, Any], transport: httpx.BaseTransport) -> Any:
+    max_results = manifest["max_results"]
+    factories: Dict[str, Callable[[], Any]] = {
+        "note": lambda: NoteHashtagCollector(
+            max_results=max_results, request_interval=0.0, transport=transport
+        ),
+        "note_async": lambda: NoteHashtagCollector(
+            max_results=max_results, request_interval=0.0, transport=transport
+        ),
+        "x_api": lambda: TwitterApiCollector(
+            max_results=max_results,
+            lang=manifest.get("lang", "ja"),
+            bearer_token=manifest.get("bearer_token", "replay"),
+            transport=transport,
+        ),
+        "x_graphql": lambda: TwitterSearchCollector(
+            max_results=max_results, lang=manifest.get("lang", "ja"), transport=transport
+        ),
+    }
+    return factories[name]()
+
+
+def record(args: argparse.Namespace, fixture_set: str) -> None:
+    fixture_dir = args.fixtures / fixture_set
+    for stale in fixture_dir.glob("*.json"):
+        stale.unlink()
+    keywords = args.keywords or DEFAULT_KEYWORDS[fixture_set]
+    manifest: Dict[str, Any] = {"keywords": keywords, "max_results": args.max_results, "lang": "ja"}
+    transport = RecordingTransport(fixture_dir)
+    collector = build_collector(fixture_set, {**manifest, "bearer_token": None}, transport)
+    posts = sum(len(batch) for batch in collector.iter_batches(keywords))
+    (fixture_dir / "manifest.json").write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print(f"Recorded {transport.recorded} responses ({posts} posts) to {fixture_dir}")
+
+
+async def _count_async(batches: Any) -> int:
+    total = 0
+    async for batch in batches:
+        total += len(batch)
+    return total
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Benchmark PostgresClient ingest: execute_batch INSERTs vs. COPY + staging merge."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from psycopg2.extras import execute_batch
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from postgres_client import METHOD_EVENT_COLUMNS, PostgresClient
+from scripts.collect_samples import generate_mock_records, record_to_supabase_dict
+
+
+# Scratch copies of the two tables; the benchmark never touches public.*
+SCHEMA_DDL = """
+CREATE TYPE {schema}.effect_label AS ENUM ('positive', 'negative', 'neutral', 'unknown');
+CREATE TABLE {schema}.raw_posts (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    source_keyword TEXT NOT NULL,
+    platform_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    display_name TEXT,
+    content TEXT NOT NULL,
+    posted_at TIMESTAMPTZ NOT NULL,
+    collected_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    url TEXT,
+    lang TEXT DEFAULT 'ja',
+    ingestion_source TEXT DEFAULT 'x_search',
+    spam_score NUMERIC,
+    spam_reason TEXT,
+    metadata JSONB,
+    CONSTRAINT raw_posts_platform_unique UNIQUE (platform_id)
+);
+CREATE INDEX raw_posts_posted_at_idx ON {schema}.raw_posts (posted_at DESC);
+CREATE INDEX raw_posts_lang_idx ON {schema}.raw_posts (lang);
+CREATE TABLE {schema}.method_events (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    post_id UUID NOT NULL REFERENCES {schema}.raw_posts(id) ON DELETE CASCADE,
+    method_slug TEXT NOT NULL,
+    method_display_name TEXT NOT NULL,
+    action_text TEXT,
+    effect_text TEXT,
+    effect_label {schema}.effect_label NOT NULL DEFAULT 'unknown',
+    sentiment_score NUMERIC,
+    spam_flag BOOLEAN DEFAULT FALSE,
+    confidence NUMERIC,
+    analyzer_version TEXT,
+    raw_response JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX method_events_method_slug_idx ON {schema}.method_events (method_slug, created_at DESC);
+CREATE INDEX method_events_effect_label_idx ON {schema}.method_events (effect_label);
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dsn",
+        default=os.getenv("BENCH_DATABASE_URL"),
+        help="Local Postgres to benchmark against (default: BENCH_DATABASE_URL)",
+    )
+    parser.add_argument(
+        "--schema",
+        default="bench_ingest",
+        help="Scratch schema, dropped and recreated for every run (default: %(default)s)",
+    )
+    parser.add_argument("--rows", type=int, default=20_000, help="raw_posts rows per run")
+    parser.add_argument(
+        "--events-per-post", type=int, default=2, help="method_events rows per post"
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=0.5,
+        help="Share of the re-ingest batch that already exists (default: 0.5)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Keep the fastest of N runs")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.dsn:
+        raise SystemExit("Pass --dsn or set BENCH_DATABASE_URL (use a local database, not Supabase)")
+
+    posts = build_posts(args.rows)
+    repeat_posts = posts[: int(len(posts) * args.overlap)] + build_posts(
+        len(posts) - int(len(posts) * args.overlap), offset=len(posts)
+    )
+    print(f"{len(posts)} posts, {len(posts) * args.events_per_post} events per run")
+    print(f"{'path':>14} {'table':>14} {'rows':>7} {'inserted':>9} {'seconds':>8} {'rows/s':>9}")
+
+    for label, insert_posts, insert_events in (
+        ("execute_batch", lambda c, rows: c.insert_raw_posts(rows), insert_events_batch),
+        ("copy", lambda c, rows: c.copy_raw_posts(rows), lambda c, rows: c.copy_method_events(rows)),
+    ):
+        best: Dict[str, Tuple[float, int, int]] = {}
+        for _ in range(max(1, args.repeat)):
+            client = open_client(args)
+            try:
+                timings = run_once(client, posts, repeat_posts, args.events_per_post, insert_posts, insert_events)
+            finally:
+                drop_schema(client, args.schema)
+                client.close()
+            for table, result in timings.items():
+                if table not in best or result[0] < best[table][0]:
+                    best[table] = result
+        for table, (seconds, rows, inserted) in best.items():
+            print(f"{label:>14} {table:>14} {rows:>7} {inserted:>9} {seconds:>8.2f} {rows / seconds:>9.0f}")
+
+
+def open_client(args: argparse.Namespace) -> PostgresClient:
+    client = PostgresClient(
+        args.dsn, max_connections=1, options=f"-c search_path={args.schema},public"
+    )
+    drop_schema(client, args.schema)
+    with client.connection() as conn, conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {args.schema}")
+        cur.execute(SCHEMA_DDL.format(schema=args.schema))
+    return client
+
+
+def drop_schema(client: PostgresClient, schema: str) -> None:
+    with client.connection() as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+
+
+def run_once(
+    client: PostgresClient,
+    posts: List[dict],
+    repeat_posts: List[dict],
+    events_per_post: int,
+    insert_posts: Callable[[PostgresClient, List[dict]], int],
+    insert_events: Callable[[PostgresClient, List[dict]], int],
+) -> Dict[str, Tuple[float, int, int]]:
+    timings: Dict[str, Tuple[float, int, int]] = {}
+
+    started = time.perf_counter()
+    inserted = insert_posts(client, posts)
+    timings["raw_posts"] = (time.perf_counter() - started, len(posts), inserted)
+
+    started = time.perf_counter()
+    inserted = insert_posts(client, repeat_posts)
+    timings["raw_posts+dup"] = (time.perf_counter() - started, len(repeat_posts), inserted)
+
+    with client.connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT id::text FROM raw_posts")
+        post_ids = [row[0] for row in cur.fetchall()]
+    events = build_events(post_ids, events_per_post)
+    started = time.perf_counter()
+    inserted = insert_events(client, events)
+    timings["method_events"] = (time.perf_counter() - started, len(events), inserted)
+    return timings
+
+
+def insert_events_batch(client: PostgresClient, records: List[dict]) -> int:
+    """The execute_batch pattern of ``insert_raw_posts`` applied to method_events."""
+    columns = ", ".join(METHOD_EVENT_COLUMNS)
+    values = ", ".join(f"%({name})s" for name in METHOD_EVENT_COLUMNS)
+    with client.connection() as conn, conn.cursor() as cur:
+        execute_batch(
+            cur,
+            f"INSERT INTO method_events ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING",
+            [{**record, "raw_response": json.dumps(record["raw_response"])} for record in records],
+            page_size=100,
+        )
+    # execute_batch only reports the last page's rowcount; count what landed instead.
+    with client.connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM method_events")
+        return cur.fetchone()[0]
+
+
+def build_posts(count: int, *, offset: int = 0) -> List[dict]:
+    keywords = ["うつ 治った", "パニック 改善", "不眠 克服"]
+    records = generate_mock_records(
+        keywords=keywords, per_keyword_limit=-(-count // len(keywords)), seed=offset
+    )[:count]
+    payload = []
+    for index, record in enumerate(records):
+        row = record_to_supabase_dict(record)
+        row["platform_id"] = f"bench-{offset + index}"
+        # execute_batch needs JSON text; COPY accepts either.
+        row["metadata"] = json.dumps(row["metadata"], ensure_ascii=False)
+        payload.append(row)
+    return payload
+
+
+def build_events(post_ids: List[str], per_post: int) -> List[dict]:
+    rng = random.Random(0)
+    labels = ["positive", "negative", "neutral", "unknown"]
+    events = []
+    for post_id in post_ids:
+        for index in range(per_post):
+            events.append(
+                {
+                    "post_id": post_id,
+                    "method_slug": f"method-{rng.randrange(200)}",
+                    "method_display_name": "朝散歩",
+                    "action_text": "毎朝20分歩いた",
+                    "effect_text": "眠れるようになった",
+                    "effect_label": rng.choice(labels),
+                    "sentiment_score": round(rng.uniform(-1, 1), 3),
+                    "spam_flag": False,
+                    "confidence": round(rng.random(), 3),
+                    "analyzer_version": "bench",
+                    "raw_response": {"index": index, "note": "tab\there\nnewline"},
+                }
+            )
+    return events
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark PostSegmenter: tokens sent vs. recall of annotated method/effect phrases."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from analyzer import estimate_tokens
+from segmenter import PostSegmenter
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=Path(__file__).resolve().parent / "fixtures/note_articles.json",
+        help="JSON list of {id, body, expected: [phrases]} articles",
+    )
+    parser.add_argument(
+        "--budgets",
+        type=int,
+        nargs="+",
+        default=[150, 250, 400, 800],
+        help="Token budgets to compare against sending the full body",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    articles = json.loads(args.fixtures.read_text(encoding="utf-8"))
+    expected_total = sum(len(a["expected"]) for a in articles)
+    full_tokens = sum(estimate_tokens(a["body"]) for a in articles)
+
+    print(f"{len(articles)} articles, {expected_total} annotated phrases, ~{full_tokens} tokens in full")
+    print(f"{'budget':>8} {'tokens':>8} {'saved':>7} {'recall':>7} {'ms':>7}")
+    print(f"{'full':>8} {full_tokens:>8} {'0.0%':>7} {'100.0%':>7} {'-':>7}")
+
+    for budget in args.budgets:
+        segmenter = PostSegmenter(token_budget=budget)
+        sent = 0
+        found = 0
+        started = time.perf_counter()
+        for article in articles:
+            selection = segmenter.select(article["body"])
+            sent += estimate_tokens(selection.text)
+            found += sum(1 for phrase in article["expected"] if phrase in selection.text)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        recall = found / expected_total if expected_total else 1.0
+        saved = 1 - sent / full_tokens if full_tokens else 0.0
+        print(f"{budget:>8} {sent:>8} {saved:>7.1%} {recall:>7.1%} {elapsed_ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Benchmark SearchTimeline decoding+parsing: pre-fast-path baseline vs. TwitterSearchCollector."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from collectors import CollectedPost, TwitterSearchCollector
+from collectors.twitter_search import decode_json
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=Path(__file__).resolve().parent / "fixtures/search_timeline",
+        help="Directory of recorded SearchTimeline response bodies (*.json)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=200,
+        help="Parse each fixture this many times per measurement",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    pages = [path.read_bytes() for path in sorted(args.fixtures.glob("*.json"))]
+    if not pages:
+        raise SystemExit(f"No fixtures found in {args.fixtures}")
+    collector = TwitterSearchCollector(guest_token="bench")
+
+    def fast(body: bytes) -> Tuple[List[CollectedPost], Optional[str]]:
+        return collector._parse_response("bench", decode_json(body))
+
+    def baseline(body: bytes) -> Tuple[List[CollectedPost], Optional[str]]:
+        return _baseline_parse("bench", json.loads(body), collector.lang)
+
+    for body in pages:
+        expected, expected_cursor = baseline(body)
+        actual, actual_cursor = fast(body)
+        if actual_cursor != expected_cursor or [p.to_dict() for p in actual] != [
+            p.to_dict() for p in expected
+        ]:
+            raise SystemExit("Fast path output differs from the baseline parser")
+
+    total_bytes = sum(len(body) for body in pages)
+    posts_per_pass = sum(len(baseline(body)[0]) for body in pages)
+    print(
+        f"{len(pages)} pages, {posts_per_pass} posts, {total_bytes / 1024:.0f} KiB per pass, "
+        f"{args.repeat} passes"
+    )
+    print(f"{'parser':>10} {'pages/s':>10} {'posts/s':>10} {'MiB/s':>8}")
+    results = {}
+    for name, parse in (("baseline", baseline), ("fast", fast)):
+        elapsed = _measure(parse, pages, args.repeat)
+        pages_done = len(pages) * args.repeat
+        results[name] = elapsed
+        print(
+            f"{name:>10} {pages_done / elapsed:>10.0f} {posts_per_pass * args.repeat / elapsed:>10.0f} "
+            f"{total_bytes * args.repeat / elapsed / 2**20:>8.1f}"
+        )
+    print(f"speedup: {results['baseline'] / results['fast']:.2f}x")
+
+
+def _measure(parse: Callable[[bytes], object], pages: List[bytes], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for body in pages:
+            parse(body)
+    return time.perf_counter() - started
+
+
+# The parser as it was before the fast path, kept as the benchmark baseline.
+def _baseline_parse(keyword: str, payload: dict, lang: str) -> Tuple[List[CollectedPost], Optional[str]]:
+    data = (
+        payload.get("data", {})
+        .get("search_by_raw_query", {})
+        .get("search_timeline", {})
+        .get("timeline", {})
+    )
+    posts: List[CollectedPost] = []
+    next_cursor: Optional[str] = None
+    for instruction in data.get("instructions", []):
+        itype = instruction.get("type")
+        if itype == "TimelineClearCache" and instruction.get("direction") == "Forward" and instruction.get("cursor"):
+            next_cursor = instruction["cursor"].get("value")
+        entries: List[dict] = []
+        if itype == "TimelinePinEntry" and instruction.get("entry"):
+            entries = [instruction["entry"]]
+        if itype == "TimelineAddEntries":
+            entries = instruction.get("entries", [])
+        if itype == "TimelineAddToModule":
+            entries = instruction.get("moduleItems", [])
+        for entry in entries:
+            content = entry.get("content") or entry.get("item") or {}
+            if content.get("entryType") == "TimelineTimelineCursor" and content.get("cursorType") == "Bottom" and content.get("value"):
+                next_cursor = content.get("value")
+                continue
+            item_content = content.get("itemContent") or {}
+            tweet_results = item_content.get("tweet_results") or item_content.get("tweet")
+            result = tweet_results.get("result") if isinstance(tweet_results, dict) else None
+            if result and result.get("__typename") == "TweetWithVisibilityResults":
+                result = result.get("tweet")
+            if not result:
+                continue
+            post = _baseline_to_collected(keyword, result, lang)
+            if post:
+                posts.append(post)
+    return posts, next_cursor
+
+
+def _baseline_to_collected(keyword: str, tweet_result: dict, lang: str) -> Optional[CollectedPost]:
+    legacy = tweet_result.get("legacy")
+    core = tweet_result.get("core", {})
+    if not legacy:
+        return None
+    user_result = core.get("user_results", {}).get("result")
+    if isinstance(user_result, dict) and user_result.get("__typename") == "UserResults" and "result" in user_result:
+        user_result = user_result.get("result")
+    if isinstance(user_result, dict) and user_result.get("__typename") == "UserUnavailable" and "reason" in user_result:
+        return None
+    user_legacy = user_result.get("legacy") if isinstance(user_result, dict) else None
+    if not user_legacy:
+        return None
+    post_id = legacy.get("id_str") or tweet_result.get("rest_id")
+    text = legacy.get("full_text") or legacy.get("text")
+    if not post_id or not text:
+        return None
+    try:
+        posted_at = datetime.strptime(legacy.get("created_at"), "%a %b %d %H:%M:%S %z %Y").astimezone(timezone.utc)
+    except Exception:
+        posted_at = datetime.now(timezone.utc)
+    username = user_legacy.get("screen_name")
+    display_name = user_legacy.get("name")
+    if not username or not display_name:
+        return None
+    return CollectedPost(
+        source_keyword=keyword,
+        platform_id=post_id,
+        username=f"@{username}",
+        display_name=display_name,
+        content=text,
+        posted_at=posted_at,
+        url=f"https://x.com/{username}/status/{post_id}",
+        lang=lang,
+    )
+
+
+if __name__ == "__main__":
+    main()
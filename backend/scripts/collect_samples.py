@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import os
+import queue
 import random
 import sys
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List
-
-from dotenv import load_dotenv
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
@@ -18,10 +21,14 @@ if str(ROOT_DIR) not in sys.path:
 
 from collectors import (
     CollectedPost,
+    HttpResponseCache,
     NoteHashtagCollector,
     TwitterApiCollector,
     TwitterSearchCollector,
+    WatermarkStore,
 )
+from env_loader import load_env
+from seen_ids import SeenIdFilter
 from supabase_client import SupabaseClient
 
 
@@ -51,13 +58,39 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--mode",
-        choices=["live", "legacy", "mock", "note"],
+        choices=["live", "legacy", "mock", "note", "multi"],
         default="live",
         help=(
             "Data source: 'live' uses Twitter API v2, 'legacy' uses the deprecated GraphQL scraper, "
-            "'note' scrapes note.com hashtag pages, 'mock' emits synthetic data"
+            "'note' scrapes note.com hashtag pages, 'mock' emits synthetic data, "
+            "'multi' runs every --sources collector concurrently"
         ),
     )
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=["live", "legacy", "note"],
+        default=["note", "live"],
+        help="Collectors to run in multi mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--note-keywords",
+        nargs="+",
+        default=None,
+        help="Multi mode: hashtags for note (default: --keywords)",
+    )
+    parser.add_argument(
+        "--live-keywords",
+        nargs="+",
+        default=None,
+        help="Multi mode: queries for Twitter API v2 (default: --keywords)",
+    )
+    parser.add_argument(
+        "--legacy-keywords",
+        nargs="+",
+        default=None,
+        help="Multi mode: queries for the legacy GraphQL scraper (default: --keywords)",
+    )
     parser.add_argument(
         "--lang",
         type=str,
@@ -88,6 +121,63 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional guest token override for legacy mode",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Concurrent requests per host in note mode (default: 4)",
+    )
+    parser.add_argument(
+        "--request-interval",
+        type=float,
+        default=0.25,
+        help="Minimum seconds between request starts per host in note mode (default: 0.25)",
+    )
+    parser.add_argument(
+        "--batch-keywords",
+        action="store_true",
+        help="Live mode: combine keywords into OR queries and attribute tweets locally",
+    )
+    parser.add_argument(
+        "--watermarks",
+        type=Path,
+        default=ROOT_DIR / "data/state/watermarks.json",
+        help="Per-keyword high-water marks; crawls stop at already collected posts",
+    )
+    parser.add_argument(
+        "--full-crawl",
+        action="store_true",
+        help="Ignore stored watermarks for this run and leave them unchanged",
+    )
+    parser.add_argument(
+        "--http-cache",
+        type=Path,
+        default=None,
+        help="SQLite file for caching collector responses (revalidated with ETag/Last-Modified)",
+    )
+    parser.add_argument(
+        "--seen-ids",
+        type=Path,
+        default=ROOT_DIR / "data/state/seen_platform_ids.bloom",
+        help="Bloom filter of uploaded platform_ids; known posts are not re-sent",
+    )
+    parser.add_argument(
+        "--no-seen-ids",
+        action="store_true",
+        help="Upload every collected post and let the database drop duplicates",
+    )
+    parser.add_argument(
+        "--seen-fp-rate",
+        type=float,
+        default=1e-5,
+        help="Chance that a new post is mistaken for an uploaded one (default: 1e-5)",
+    )
+    parser.add_argument(
+        "--seen-resync-hours",
+        type=float,
+        default=24.0,
+        help="Rebuild the seen-ID filter from raw_posts when older than this (default: 24)",
+    )
     parser.add_argument(
         "--seed",
         type=int,
@@ -99,12 +189,18 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Upload collected posts to Supabase raw_posts table",
     )
+    parser.add_argument(
+        "--upload-batch-size",
+        type=int,
+        default=500,
+        help="Upload to raw_posts every N collected posts (default: 500)",
+    )
     parser.add_argument(
         "--output",
         "-o",
         type=Path,
         default=ROOT_DIR / "data/collections",
-        help="Directory to store the resulting JSON file",
+        help="Directory to store the resulting JSONL file",
     )
     return parser.parse_args()
 
@@ -113,53 +209,299 @@ def main() -> None:
     args = parse_args()
     load_env()
 
-    if args.mode == "mock":
-        records = generate_mock_records(
-            keywords=args.keywords,
-            per_keyword_limit=args.max_results,
-            seed=args.seed,
+    watermarks = None if args.full_crawl else WatermarkStore(args.watermarks)
+    http_cache = HttpResponseCache(args.http_cache) if args.http_cache else None
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    output_dir: Path = args.output
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"sample-{timestamp}.jsonl"
+    client = SupabaseClient.from_env() if args.upload else None
+    seen = None
+    if client is not None and not args.no_seen_ids:
+        seen = load_seen_ids(args, client)
+    sink = BatchSink(output_path, client, upload_batch_size=args.upload_batch_size, seen=seen)
+
+    try:
+        if args.mode == "mock":
+            records = generate_mock_records(
+                keywords=args.keywords,
+                per_keyword_limit=args.max_results,
+                seed=args.seed,
+            )
+            sink.write(records)
+        elif args.mode == "multi":
+            sources = {
+                name: source_keywords(args, name) for name in dict.fromkeys(args.sources)
+            }
+            reports = run_sources(
+                {
+                    name: build_collector(args, name, watermarks, http_cache)
+                    for name in sources
+                },
+                sources,
+                sink,
+            )
+            for report in reports:
+                print(report.summary())
+        elif args.mode == "note":
+            collector = build_collector(args, "note", watermarks, http_cache)
+            asyncio.run(drain_async(collector.iter_batches_async(args.keywords), sink))
+        else:
+            collector = build_collector(args, args.mode, watermarks, http_cache)
+            for batch in collector.iter_batches(args.keywords):
+                sink.write(batch)
+            report_pending(collector)
+    finally:
+        # Whatever was collected before a failure is still written and uploaded.
+        sink.close()
+        print(
+            f"Saved {sink.written} posts "
+            f"({args.max_results} max / keyword across {len(args.keywords)} keywords) to {output_path}"
+        )
+        if client is not None:
+            print(f"Uploaded {sink.uploaded} posts to Supabase raw_posts table")
+        if seen is not None:
+            print(f"Skipped {sink.skipped} already uploaded posts ({len(seen)} IDs known)")
+            seen.save()
+        if http_cache is not None:
+            stats = http_cache.stats
+            print(
+                f"HTTP cache: {stats.hits} fresh hits, {stats.revalidated} revalidated, "
+                f"{stats.misses} fetched ({len(http_cache)} stored)"
+            )
+            http_cache.close()
+        if client is not None:
+            client.close()
+
+    if watermarks is not None and args.mode != "mock":
+        # Only persist after the posts are saved, so a failed run re-fetches them.
+        watermarks.save()
+
+
+class BatchSink:
+    """Append collected batches to a JSONL file and upload them in chunks.
+
+    Each batch is flushed to disk as it arrives and uploads go out every
+    ``upload_batch_size`` posts, so memory stays bounded and an interrupted
+    crawl keeps everything received so far. With a ``seen`` filter, posts
+    whose platform_id was already uploaded are kept out of the upload.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        client: Optional[SupabaseClient] = None,
+        *,
+        upload_batch_size: int = 500,
+        seen: Optional[SeenIdFilter] = None,
+    ) -> None:
+        self.path = path
+        self.client = client
+        self.upload_batch_size = max(1, upload_batch_size)
+        self.seen = seen
+        self.written = 0
+        self.uploaded = 0
+        self.skipped = 0
+        self._pending: List[dict] = []
+        self._pending_ids: Set[str] = set()
+        self._file = path.open("a", encoding="utf-8")
+
+    def write(self, batch: Iterable[CollectedPost]) -> None:
+        for record in batch:
+            self._file.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+            self.written += 1
+            if self.client is None:
+                continue
+            if self.seen is not None:
+                if record.platform_id in self._pending_ids or record.platform_id in self.seen:
+                    self.skipped += 1
+                    continue
+                self._pending_ids.add(record.platform_id)
+            self._pending.append(record_to_supabase_dict(record))
+        self._file.flush()
+        if len(self._pending) >= self.upload_batch_size:
+            self._upload()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        self._upload()
+
+    def _upload(self) -> None:
+        if self.client is None or not self._pending:
+            return
+        self.uploaded += self.client.insert_raw_posts(self._pending)
+        if self.seen is not None:
+            # Only IDs the database has accepted; a failed upload is retried next run.
+            self.seen.update(self._pending_ids)
+        self._pending = []
+        self._pending_ids = set()
+
+
+def load_seen_ids(args: argparse.Namespace, client: SupabaseClient) -> SeenIdFilter:
+    seen = SeenIdFilter(args.seen_ids, fp_rate=args.seen_fp_rate)
+    if seen.needs_resync(args.seen_resync_hours * 3600):
+        count = seen.rebuild(client.iter_raw_post_platform_ids())
+        seen.save()
+        print(f"Seeded seen-ID filter with {count} platform_ids from raw_posts")
+    return seen
+
+
+async def drain_async(batches: AsyncIterator[List[CollectedPost]], sink: BatchSink) -> None:
+    async for batch in batches:
+        sink.write(batch)
+
+
+def build_collector(
+    args: argparse.Namespace,
+    source: str,
+    watermarks: Optional[WatermarkStore],
+    http_cache: Optional[HttpResponseCache],
+) -> Any:
+    if source == "note":
+        return NoteHashtagCollector(
+            max_results=args.max_results,
+            max_concurrency=args.concurrency,
+            request_interval=args.request_interval,
+            watermarks=watermarks,
+            http_cache=http_cache,
         )
-    elif args.mode == "legacy":
-        collector = TwitterSearchCollector(
+    if source == "legacy":
+        return TwitterSearchCollector(
             lang=args.lang,
             max_results=args.max_results,
             bearer_token=args.bearer_token,
             auth_token=args.auth_token,
             csrf_token=args.csrf_token,
             guest_token=args.guest_token,
+            watermarks=watermarks,
+            http_cache=http_cache,
         )
-        records = collector.collect(args.keywords)
-    elif args.mode == "note":
-        collector = NoteHashtagCollector(
-            max_results=args.max_results,
+    return TwitterApiCollector(
+        lang=args.lang,
+        max_results=args.max_results,
+        bearer_token=args.bearer_token,
+        watermarks=watermarks,
+        batch_keywords=args.batch_keywords,
+        http_cache=http_cache,
+    )
+
+
+def source_keywords(args: argparse.Namespace, source: str) -> List[str]:
+    return getattr(args, f"{source}_keywords") or args.keywords
+
+
+def report_pending(collector: Any) -> None:
+    pending = getattr(collector, "pending", None)
+    if pending:
+        print(
+            f"Rate limit reached; {len(pending)} keywords will resume next run: "
+            f"{', '.join(pending)}"
         )
-        records = collector.collect(args.keywords)
-    else:
-        collector = TwitterApiCollector(
-            lang=args.lang,
-            max_results=args.max_results,
-            bearer_token=args.bearer_token,
+
+
+@dataclass
+class SourceReport:
+    """Timing and yield of one source in a multi-source run."""
+
+    name: str
+    keywords: int
+    posts: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    def summary(self) -> str:
+        rate = self.posts / self.elapsed if self.elapsed else 0.0
+        line = (
+            f"[{self.name}] {self.posts} posts ({self.duplicates} duplicates dropped) "
+            f"from {self.keywords} keywords in {self.batches} batches, "
+            f"{self.elapsed:.1f}s ({rate:.1f} posts/s)"
         )
-        records = collector.collect(args.keywords)
+        if self.error:
+            line += f" -- failed: {self.error}"
+        return line
 
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
-    output_dir: Path = args.output
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / f"sample-{timestamp}.json"
 
-    serializable = [record.to_dict() for record in records]
-    output_path.write_text(json.dumps(serializable, ensure_ascii=False, indent=2), encoding="utf-8")
+def run_sources(
+    collectors: Dict[str, Any],
+    keywords: Dict[str, List[str]],
+    sink: BatchSink,
+    *,
+    max_pending: int = 16,
+) -> List[SourceReport]:
+    """Crawl every source in its own thread and merge batches into ``sink``.
 
-    print(
-        f"Saved {len(records)} posts "
-        f"({args.max_results} max / keyword across {len(args.keywords)} keywords) to {output_path}"
+    Sources only fetch; the calling thread is the single writer, dropping
+    platform_ids already seen from another source so the JSONL file and the
+    upload stream carry each post once. The bounded queue applies
+    backpressure when writing or uploading falls behind. A failing source
+    is reported and does not stop the others.
+    """
+    batches: "queue.Queue[Tuple[str, Optional[List[CollectedPost]]]]" = queue.Queue(
+        maxsize=max(1, max_pending)
     )
+    reports = {name: SourceReport(name, len(keywords[name])) for name in collectors}
+
+    def crawl(name: str) -> None:
+        report = reports[name]
+        started = time.perf_counter()
+        collector = collectors[name]
+        try:
+            if isinstance(collector, NoteHashtagCollector):
+                asyncio.run(_forward_async(name, collector.iter_batches_async(keywords[name]), batches))
+            else:
+                for batch in collector.iter_batches(keywords[name]):
+                    batches.put((name, batch))
+        except Exception as exc:  # noqa: BLE001 - keep the other sources running
+            report.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            report.elapsed = time.perf_counter() - started
+            batches.put((name, None))
 
-    if args.upload:
-        client = SupabaseClient.from_env()
-        payload = [record_to_supabase_dict(r) for r in records]
-        inserted = client.insert_raw_posts(payload)
-        print(f"Uploaded {inserted} posts to Supabase raw_posts table")
+    threads = [
+        threading.Thread(target=crawl, args=(name,), name=f"collect-{name}", daemon=True)
+        for name in collectors
+    ]
+    for thread in threads:
+        thread.start()
+
+    seen: Set[str] = set()
+    running = len(threads)
+    while running:
+        name, batch = batches.get()
+        if batch is None:
+            running -= 1
+            continue
+        report = reports[name]
+        report.batches += 1
+        fresh: List[CollectedPost] = []
+        for record in batch:
+            if record.platform_id in seen:
+                report.duplicates += 1
+                continue
+            seen.add(record.platform_id)
+            fresh.append(record)
+        report.posts += len(fresh)
+        sink.write(fresh)
+    for thread in threads:
+        thread.join()
+    for collector in collectors.values():
+        report_pending(collector)
+    return list(reports.values())
+
+
+async def _forward_async(
+    name: str,
+    batches: AsyncIterator[List[CollectedPost]],
+    out: "queue.Queue[Tuple[str, Optional[List[CollectedPost]]]]",
+) -> None:
+    async for batch in batches:
+        # Wait for queue space off the event loop so in-flight requests keep going.
+        await asyncio.to_thread(out.put, (name, batch))
 
 
 def generate_mock_records(
@@ -239,12 +581,5 @@ def infer_ingestion_source(record: CollectedPost) -> str:
     return "collect_samples_cli"
 
 
-def load_env() -> None:
-    dotenv_path = ROOT_DIR / ".env"
-    load_dotenv(dotenv_path=dotenv_path, override=True)
-    # Load repo-root .env only to fill missing values without overriding backend settings
-    load_dotenv(override=False)
-
-
 if __name__ == "__main__":
     main()
@@ -7,17 +7,36 @@ import argparse
 import sys
 from collections import Counter
 from datetime import datetime, timedelta, timezone
+from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, List, Sequence
-
-from dotenv import load_dotenv
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from analyzer import MethodAnalyzer
+from analysis_cache import AnalysisCache
+from analyzer import ExtractedMethod, MethodAnalyzer, estimate_tokens
+from env_loader import load_env
+from near_duplicates import NearDuplicateIndex, mark_duplicate
+from post_selection import select_posts_for_analysis
+from prefilter import PrefilterThresholds, TestimonyPrefilter
+from rate_limiter import RateLimiter
+from segmenter import PostSegmenter, attach_segments
+from stats_checkpoint import StatsCheckpoint
 from supabase_client import SupabaseClient
+from synonyms import SynonymNormalizer
+
+
+# Everything build_method_stats reads; keeps the stats scan narrow.
+STATS_EVENT_COLUMNS = (
+    "method_slug",
+    "method_display_name",
+    "effect_label",
+    "spam_flag",
+    "near_duplicate_of:raw_response->>near_duplicate_of",
+    "raw_posts:post_id(posted_at)",
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -59,6 +78,139 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional raw_posts.source_keyword filter (e.g., #うつ)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Maximum LLM requests in flight (default: 1, sequential)",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=500,
+        help="Initial requests-per-minute limit; adapted from response headers",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=200_000,
+        help="Initial tokens-per-minute limit; adapted from response headers",
+    )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="Send several posts per LLM request, sized by --pack-token-budget",
+    )
+    parser.add_argument(
+        "--pack-token-budget",
+        type=int,
+        default=4000,
+        help="Estimated prompt tokens per packed request (default: 4000)",
+    )
+    parser.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        help="Send every post to the LLM, even without action/effect signals",
+    )
+    parser.add_argument(
+        "--prefilter-min-action",
+        type=int,
+        default=PrefilterThresholds.min_action,
+        help="Action-phrase matches required to analyze a post (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--prefilter-min-effect",
+        type=int,
+        default=PrefilterThresholds.min_effect,
+        help="Effect-phrase matches required to analyze a post (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--prefilter-max-ad",
+        type=int,
+        default=PrefilterThresholds.max_ad,
+        help="Promotional matches above which a post is skipped (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--recheck-skipped",
+        action="store_true",
+        help="Also fetch posts previously marked as skipped by the prefilter",
+    )
+    parser.add_argument(
+        "--price-per-1k-tokens",
+        type=float,
+        default=0.00015,
+        help="Input token price used for the prefilter savings estimate",
+    )
+    parser.add_argument(
+        "--segment-token-budget",
+        type=int,
+        default=1500,
+        help="Condense longer bodies to their most relevant paragraphs (0 disables)",
+    )
+    parser.add_argument(
+        "--dedupe-index",
+        type=Path,
+        default=ROOT_DIR / "data/cache/near_duplicates.sqlite3",
+        help="SQLite MinHash index used to analyze one post per near-duplicate cluster",
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="Analyze every post even if it is a near-duplicate of another",
+    )
+    parser.add_argument(
+        "--no-synonyms",
+        action="store_true",
+        help="Keep LLM method slugs as-is instead of mapping them via method_synonyms",
+    )
+    parser.add_argument(
+        "--postgres",
+        action="store_true",
+        help=(
+            "Read raw_posts and stream method_events for the stats refresh over a direct "
+            "Postgres connection (SUPABASE_DB_CONNECTION_STRING) instead of the REST API"
+        ),
+    )
+    parser.add_argument(
+        "--stream-batch-size",
+        type=int,
+        default=2000,
+        help="Rows per page/cursor fetch when reading raw_posts and method_events (default: 2000)",
+    )
+    parser.add_argument(
+        "--stats-checkpoint",
+        type=Path,
+        default=ROOT_DIR / "data/state/method_stats.json",
+        help="Last method_event folded into method_stats; later runs only aggregate newer events",
+    )
+    parser.add_argument(
+        "--full-stats",
+        action="store_true",
+        help="Rebuild method_stats from every method_event instead of merging new ones",
+    )
+    parser.add_argument(
+        "--stats-rebuild-hours",
+        type=float,
+        default=24.0,
+        help="Force a full rebuild when the last one is older than this; refreshes rolling 30d counts",
+    )
+    parser.add_argument(
+        "--stats-settle-minutes",
+        type=float,
+        default=10.0,
+        help="Leave method_events younger than this for the next refresh (default: 10)",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        default=ROOT_DIR / "data/cache/analysis.sqlite3",
+        help="SQLite file caching LLM extraction results by content hash",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM, bypassing the extraction cache",
+    )
     return parser.parse_args()
 
 
@@ -66,56 +218,142 @@ def main() -> None:
     args = parse_args()
     load_env()
 
+    pg = None
+    if args.postgres:
+        # Imported here so the REST-only path does not need psycopg2.
+        from postgres_client import PostgresClient
+
+        pg = PostgresClient.from_env(max_connections=1)
+    try:
+        run(args, pg)
+    finally:
+        if pg is not None:
+            pg.close()
+
+
+def run(args: argparse.Namespace, pg: Optional[Any]) -> None:
     client = SupabaseClient.from_env()
-    analyzer = MethodAnalyzer()
+    cache = None if args.no_cache else AnalysisCache(args.cache_path)
+    analyzer = MethodAnalyzer(
+        cache=cache,
+        packed_token_budget=args.pack_token_budget,
+        rate_limiter=RateLimiter(rpm=args.rpm, tpm=args.tpm),
+    )
 
     collected_after = None
     if args.since_hours:
         cutoff = datetime.now(timezone.utc) - timedelta(hours=args.since_hours)
         collected_after = cutoff.isoformat()
 
-    raw_posts = client.fetch_raw_posts(
+    filters = dict(
         limit=args.limit,
         ingestion_source=args.ingestion_source,
         url_contains=args.url_domain,
         collected_after=collected_after,
         source_keyword=args.source_keyword,
+        exclude_flagged=not args.recheck_skipped,
     )
-
-    if not raw_posts:
-        print("No raw_posts found matching filters.")
+    prefilter = None
+    if not args.no_prefilter:
+        prefilter = TestimonyPrefilter(
+            PrefilterThresholds(
+                min_action=args.prefilter_min_action,
+                min_effect=args.prefilter_min_effect,
+                max_ad=args.prefilter_max_ad,
+            )
+        )
+    to_process = select_posts_for_analysis(
+        client,
+        filters,
+        prefilter=prefilter,
+        prompt_tokens=estimate_tokens(analyzer.SYSTEM_PROMPT + analyzer.USER_PROMPT_TEMPLATE),
+        price_per_1k_tokens=args.price_per_1k_tokens,
+        mark_skipped=not args.dry_run,
+        pg=pg,
+        batch_size=args.stream_batch_size,
+    )
+    if to_process is None:
         return
 
-    post_ids = [post["id"] for post in raw_posts if post.get("id")]
-    processed_ids = client.fetch_method_event_post_ids(post_ids)
-    to_process = [post for post in raw_posts if post.get("id") not in processed_ids]
+    duplicate_of: Dict[str, str] = {}
+    reused: Dict[str, List[ExtractedMethod]] = {}
+    cluster_of: Dict[str, str] = {}
+    dedupe_index = None
+    representatives = to_process
+    if not args.no_dedupe:
+        dedupe_index = NearDuplicateIndex(args.dedupe_index)
+        representatives = plan_near_duplicates(
+            dedupe_index,
+            to_process,
+            analyzer.version,
+            duplicate_of,
+            reused,
+            cluster_of,
+            persist=not args.dry_run,
+        )
+        print(
+            f"Near-duplicates: {len(to_process)} posts → {len(representatives)} to analyze, "
+            f"{len(reused)} reuse stored cluster results, "
+            f"{len(duplicate_of) - len(reused)} follow a representative."
+        )
+
+    selections = {}
+    analysis_input = representatives
+    if args.segment_token_budget > 0:
+        segmenter = PostSegmenter(token_budget=args.segment_token_budget)
+        analysis_input, selections = segmenter.condense_posts(representatives)
+        if selections:
+            tokens_total = sum(sel.tokens_total for sel in selections.values())
+            tokens_selected = sum(sel.tokens_selected for sel in selections.values())
+            print(
+                f"Condensed {len(selections)} long posts: "
+                f"~{tokens_total} → ~{tokens_selected} tokens."
+            )
+
+    results = analyzer.analyze_batch(
+        analysis_input,
+        concurrency=args.concurrency,
+        packed=args.packed,
+    )
+    if results.failed:
+        print(
+            f"{len(results.failed)} posts failed analysis and will be retried on the next run: "
+            f"{', '.join(sorted(results.failed))}"
+        )
+    if cache is not None:
+        print(
+            f"Analysis cache: {cache.stats.hits} hits, {cache.stats.misses} misses "
+            f"({len(cache)} entries)"
+        )
+
+    if dedupe_index is not None and not args.dry_run:
+        for post_id, cluster_id in cluster_of.items():
+            if post_id in results:
+                dedupe_index.store_result(
+                    cluster_id, analyzer.version, [m.raw_response for m in results[post_id]]
+                )
 
-    print(f"Fetched {len(raw_posts)} raw_posts, {len(to_process)} need analysis.")
+    normalizer = None if args.no_synonyms else SynonymNormalizer.from_supabase(client)
 
     event_payload: List[dict] = []
     for post in to_process:
-        content = post.get("content") or ""
-        if not content:
-            continue
-        methods = analyzer.analyze(content)
+        post_id = post["id"]
+        representative_id = duplicate_of.get(post_id)
+        if post_id in reused:
+            methods = reused[post_id]
+        else:
+            methods = results.get(representative_id or post_id)
         if not methods:
             continue
+        if normalizer is not None:
+            methods = normalizer.normalize_all(methods)
         for method in methods:
-            event_payload.append(
-                {
-                    "post_id": post["id"],
-                    "method_slug": method.method_slug,
-                    "method_display_name": method.method_display_name,
-                    "action_text": method.action_text,
-                    "effect_text": method.effect_text,
-                    "effect_label": method.effect_label,
-                    "sentiment_score": method.sentiment_score,
-                    "spam_flag": method.spam_flag,
-                    "confidence": method.confidence,
-                    "analyzer_version": analyzer.version,
-                    "raw_response": method.raw_response,
-                }
-            )
+            record = method.to_event_record(post_id, analyzer.version)
+            if representative_id:
+                record = mark_duplicate(record, representative_id)
+            else:
+                record = attach_segments(record, selections.get(post_id))
+            event_payload.append(record)
 
     if not event_payload:
         print("No new method events to insert.")
@@ -129,23 +367,150 @@ def main() -> None:
         print("Skipping method_stats refresh (dry run).")
         return
 
-    events = client.fetch_method_events_with_posts()
-    stats_payload = build_method_stats(events)
-    if not stats_payload:
-        print("No method_stats payload generated.")
+    checkpoint = StatsCheckpoint(args.stats_checkpoint)
+    full = args.full_stats or checkpoint.needs_rebuild(args.stats_rebuild_hours * 3600)
+
+    def stream_events(**filters: Any) -> Iterator[Dict[str, Any]]:
+        if pg is not None:
+            batches = pg.iter_method_events_with_posts(batch_size=args.stream_batch_size, **filters)
+        else:
+            batches = client.iter_method_events_with_posts(
+                columns=STATS_EVENT_COLUMNS, batch_size=args.stream_batch_size, **filters
+            )
+        return chain.from_iterable(batches)
+
+    refresh_method_stats(
+        client,
+        stream_events,
+        checkpoint,
+        full=full,
+        settle=timedelta(minutes=args.stats_settle_minutes),
+    )
+
+
+def refresh_method_stats(
+    client: SupabaseClient,
+    stream_events: Callable[..., Iterator[Dict[str, Any]]],
+    checkpoint: StatsCheckpoint,
+    *,
+    full: bool,
+    settle: timedelta = timedelta(minutes=10),
+) -> None:
+    """Rebuild method_stats from every event, or fold in only what changed.
+
+    The incremental path reads events after the checkpoint and adds their
+    counts to the stored rows of the slugs they touch; slugs marked dirty
+    (their old events were relabeled) are recomputed from their own events.
+    Rolling 30-day counts only shed old events on a full rebuild, which
+    therefore runs on a schedule as well as on demand.
+
+    ``created_at`` is stamped when an insert starts, not when it commits, so
+    an event can become visible behind a checkpoint that already passed it.
+    Every scan therefore stops ``settle`` short of now and leaves younger
+    events to the next refresh. An insert that stays uncommitted for longer
+    than ``settle`` is still missed until the next full rebuild.
+    """
+    now = datetime.now(timezone.utc)
+    before = (now - settle).isoformat()
+    tracker = _EventKeyTracker()
+    if full:
+        payload = build_method_stats(tracker.track(stream_events(before=before)))
+        if payload:
+            client.upsert_method_stats(payload)
+        checkpoint.advance(tracker.last, rebuilt=True)
+        checkpoint.save()
+        print(f"Rebuilt {len(payload)} method_stats rows from {tracker.count} method_events.")
         return
 
-    client.upsert_method_stats(stats_payload)
-    print(f"Upserted {len(stats_payload)} method_stats rows.")
+    delta = accumulate_method_stats(
+        tracker.track(stream_events(after=checkpoint.last_event, before=before)), now=now
+    )
+    dirty = set(checkpoint.dirty_slugs)
+    payload: List[dict] = []
+    if dirty:
+        recomputed = accumulate_method_stats(
+            stream_events(method_slugs=sorted(dirty), before=before), now=now
+        )
+        payload.extend(method_stats_rows(recomputed, now=now))
+    merge_slugs = sorted(slug for slug in delta if slug not in dirty)
+    existing = {row["method_slug"]: row for row in client.fetch_method_stats(merge_slugs)}
+    payload.extend(merge_method_stats(existing, {slug: delta[slug] for slug in merge_slugs}, now=now))
+    if payload:
+        client.upsert_method_stats(payload)
+    checkpoint.advance(tracker.last)
+    checkpoint.save()
+    print(
+        f"Incremental method_stats: {tracker.count} new method_events updated "
+        f"{len(merge_slugs)} slugs, {len(dirty)} dirty slugs recomputed."
+    )
+
+
+class _EventKeyTracker:
+    """Remember the ``(created_at, id)`` of the last event streamed through it."""
+
+    def __init__(self) -> None:
+        self.last: Optional[Tuple[str, str]] = None
+        self.count = 0
+
+    def track(self, events: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for event in events:
+            created_at = event.get("created_at")
+            if isinstance(created_at, datetime):
+                created_at = created_at.isoformat()
+            self.last = (str(created_at), str(event["id"]))
+            self.count += 1
+            yield event
+
+
+def plan_near_duplicates(
+    index: NearDuplicateIndex,
+    posts: Sequence[Dict[str, Any]],
+    analyzer_version: str,
+    duplicate_of: Dict[str, str],
+    reused: Dict[str, List[ExtractedMethod]],
+    cluster_of: Dict[str, str],
+    *,
+    persist: bool = True,
+) -> List[Dict[str, Any]]:
+    """Cluster ``posts`` and return the representatives that still need the LLM.
+
+    Fills ``duplicate_of`` (post → representative post or cluster), ``reused``
+    (posts answered from a cluster result stored on an earlier run) and
+    ``cluster_of`` (representative → cluster, for storing new results).
+    ``persist=False`` leaves the index untouched, for dry runs.
+    """
+    representatives: List[Dict[str, Any]] = []
+    for cluster_id, members in index.group(posts, persist=persist).items():
+        stored = index.get_result(cluster_id, analyzer_version)
+        if stored is not None:
+            methods = [ExtractedMethod.from_raw(m) for m in stored]
+            for post in members:
+                reused[post["id"]] = methods
+                if post["id"] != cluster_id:
+                    duplicate_of[post["id"]] = cluster_id
+            continue
+        representative = members[0]
+        representatives.append(representative)
+        cluster_of[representative["id"]] = cluster_id
+        for post in members[1:]:
+            duplicate_of[post["id"]] = representative["id"]
+    return representatives
 
 
-def build_method_stats(events: Sequence[Dict[str, Any]]) -> List[dict]:
+def build_method_stats(events: Iterable[Dict[str, Any]]) -> List[dict]:
     now = datetime.now(timezone.utc)
+    return method_stats_rows(accumulate_method_stats(events, now=now), now=now)
+
+
+def accumulate_method_stats(
+    events: Iterable[Dict[str, Any]], *, now: datetime
+) -> Dict[str, Dict[str, Any]]:
+    """Per-slug counters over ``events``, skipping spam and near-duplicates."""
     cutoff = now - timedelta(days=30)
     stats: Dict[str, Dict[str, Any]] = {}
 
     for event in events:
-        if event.get("spam_flag"):
+        if event.get("spam_flag") or event.get("near_duplicate_of"):
             continue
         slug = event.get("method_slug")
         if not slug:
@@ -174,7 +539,7 @@ def build_method_stats(events: Sequence[Dict[str, Any]]) -> List[dict]:
         elif label == "neutral":
             entry["neutral_total"] += 1
 
-        posted_at = parse_datetime(event.get("raw_posts", {}).get("posted_at"))
+        posted_at = parse_datetime((event.get("raw_posts") or {}).get("posted_at"))
         if posted_at:
             if entry["last_post_at"] is None or posted_at > entry["last_post_at"]:
                 entry["last_post_at"] = posted_at
@@ -185,7 +550,10 @@ def build_method_stats(events: Sequence[Dict[str, Any]]) -> List[dict]:
                     entry["rolling_neg"] += 1
                 elif label == "neutral":
                     entry["rolling_neu"] += 1
+    return stats
+
 
+def method_stats_rows(stats: Dict[str, Dict[str, Any]], *, now: datetime) -> List[dict]:
     payload: List[dict] = []
     for slug, data in stats.items():
         display_name = slug
@@ -209,6 +577,36 @@ def build_method_stats(events: Sequence[Dict[str, Any]]) -> List[dict]:
     return payload
 
 
+def merge_method_stats(
+    existing: Dict[str, Dict[str, Any]],
+    delta: Dict[str, Dict[str, Any]],
+    *,
+    now: datetime,
+) -> List[dict]:
+    """Add ``delta`` counters onto the stored method_stats rows of the same slugs."""
+    payload = method_stats_rows(delta, now=now)
+    for row in payload:
+        stored = existing.get(row["method_slug"])
+        if stored is None:
+            continue
+        row["display_name"] = stored.get("display_name") or row["display_name"]
+        row["locale"] = stored.get("locale") or row["locale"]
+        for column in (
+            "positive_total",
+            "negative_total",
+            "neutral_total",
+            "rolling_30d_positive",
+            "rolling_30d_negative",
+            "rolling_30d_neutral",
+        ):
+            row[column] += stored.get(column) or 0
+        stored_last = parse_datetime(stored.get("last_post_at"))
+        new_last = parse_datetime(row["last_post_at"])
+        if stored_last and (new_last is None or stored_last > new_last):
+            row["last_post_at"] = stored_last.isoformat()
+    return payload
+
+
 def parse_datetime(value: Any) -> datetime | None:
     if not value:
         return None
@@ -221,11 +619,5 @@ def parse_datetime(value: Any) -> datetime | None:
         return None
 
 
-def load_env() -> None:
-    dotenv_path = ROOT_DIR / ".env"
-    load_dotenv(dotenv_path=dotenv_path, override=True)
-    load_dotenv(override=False)
-
-
 if __name__ == "__main__":
     main()
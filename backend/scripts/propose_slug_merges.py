@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Propose method_synonyms rows by clustering similar method slugs in method_events."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from env_loader import load_env
+from slug_clustering import collect_labels, propose_slug_merges
+from supabase_client import SupabaseClient
+from synonyms import fold_key
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Cluster method slugs/display names and propose method_synonyms merges"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.6,
+        help="Minimum n-gram TF-IDF cosine similarity for a merge (default: 0.6)",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=10,
+        help="Neighbours kept per slug when building clusters (default: 10)",
+    )
+    parser.add_argument(
+        "--max-df",
+        type=float,
+        default=0.05,
+        help="n-grams in more than this fraction of slugs are not indexed (default: 0.05)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Where to write the proposals JSON (default: data/slug_merges/<timestamp>.json)",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Insert the proposals into method_synonyms (existing synonyms are left as-is)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    load_env()
+
+    client = SupabaseClient.from_env()
+    labels = collect_labels(client.iter_method_event_labels())
+    known = {
+        fold_key(row["synonym"]): row["method_slug"]
+        for row in client.fetch_method_synonyms()
+        if row.get("synonym") and row.get("method_slug")
+    }
+    print(f"Loaded {len(labels)} distinct slugs and {len(known)} existing synonyms.")
+
+    started = time.perf_counter()
+    proposals = propose_slug_merges(
+        labels,
+        threshold=args.threshold,
+        top_k=args.top_k,
+        max_df=args.max_df,
+        known=known,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Clustered in {elapsed:.2f}s; {len(proposals)} merge proposals.")
+    for proposal in proposals[:20]:
+        print(f"  {proposal.synonym} → {proposal.method_slug} ({proposal.score:.3f})")
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = ROOT_DIR / "data/slug_merges" / f"{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps([asdict(proposal) for proposal in proposals], ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    print(f"Wrote proposals to {output}")
+
+    if args.apply and proposals:
+        # method_synonyms.method_slug references method_stats, so a merge into
+        # a slug that has no stats row yet would fail the whole insert.
+        canonical = sorted({proposal.method_slug for proposal in proposals})
+        with_stats = {row["method_slug"] for row in client.fetch_method_stats(canonical)}
+        missing = [proposal for proposal in proposals if proposal.method_slug not in with_stats]
+        if missing:
+            print(
+                f"Skipping {len(missing)} proposals whose canonical slug has no method_stats row "
+                "yet; re-run after the next stats refresh:"
+            )
+            for proposal in missing:
+                print(f"  {proposal.synonym} → {proposal.method_slug}")
+        proposals = [proposal for proposal in proposals if proposal.method_slug in with_stats]
+        inserted = client.insert_method_synonyms([proposal.to_record() for proposal in proposals])
+        print(f"Inserted {inserted} method_synonyms rows; run renormalize_method_events.py to apply them.")
+
+
+if __name__ == "__main__":
+    main()
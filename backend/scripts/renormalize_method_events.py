@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Re-apply method_synonyms to existing method_events in bulk."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from env_loader import load_env
+from stats_checkpoint import StatsCheckpoint
+from supabase_client import SupabaseClient
+from synonyms import SynonymNormalizer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Rewrite method_events.method_slug to canonical slugs from method_synonyms"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report the slug changes without writing them",
+    )
+    parser.add_argument(
+        "--stats-checkpoint",
+        type=Path,
+        default=ROOT_DIR / "data/state/method_stats.json",
+        help="process_raw_posts.py stats checkpoint; relabeled slugs are marked for recomputation",
+    )
+    parser.add_argument(
+        "--keep-stale-stats",
+        action="store_true",
+        help="Do not delete method_stats rows for slugs that no longer have events",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    load_env()
+
+    client = SupabaseClient.from_env()
+    normalizer = SynonymNormalizer.from_supabase(client)
+    print(f"Loaded {len(normalizer)} synonym keys.")
+
+    changes: Dict[str, List[str]] = defaultdict(list)
+    renamed: Dict[str, str] = {}
+    remaining_slugs = set()
+    scanned = 0
+    for event in client.iter_method_event_labels():
+        scanned += 1
+        slug = event.get("method_slug") or ""
+        canonical = normalizer.canonical_slug(slug, event.get("method_display_name"))
+        remaining_slugs.add(canonical)
+        if canonical != slug:
+            changes[canonical].append(event["id"])
+            renamed[slug] = canonical
+
+    moved = sum(len(ids) for ids in changes.values())
+    print(f"Scanned {scanned} method_events; {moved} need a new slug.")
+    for old_slug, new_slug in sorted(renamed.items()):
+        print(f"  {old_slug} → {new_slug}")
+
+    stale_slugs = sorted(slug for slug in renamed if slug not in remaining_slugs)
+    if args.dry_run:
+        print(f"[Dry Run] Would relabel {moved} events and drop {len(stale_slugs)} method_stats rows.")
+        return
+
+    for canonical, event_ids in changes.items():
+        client.relabel_method_events(event_ids, canonical)
+    print(f"Relabeled {moved} method_events.")
+    if changes:
+        checkpoint = StatsCheckpoint(args.stats_checkpoint)
+        # Both ends of each rename: targets gained events, sources lost some.
+        checkpoint.mark_dirty(set(changes) | set(renamed))
+        checkpoint.save()
+
+    if stale_slugs and not args.keep_stale_stats:
+        deletable = repoint_stale_synonyms(client, stale_slugs, renamed)
+        client.delete_method_stats(deletable)
+        print(f"Deleted {len(deletable)} stale method_stats rows; rerun process_raw_posts.py to refresh stats.")
+
+
+def repoint_stale_synonyms(
+    client: SupabaseClient, stale_slugs: Sequence[str], renamed: Dict[str, str]
+) -> List[str]:
+    """Move synonyms off stale slugs; returns the slugs whose stats row can be deleted.
+
+    method_synonyms.method_slug references method_stats with ON DELETE
+    CASCADE, so deleting a stale row would silently drop every synonym that
+    points at it. Those synonyms move to the slug the events were renamed to,
+    which needs a method_stats row of its own first; a stale slug whose
+    target has none yet is kept until process_raw_posts.py creates it.
+    """
+    referenced = {row.get("method_slug") for row in client.fetch_method_synonyms()}
+    targets = sorted({renamed[slug] for slug in stale_slugs if slug in referenced})
+    with_stats = {row["method_slug"] for row in client.fetch_method_stats(targets)}
+    deletable: List[str] = []
+    for slug in stale_slugs:
+        if slug in referenced:
+            target = renamed[slug]
+            if target not in with_stats:
+                print(f"  Keeping {slug}: synonyms point at it and {target} has no method_stats row yet.")
+                continue
+            moved = client.repoint_method_synonyms(slug, target)
+            print(f"  Moved {moved} synonyms {slug} → {target}.")
+        deletable.append(slug)
+    return deletable
+
+
+if __name__ == "__main__":
+    main()
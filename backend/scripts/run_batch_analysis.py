@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Analyze pending raw_posts through the OpenAI Batch API (nightly backfills).
+
+Posts are selected like ``process_raw_posts.py`` (unanalyzed, not flagged,
+through the prefilter). Near-duplicate planning is not applied: batch ingest
+only writes events for the posts it submitted, so cluster members left out of
+the job would stay pending forever.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from analyzer import MethodAnalyzer, estimate_tokens
+from batch_jobs import FINISHED_STATUSES, BatchJobRunner
+from env_loader import load_env
+from post_selection import select_posts_for_analysis
+from prefilter import TestimonyPrefilter
+from segmenter import PostSegmenter
+from supabase_client import SupabaseClient
+from synonyms import SynonymNormalizer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Submit pending raw_posts as an OpenAI batch job and ingest the results"
+    )
+    parser.add_argument(
+        "--job-dir",
+        type=Path,
+        default=ROOT_DIR / "data/batch_jobs/current",
+        help="Directory holding the request file and resumable job state",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=2000,
+        help="Maximum raw posts to fetch when starting a new job",
+    )
+    parser.add_argument(
+        "--since-hours",
+        type=int,
+        default=None,
+        help="Only consider posts collected within the past N hours",
+    )
+    parser.add_argument(
+        "--url-domain",
+        type=str,
+        default=None,
+        help="Filter raw posts whose URL contains this domain",
+    )
+    parser.add_argument(
+        "--ingestion-source",
+        type=str,
+        default=None,
+        help="Optional ingestion_source filter (e.g., note_hashtag)",
+    )
+    parser.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        help="Submit every post, even without action/effect signals",
+    )
+    parser.add_argument(
+        "--recheck-skipped",
+        action="store_true",
+        help="Also fetch posts previously marked as skipped by the prefilter",
+    )
+    parser.add_argument(
+        "--segment-token-budget",
+        type=int,
+        default=1500,
+        help="Condense longer bodies to their most relevant paragraphs (0 disables)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between batch status checks (default: 60)",
+    )
+    parser.add_argument(
+        "--no-wait",
+        action="store_true",
+        help="Submit (or check) the job and exit instead of waiting for completion",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    load_env()
+
+    client = SupabaseClient.from_env()
+    analyzer = MethodAnalyzer()
+    runner = BatchJobRunner(
+        analyzer,
+        client,
+        args.job_dir,
+        poll_interval=args.poll_interval,
+        normalizer=SynonymNormalizer.from_supabase(client),
+    )
+
+    if runner.state is None or runner.state.status in FINISHED_STATUSES:
+        collected_after = None
+        if args.since_hours:
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=args.since_hours)
+            collected_after = cutoff.isoformat()
+        to_process = select_posts_for_analysis(
+            client,
+            dict(
+                limit=args.limit,
+                ingestion_source=args.ingestion_source,
+                url_contains=args.url_domain,
+                collected_after=collected_after,
+                exclude_flagged=not args.recheck_skipped,
+            ),
+            prefilter=None if args.no_prefilter else TestimonyPrefilter(),
+            prompt_tokens=estimate_tokens(analyzer.SYSTEM_PROMPT + analyzer.USER_PROMPT_TEMPLATE),
+        )
+        if not to_process:
+            print("No raw_posts need analysis.")
+            return
+        if args.segment_token_budget > 0:
+            segmenter = PostSegmenter(token_budget=args.segment_token_budget)
+            to_process, _ = segmenter.condense_posts(to_process)
+        state = runner.prepare(to_process)
+        print(f"Prepared {state.post_count} requests in {state.request_path}")
+    else:
+        print(f"Resuming batch job {runner.state.batch_id or '(not submitted)'} ({runner.state.status})")
+
+    if args.no_wait:
+        if runner.state.status == "prepared":
+            runner.submit()
+        state = runner.poll(wait=False)
+        if state.status == "completed":
+            state = runner.ingest()
+        print(f"Batch {state.batch_id}: {state.status} {state.request_counts}")
+        return
+
+    state = runner.run()
+    print(
+        f"Batch {state.batch_id}: {state.status}, "
+        f"inserted {state.inserted_events} method_events from {state.ingested_lines} results."
+    )
+
+
+if __name__ == "__main__":
+    main()
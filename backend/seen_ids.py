@@ -0,0 +1,164 @@
+"""Persistent scalable Bloom filter of platform_ids already stored in raw_posts."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+
+_LN2_SQUARED = math.log(2) ** 2
+_FORMAT_VERSION = 1
+
+
+@dataclass
+class _Slice:
+    """One fixed-size Bloom filter inside the scalable chain."""
+
+    capacity: int
+    num_bits: int
+    num_hashes: int
+    count: int
+    bits: bytearray
+
+    @classmethod
+    def create(cls, capacity: int, fp_rate: float) -> "_Slice":
+        num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / _LN2_SQUARED))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(capacity, num_bits, num_hashes, 0, bytearray((num_bits + 7) // 8))
+
+    def positions(self, h1: int, h2: int) -> Iterable[int]:
+        m = self.num_bits
+        return ((h1 + i * h2) % m for i in range(self.num_hashes))
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(h1, h2))
+
+    def add(self, h1: int, h2: int) -> None:
+        bits = self.bits
+        for pos in self.positions(h1, h2):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+class SeenIdFilter:
+    """Scalable Bloom filter of IDs that the database already holds.
+
+    Membership is approximate in one direction only: an ID that was added is
+    always reported as seen, while an unseen ID is wrongly reported as seen
+    with probability at most ``fp_rate`` (such a post would be held back from
+    upload). The filter grows by appending slices with doubled capacity and
+    halved error rate, so the bound holds however many IDs are added.
+
+    ``synced_at`` records when the filter was last rebuilt from the database;
+    callers rebuild it once it is older than their resync interval, which also
+    drops IDs deleted server-side and resets the slice chain.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        fp_rate: float = 1e-5,
+        initial_capacity: int = 100_000,
+    ) -> None:
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.path = Path(path)
+        self.fp_rate = fp_rate
+        self.initial_capacity = max(1, initial_capacity)
+        self.synced_at: Optional[float] = None
+        self._slices: List[_Slice] = []
+        if self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return sum(part.count for part in self._slices)
+
+    def __contains__(self, value: str) -> bool:
+        h1, h2 = _hash_pair(value)
+        return any(part.contains(h1, h2) for part in self._slices)
+
+    def add(self, value: str) -> bool:
+        """Insert ``value``; returns False if it was (probably) present already."""
+        h1, h2 = _hash_pair(value)
+        if any(part.contains(h1, h2) for part in self._slices):
+            return False
+        if not self._slices or self._slices[-1].count >= self._slices[-1].capacity:
+            self._grow()
+        self._slices[-1].add(h1, h2)
+        return True
+
+    def update(self, values: Iterable[str]) -> int:
+        return sum(1 for value in values if self.add(value))
+
+    def needs_resync(self, max_age: float) -> bool:
+        return self.synced_at is None or time.time() - self.synced_at >= max_age
+
+    def rebuild(self, values: Iterable[str]) -> int:
+        """Replace the contents with ``values`` and mark the filter as synced.
+
+        Returns how many values were read.
+        """
+        self._slices = []
+        total = 0
+        for value in values:
+            self.add(value)
+            total += 1
+        self.synced_at = time.time()
+        return total
+
+    def save(self) -> None:
+        header = {
+            "version": _FORMAT_VERSION,
+            "fp_rate": self.fp_rate,
+            "initial_capacity": self.initial_capacity,
+            "synced_at": self.synced_at,
+            "slices": [
+                {
+                    "capacity": part.capacity,
+                    "num_bits": part.num_bits,
+                    "num_hashes": part.num_hashes,
+                    "count": part.count,
+                }
+                for part in self._slices
+            ],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(json.dumps(header).encode("utf-8") + b"\n")
+            for part in self._slices:
+                handle.write(part.bits)
+        tmp_path.replace(self.path)
+
+    def _grow(self) -> None:
+        # Tightening ratio 1/2: the slice error rates sum to at most fp_rate.
+        index = len(self._slices)
+        capacity = self.initial_capacity * (2 ** index)
+        fp_rate = self.fp_rate * 0.5 ** (index + 1)
+        self._slices.append(_Slice.create(capacity, fp_rate))
+
+    def _load(self) -> None:
+        with self.path.open("rb") as handle:
+            header = json.loads(handle.readline())
+            if header.get("version") != _FORMAT_VERSION or header.get("fp_rate") != self.fp_rate:
+                # Different layout or error target: start over; the next run resyncs.
+                return
+            self.initial_capacity = header["initial_capacity"]
+            self.synced_at = header.get("synced_at")
+            for meta in header["slices"]:
+                bits = bytearray(handle.read((meta["num_bits"] + 7) // 8))
+                self._slices.append(
+                    _Slice(meta["capacity"], meta["num_bits"], meta["num_hashes"], meta["count"], bits)
+                )
+
+
+def _hash_pair(value: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
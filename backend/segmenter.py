@@ -0,0 +1,276 @@
+"""Token-budgeted segmentation of long posts ahead of LLM analysis."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from analyzer import estimate_tokens
+
+
+# Things people did: treatments, habits, starting or stopping something.
+ACTION_PATTERN = re.compile(
+    "|".join(
+        [
+            r"始め(?:た|て|ました)",
+            r"続け(?:た|て|ている|ました)",
+            r"(?:やめ|止め)(?:た|て|ました)",
+            r"試し(?:た|て|ました)",
+            r"取り入れ",
+            r"飲み始め",
+            r"服用",
+            r"処方",
+            r"通院",
+            r"受診",
+            r"入院",
+            r"休職",
+            r"減薬",
+            r"断薬",
+            r"再開",
+            r"カウンセリング",
+            r"療法",
+            r"散歩",
+            r"運動",
+            r"筋トレ",
+            r"ヨガ",
+            r"瞑想",
+            r"マインドフルネス",
+            r"日光浴",
+            r"断ち",
+            r"サプリ",
+            r"SSRI|SNRI|抗うつ薬|睡眠薬|漢方",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+# Outcomes: improvement, relapse, side effects.
+EFFECT_PATTERN = re.compile(
+    "|".join(
+        [
+            r"改善",
+            r"回復",
+            r"治っ",
+            r"寛解",
+            r"楽に(?:なっ|なり)",
+            r"良く(?:なっ|なり)",
+            r"よく(?:なっ|なり)",
+            r"眠れ(?:る|た|ます|ました)",
+            r"落ち着",
+            r"和らい",
+            r"軽く(?:なっ|なり)",
+            r"減っ",
+            r"消え",
+            r"薄れ",
+            r"なくなっ",
+            r"半分に",
+            r"整っ",
+            r"できるように(?:なっ|なり)",
+            r"戻っ",
+            r"効果",
+            r"効い",
+            r"変わっ",
+            r"悪化",
+            r"副作用",
+            r"離脱症状",
+            r"救われ",
+        ]
+    )
+)
+
+# Connectors that tie an action to its outcome ("Xしたことで Y").
+CAUSAL_PATTERN = re.compile(r"ことで|おかげで|してから|して以来|した結果|のおかげ|→|により")
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[。！？!?\n])")
+
+
+@dataclass
+class Segment:
+    index: int
+    text: str
+    tokens: int
+    score: float = 0.0
+
+
+@dataclass
+class SegmentSelection:
+    """Outcome of condensing one body to a token budget."""
+
+    text: str
+    used: List[int]
+    total_segments: int
+    tokens_total: int
+    tokens_selected: int
+    segments: List[Segment] = field(default_factory=list, repr=False)
+
+    @property
+    def truncated(self) -> bool:
+        return len(self.used) < self.total_segments
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "used": self.used,
+            "total": self.total_segments,
+            "tokens_total": self.tokens_total,
+            "tokens_selected": self.tokens_selected,
+        }
+
+
+class PostSegmenter:
+    """Split long bodies into paragraphs and keep the most testimony-like ones.
+
+    Bodies that already fit ``token_budget`` pass through untouched. Longer
+    bodies are split into paragraph segments (long paragraphs are further split
+    at sentence boundaries), each segment is scored for action/effect signals,
+    and the best-scoring segments are kept in their original order until the
+    budget is spent.
+    """
+
+    def __init__(
+        self,
+        *,
+        token_budget: int = 1500,
+        max_segment_tokens: int = 400,
+        min_segment_chars: int = 40,
+    ) -> None:
+        self.token_budget = token_budget
+        self.max_segment_tokens = max_segment_tokens
+        self.min_segment_chars = min_segment_chars
+
+    def select(self, body: str) -> SegmentSelection:
+        tokens_total = estimate_tokens(body)
+        if tokens_total <= self.token_budget:
+            return SegmentSelection(
+                text=body,
+                used=[0],
+                total_segments=1,
+                tokens_total=tokens_total,
+                tokens_selected=tokens_total,
+            )
+
+        segments = self.segment(body)
+        for segment in segments:
+            segment.score = score_segment(segment.text)
+
+        ranked = sorted(segments, key=lambda s: (-s.score, s.index))
+        chosen: List[Segment] = []
+        used_tokens = 0
+        for segment in ranked:
+            if segment.score <= 0 and chosen:
+                break
+            if used_tokens + segment.tokens > self.token_budget:
+                continue
+            chosen.append(segment)
+            used_tokens += segment.tokens
+
+        if not chosen:
+            best = ranked[0]
+            text = _truncate_to_tokens(best.text, self.token_budget)
+            return SegmentSelection(
+                text=text,
+                used=[best.index],
+                total_segments=len(segments),
+                tokens_total=tokens_total,
+                tokens_selected=estimate_tokens(text),
+                segments=segments,
+            )
+
+        chosen.sort(key=lambda s: s.index)
+        return SegmentSelection(
+            text="\n\n".join(s.text for s in chosen),
+            used=[s.index for s in chosen],
+            total_segments=len(segments),
+            tokens_total=tokens_total,
+            tokens_selected=used_tokens,
+            segments=segments,
+        )
+
+    def segment(self, body: str) -> List[Segment]:
+        pieces: List[str] = []
+        for paragraph in _PARAGRAPH_SPLIT.split(body):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if estimate_tokens(paragraph) <= self.max_segment_tokens:
+                pieces.append(paragraph)
+            else:
+                pieces.extend(self._split_sentences(paragraph))
+
+        merged: List[str] = []
+        for piece in pieces:
+            if (
+                merged
+                and len(merged[-1]) < self.min_segment_chars
+                and estimate_tokens(merged[-1] + piece) <= self.max_segment_tokens
+            ):
+                merged[-1] = f"{merged[-1]}\n{piece}"
+            else:
+                merged.append(piece)
+
+        return [
+            Segment(index=i, text=text, tokens=estimate_tokens(text))
+            for i, text in enumerate(merged)
+        ]
+
+    def condense_posts(
+        self, posts: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, SegmentSelection]]:
+        """Return copies of ``posts`` with condensed content plus the selections made.
+
+        Only posts whose body exceeded the budget appear in the selection map.
+        """
+        condensed: List[Dict[str, Any]] = []
+        selections: Dict[str, SegmentSelection] = {}
+        for post in posts:
+            content = post.get("content") or ""
+            selection = self.select(content) if content else None
+            if selection is None or not selection.truncated:
+                condensed.append(post)
+                continue
+            condensed.append({**post, "content": selection.text})
+            post_id = post.get("id") or post.get("platform_id")
+            selections[post_id] = selection
+        return condensed, selections
+
+    def _split_sentences(self, paragraph: str) -> List[str]:
+        chunks: List[str] = []
+        current = ""
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            if not sentence:
+                continue
+            if current and estimate_tokens(current + sentence) > self.max_segment_tokens:
+                chunks.append(current.strip())
+                current = ""
+            current += sentence
+        if current.strip():
+            chunks.append(current.strip())
+        return chunks
+
+
+def score_segment(text: str) -> float:
+    """Score a segment by how much it reads like "did X → got Y"."""
+    actions = len(ACTION_PATTERN.findall(text))
+    effects = len(EFFECT_PATTERN.findall(text))
+    causal = len(CAUSAL_PATTERN.findall(text))
+    score = actions + 1.5 * effects + 0.5 * causal
+    if actions and effects:
+        score += 2.0
+    return score
+
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    end = len(text)
+    while end > 0 and estimate_tokens(text[:end]) > budget:
+        end = max(0, end - max(1, (end // 10)))
+    return text[:end]
+
+
+def attach_segments(record: dict, selection: Optional[SegmentSelection]) -> dict:
+    """Record in a ``method_events`` row which segments the LLM actually saw."""
+    if selection is None:
+        return record
+    raw_response = dict(record.get("raw_response") or {})
+    raw_response["source_segments"] = selection.to_metadata()
+    return {**record, "raw_response": raw_response}
@@ -0,0 +1,220 @@
+"""Propose method_synonyms merges by clustering similar method slugs/names."""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from synonyms import fold_key
+
+
+@dataclass
+class SlugLabel:
+    """One distinct slug with the display names and event count seen for it."""
+
+    method_slug: str
+    display_names: Counter
+    events: int = 0
+
+
+@dataclass
+class MergeProposal:
+    method_slug: str  # canonical slug (most events in its cluster)
+    synonym: str
+    score: float
+    locale: str = "ja"
+
+    def to_record(self) -> dict:
+        return {"method_slug": self.method_slug, "synonym": self.synonym, "locale": self.locale}
+
+
+def collect_labels(events: Iterable[dict]) -> List[SlugLabel]:
+    """Aggregate ``method_events`` rows into one ``SlugLabel`` per slug."""
+    labels: Dict[str, SlugLabel] = {}
+    for event in events:
+        slug = event.get("method_slug")
+        if not slug:
+            continue
+        label = labels.setdefault(slug, SlugLabel(method_slug=slug, display_names=Counter()))
+        label.events += 1
+        display_name = event.get("method_display_name")
+        if display_name:
+            label.display_names[display_name] += 1
+    return list(labels.values())
+
+
+class NgramTfidf:
+    """Character n-gram TF-IDF vectors with an inverted index for similarity search.
+
+    n-grams whose document frequency exceeds ``max_df`` (or ``max_postings``)
+    are left out of the inverted index, so candidates mostly come from shared
+    rare grams and the search never compares all pairs. The weight a
+    document puts on the omitted common grams is kept as ``common_norm``; by
+    Cauchy-Schwarz their contribution to a cosine is at most the product of the
+    two norms, which decides whether a candidate needs an exact re-score.
+    """
+
+    def __init__(
+        self,
+        texts: Sequence[Sequence[str]],
+        *,
+        ngram_range: Tuple[int, int] = (2, 3),
+        max_df: float = 0.05,
+        max_postings: int = 200,
+    ) -> None:
+        self.ngram_range = ngram_range
+        counts = [self._ngrams(variants) for variants in texts]
+        n_docs = len(counts)
+        df: Counter = Counter()
+        for grams in counts:
+            df.update(grams.keys())
+        max_postings = max(2, min(max_postings, int(max_df * n_docs)))
+        idf = {gram: math.log((1 + n_docs) / (1 + freq)) + 1.0 for gram, freq in df.items()}
+
+        self.vectors: List[Dict[str, float]] = []
+        self.common_norm: List[float] = []
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for doc_id, grams in enumerate(counts):
+            weights = {gram: (1.0 + math.log(tf)) * idf[gram] for gram, tf in grams.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            vector = {gram: w / norm for gram, w in weights.items()}
+            self.vectors.append(vector)
+            common = 0.0
+            for gram, weight in vector.items():
+                if df[gram] <= max_postings:
+                    self.postings[gram].append((doc_id, weight))
+                else:
+                    common += weight * weight
+            self.common_norm.append(math.sqrt(common))
+
+    def similar_pairs(self, threshold: float) -> Iterator[Tuple[int, int, float]]:
+        """Yield ``(a, b, cosine)`` with ``a < b`` for every pair scoring at least ``threshold``.
+
+        Pairs sharing a rare gram come from the inverted index. A pair sharing
+        only common grams scores at most ``common_norm[a] * common_norm[b]``,
+        so it can only reach ``threshold`` when both norms do; those few
+        documents are compared with each other directly.
+        """
+        heavy = [doc_id for doc_id, norm in enumerate(self.common_norm) if norm >= threshold]
+        heavy_set = set(heavy)
+        for doc_id, vector in enumerate(self.vectors):
+            partial: Dict[int, float] = defaultdict(float)
+            for gram, weight in vector.items():
+                for other_id, other_weight in self.postings.get(gram, ()):
+                    if other_id > doc_id:
+                        partial[other_id] += weight * other_weight
+            common = self.common_norm[doc_id]
+            for other_id, score in partial.items():
+                if score < threshold:
+                    if score + common * self.common_norm[other_id] < threshold:
+                        continue
+                    score = self.similarity(doc_id, other_id)
+                    if score < threshold:
+                        continue
+                yield doc_id, other_id, score
+            if doc_id not in heavy_set:
+                continue
+            for other_id in heavy:
+                if other_id <= doc_id or other_id in partial:
+                    continue
+                if common * self.common_norm[other_id] < threshold:
+                    continue
+                score = self.similarity(doc_id, other_id)
+                if score >= threshold:
+                    yield doc_id, other_id, score
+
+    def similarity(self, a: int, b: int) -> float:
+        vector_a, vector_b = self.vectors[a], self.vectors[b]
+        if len(vector_a) > len(vector_b):
+            vector_a, vector_b = vector_b, vector_a
+        return sum(weight * vector_b.get(gram, 0.0) for gram, weight in vector_a.items())
+
+    def _ngrams(self, variants: Sequence[str]) -> Counter:
+        grams: Counter = Counter()
+        low, high = self.ngram_range
+        for variant in variants:
+            text = f"^{fold_key(variant)}$"
+            for n in range(low, high + 1):
+                for i in range(len(text) - n + 1):
+                    grams[text[i : i + n]] += 1
+        return grams
+
+
+def propose_slug_merges(
+    labels: Sequence[SlugLabel],
+    *,
+    threshold: float = 0.6,
+    top_k: int = 10,
+    max_df: float = 0.05,
+    known: Dict[str, str] | None = None,
+) -> List[MergeProposal]:
+    """Cluster slugs whose n-gram profiles are similar and propose synonym rows.
+
+    Each slug keeps its ``top_k`` most similar neighbours scoring at least
+    ``threshold``; those edges are merged with union-find and each cluster's
+    most used slug becomes canonical. Because union-find chains edges, a
+    member is only proposed when its own similarity to the canonical slug
+    also reaches ``threshold``; the rest stay unmerged. Pairs already present
+    in ``known`` (folded synonym → canonical) are skipped.
+    """
+    if not labels:
+        return []
+    texts = [[label.method_slug, *label.display_names.keys()] for label in labels]
+    index = NgramTfidf(texts, max_df=max_df)
+
+    parent = list(range(len(labels)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    neighbours: Dict[int, List[Tuple[float, int]]] = defaultdict(list)
+    for a, b, score in index.similar_pairs(threshold):
+        for node, other in ((a, b), (b, a)):
+            heap = neighbours[node]
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, other))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, other))
+
+    edge_scores: Dict[Tuple[int, int], float] = {}
+    for node, heap in neighbours.items():
+        for score, other in heap:
+            edge_scores[(min(node, other), max(node, other))] = score
+    for a, b in edge_scores:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for doc_id in range(len(labels)):
+        clusters[find(doc_id)].append(doc_id)
+
+    known = known or {}
+    proposals: List[MergeProposal] = []
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        canonical_id = max(members, key=lambda i: (labels[i].events, -len(labels[i].method_slug)))
+        canonical = labels[canonical_id].method_slug
+        for member_id in members:
+            if member_id == canonical_id:
+                continue
+            synonym = labels[member_id].method_slug
+            if known.get(fold_key(synonym)) == canonical:
+                continue
+            score = edge_scores.get(
+                (min(member_id, canonical_id), max(member_id, canonical_id)),
+                index.similarity(member_id, canonical_id),
+            )
+            if score < threshold:
+                continue
+            proposals.append(MergeProposal(method_slug=canonical, synonym=synonym, score=score))
+    proposals.sort(key=lambda p: (-p.score, p.method_slug, p.synonym))
+    return proposals
+
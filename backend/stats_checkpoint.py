@@ -0,0 +1,60 @@
+"""Checkpoint for incremental method_stats refreshes."""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class StatsCheckpoint:
+    """JSON file recording how far method_stats has been aggregated.
+
+    ``last_event`` is the ``(created_at, id)`` of the newest method_event
+    folded into method_stats; an incremental refresh only reads events after
+    it. ``dirty_slugs`` lists slugs whose existing events changed (e.g. were
+    relabeled) and must be recomputed from scratch. ``rebuilt_at`` is when
+    the last full rebuild ran; rolling 30-day counts only decay on a rebuild.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._state: Dict[str, Any] = {}
+        if self.path.exists():
+            self._state = json.loads(self.path.read_text(encoding="utf-8"))
+
+    @property
+    def last_event(self) -> Optional[Tuple[str, str]]:
+        value = self._state.get("last_event")
+        return (value[0], value[1]) if value else None
+
+    @property
+    def rebuilt_at(self) -> Optional[float]:
+        return self._state.get("rebuilt_at")
+
+    @property
+    def dirty_slugs(self) -> List[str]:
+        return list(self._state.get("dirty_slugs", []))
+
+    def needs_rebuild(self, max_age: float) -> bool:
+        rebuilt_at = self.rebuilt_at
+        return self.last_event is None or rebuilt_at is None or time.time() - rebuilt_at >= max_age
+
+    def mark_dirty(self, slugs: Iterable[str]) -> None:
+        self._state["dirty_slugs"] = sorted(set(self.dirty_slugs) | set(slugs))
+
+    def advance(self, last_event: Optional[Tuple[str, str]], *, rebuilt: bool = False) -> None:
+        if last_event is not None:
+            self._state["last_event"] = list(last_event)
+        if rebuilt:
+            self._state["rebuilt_at"] = time.time()
+        self._state["dirty_slugs"] = []
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(
+            json.dumps(self._state, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8"
+        )
+        tmp_path.replace(self.path)
@@ -1,21 +1,74 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
+import json
 import os
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, TypeVar
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar
 
 import httpx
 
+from rate_limiter import backoff_delay, in_event_loop, retry_after_seconds
+
+
+# HTTP/2 needs ``h2``, which requirements.txt installs through ``httpx[http2]``;
+# without it the client falls back to HTTP/1.1 keep-alive.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# Failures that guarantee the server never applied the request. Only these are
+# retried for tables without a conflict target, where a replay duplicates rows.
+_UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_UNSENT_STATUSES = {429, 503}
+
+METHOD_EVENT_WITH_POST_COLUMNS = (
+    "id",
+    "method_slug",
+    "method_display_name",
+    "effect_label",
+    "action_text",
+    "effect_text",
+    "sentiment_score",
+    "spam_flag",
+    "confidence",
+    "created_at",
+    "post_id",
+    "near_duplicate_of:raw_response->>near_duplicate_of",
+    "raw_posts:post_id(id,posted_at,source_keyword,url,content)",
+)
+
 
 class SupabaseClient:
     """Minimal REST client for inserting raw posts and method events."""
 
-    def __init__(self, *, url: str, service_role_key: str) -> None:
+    def __init__(
+        self,
+        *,
+        url: str,
+        service_role_key: str,
+        max_in_flight: int = 4,
+        max_chunk_rows: int = 500,
+        max_chunk_bytes: int = 2_000_000,
+        max_retries: int = 4,
+        transport: Optional[httpx.BaseTransport] = None,
+    ) -> None:
         if not url or not service_role_key:
             raise ValueError("Supabase URL and service role key are required")
         self.base_url = url.rstrip("/")
         self.rest_url = f"{self.base_url}/rest/v1"
         self.service_role_key = service_role_key
-        self._client = httpx.Client(timeout=30.0)
+        self.max_in_flight = max_in_flight
+        self.max_chunk_rows = max_chunk_rows
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_retries = max_retries
+        self._client = httpx.Client(timeout=30.0, transport=transport)
+        # Multi-chunk inserts share one AsyncSupabaseClient on a background loop.
+        self._uploader: Optional[AsyncSupabaseClient] = None
+        self._uploader_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._uploader_thread: Optional[threading.Thread] = None
+        self._uploader_lock = threading.Lock()
 
     @classmethod
     def from_env(cls) -> "SupabaseClient":
@@ -25,20 +78,54 @@ class SupabaseClient:
             raise RuntimeError("SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY が設定されていません")
         return cls(url=url, service_role_key=key)
 
+    def __enter__(self) -> "SupabaseClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._uploader_lock:
+            loop, thread, uploader = self._uploader_loop, self._uploader_thread, self._uploader
+            self._uploader_loop = self._uploader_thread = self._uploader = None
+        if loop is not None and thread is not None:
+            if uploader is not None:
+                asyncio.run_coroutine_threadsafe(uploader.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        self._client.close()
+
     def insert_raw_posts(self, records: Sequence[dict]) -> int:
-        if not records:
-            return 0
-        inserted = 0
-        for chunk in _chunk(records, size=500):
-            resp = self._client.post(
+        return self._insert(
+            "raw_posts", records, params={"on_conflict": "platform_id"}, idempotent=True
+        )
+
+    def iter_raw_post_platform_ids(self, batch_size: int = 5000) -> Iterator[str]:
+        """Every ``raw_posts.platform_id``, paged by keyset so large tables stay cheap."""
+        last: Optional[str] = None
+        while True:
+            params: Dict[str, Any] = {
+                "select": "platform_id",
+                "order": "platform_id.asc",
+                "limit": batch_size,
+            }
+            if last is not None:
+                # Plain operators take the value verbatim; quoting is only for in.()/or=.
+                params["platform_id"] = f"gt.{last}"
+            resp = self._client.get(
                 f"{self.rest_url}/raw_posts",
-                params={"on_conflict": "platform_id"},
-                headers=self._headers(prefer="resolution=ignore-duplicates"),
-                json=chunk,
+                params=params,
+                headers=self._headers(),
             )
             resp.raise_for_status()
-            inserted += len(chunk)
-        return inserted
+            rows = resp.json()
+            for row in rows:
+                if row.get("platform_id"):
+                    yield row["platform_id"]
+            if len(rows) < batch_size:
+                break
+            last = rows[-1]["platform_id"]
 
     def fetch_raw_posts(
         self,
@@ -48,6 +135,7 @@ class SupabaseClient:
         url_contains: str | None = None,
         collected_after: Optional[str] = None,
         source_keyword: str | None = None,
+        exclude_flagged: bool = False,
     ) -> List[Dict[str, Any]]:
         params: Dict[str, Any] = {
             "select": "*",
@@ -62,6 +150,8 @@ class SupabaseClient:
             params["collected_at"] = f"gt.{collected_after}"
         if source_keyword:
             params["source_keyword"] = f"eq.{source_keyword}"
+        if exclude_flagged:
+            params["spam_reason"] = "is.null"
 
         resp = self._client.get(
             f"{self.rest_url}/raw_posts",
@@ -71,6 +161,26 @@ class SupabaseClient:
         resp.raise_for_status()
         return resp.json()
 
+    def mark_posts_skipped(self, reasons: Dict[str, str]) -> int:
+        """Record why posts were not sent to the analyzer in ``raw_posts.spam_reason``."""
+        if not reasons:
+            return 0
+        by_reason: Dict[str, List[str]] = {}
+        for post_id, reason in reasons.items():
+            by_reason.setdefault(reason, []).append(post_id)
+        updated = 0
+        for reason, post_ids in by_reason.items():
+            for chunk in _chunk(post_ids, size=100):
+                resp = self._client.patch(
+                    f"{self.rest_url}/raw_posts",
+                    params={"id": f"in.({','.join(chunk)})"},
+                    headers=self._headers(prefer="return=minimal"),
+                    json={"spam_reason": f"prefilter:{reason}"},
+                )
+                resp.raise_for_status()
+                updated += len(chunk)
+        return updated
+
     def fetch_method_event_post_ids(self, post_ids: Sequence[str]) -> Set[str]:
         if not post_ids:
             return set()
@@ -90,13 +200,135 @@ class SupabaseClient:
             seen.update(row["post_id"] for row in resp.json() if row.get("post_id"))
         return seen
 
+    def fetch_method_events_for_posts(
+        self,
+        post_ids: Sequence[str],
+        *,
+        columns: Sequence[str] = ("post_id",),
+        analyzer_version: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """method_events rows of ``post_ids``, optionally limited to one analyzer version."""
+        rows: List[Dict[str, Any]] = []
+        for chunk in _chunk(post_ids, size=100):
+            params = {"select": ",".join(columns), "post_id": f"in.({','.join(chunk)})"}
+            if analyzer_version is not None:
+                params["analyzer_version"] = f"eq.{analyzer_version}"
+            resp = self._client.get(
+                f"{self.rest_url}/method_events", params=params, headers=self._headers()
+            )
+            resp.raise_for_status()
+            rows.extend(resp.json())
+        return rows
+
     def insert_method_events(self, records: Sequence[dict]) -> int:
+        return self._insert("method_events", records)
+
+    def fetch_method_events_with_posts(self, batch_size: int = 500) -> List[Dict[str, Any]]:
+        return [
+            event
+            for batch in self.iter_method_events_with_posts(batch_size=batch_size)
+            for event in batch
+        ]
+
+    def iter_method_events_with_posts(
+        self,
+        *,
+        columns: Sequence[str] = METHOD_EVENT_WITH_POST_COLUMNS,
+        batch_size: int = 1000,
+        after: Optional[Tuple[str, str]] = None,
+        before: Optional[str] = None,
+        method_slugs: Optional[Sequence[str]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield method_events (with their raw_posts) in ``(created_at, id)`` order.
+
+        Pages are fetched by keyset: each request asks for rows after the last
+        ``(created_at, id)`` seen, so every page costs the same index seek and
+        rows inserted during the scan cannot shift later pages. ``columns`` is
+        the PostgREST select list; ``id`` and ``created_at`` are added when
+        missing because they drive the pagination. ``after`` starts the scan
+        past a known key, ``before`` stops it at events created before that
+        timestamp and ``method_slugs`` restricts it to those slugs.
+        """
+        select = list(columns)
+        for key in ("created_at", "id"):
+            if key not in select:
+                select.insert(0, key)
+        if method_slugs is None:
+            yield from self._iter_method_events(select, batch_size, after, before, None)
+            return
+        for chunk in _chunk(sorted(set(method_slugs)), size=100):
+            yield from self._iter_method_events(select, batch_size, after, before, chunk)
+
+    def _iter_method_events(
+        self,
+        select: List[str],
+        batch_size: int,
+        last: Optional[Tuple[str, str]],
+        before: Optional[str],
+        method_slugs: Optional[List[str]],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        while True:
+            params: Dict[str, Any] = {
+                "select": ",".join(select),
+                "order": "created_at.asc,id.asc",
+                "limit": batch_size,
+            }
+            if method_slugs is not None:
+                quoted = ",".join(_quote_filter_value(slug) for slug in method_slugs)
+                params["method_slug"] = f"in.({quoted})"
+            if before is not None:
+                params["created_at"] = f"lt.{before}"
+            if last is not None:
+                created_at = _quote_filter_value(last[0])
+                params["or"] = (
+                    f"(created_at.gt.{created_at},"
+                    f"and(created_at.eq.{created_at},id.gt.{last[1]}))"
+                )
+            resp = self._client.get(
+                f"{self.rest_url}/method_events",
+                params=params,
+                headers=self._headers(),
+            )
+            resp.raise_for_status()
+            rows = resp.json()
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                break
+            last = (rows[-1]["created_at"], rows[-1]["id"])
+
+    def fetch_method_stats(self, slugs: Sequence[str]) -> List[Dict[str, Any]]:
+        if not slugs:
+            return []
+        rows: List[Dict[str, Any]] = []
+        for chunk in _chunk(slugs, size=100):
+            quoted = ",".join(_quote_filter_value(slug) for slug in chunk)
+            resp = self._client.get(
+                f"{self.rest_url}/method_stats",
+                params={"select": "*", "method_slug": f"in.({quoted})"},
+                headers=self._headers(),
+            )
+            resp.raise_for_status()
+            rows.extend(resp.json())
+        return rows
+
+    def fetch_method_synonyms(self) -> List[Dict[str, Any]]:
+        resp = self._client.get(
+            f"{self.rest_url}/method_synonyms",
+            params={"select": "method_slug,synonym,locale"},
+            headers=self._headers(),
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    def insert_method_synonyms(self, records: Sequence[dict]) -> int:
         if not records:
             return 0
         inserted = 0
         for chunk in _chunk(records, size=500):
             resp = self._client.post(
-                f"{self.rest_url}/method_events",
+                f"{self.rest_url}/method_synonyms",
+                params={"on_conflict": "synonym,locale"},
                 headers=self._headers(prefer="resolution=ignore-duplicates"),
                 json=chunk,
             )
@@ -104,32 +336,51 @@ class SupabaseClient:
             inserted += len(chunk)
         return inserted
 
-    def fetch_method_events_with_posts(self, batch_size: int = 500) -> List[Dict[str, Any]]:
-        select = (
-            "id,method_slug,method_display_name,effect_label,action_text,effect_text,"
-            "sentiment_score,spam_flag,confidence,created_at,post_id,"
-            "raw_posts:post_id(id,posted_at,source_keyword,url,content)"
+    def iter_method_event_labels(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Every method_event as an ``id``/``method_slug``/``method_display_name`` row, streamed."""
+        for batch in self.iter_method_events_with_posts(
+            columns=("id", "method_slug", "method_display_name"), batch_size=batch_size
+        ):
+            yield from batch
+
+    def repoint_method_synonyms(self, method_slug: str, canonical: str) -> int:
+        """Move every synonym of ``method_slug`` onto ``canonical``; returns how many moved."""
+        resp = self._client.patch(
+            f"{self.rest_url}/method_synonyms",
+            params={"method_slug": f"eq.{method_slug}", "select": "id"},
+            headers=self._headers(prefer="return=representation"),
+            json={"method_slug": canonical},
         )
-        events: List[Dict[str, Any]] = []
-        offset = 0
-        while True:
-            headers = self._headers()
-            headers["Range"] = f"{offset}-{offset + batch_size - 1}"
-            resp = self._client.get(
+        resp.raise_for_status()
+        return len(resp.json())
+
+    def relabel_method_events(self, event_ids: Sequence[str], method_slug: str) -> int:
+        if not event_ids:
+            return 0
+        updated = 0
+        for chunk in _chunk(event_ids, size=100):
+            resp = self._client.patch(
                 f"{self.rest_url}/method_events",
-                params={
-                    "select": select,
-                    "order": "created_at.asc",
-                },
-                headers=headers,
+                params={"id": f"in.({','.join(chunk)})"},
+                headers=self._headers(prefer="return=minimal"),
+                json={"method_slug": method_slug},
             )
             resp.raise_for_status()
-            chunk = resp.json()
-            events.extend(chunk)
-            if len(chunk) < batch_size:
-                break
-            offset += batch_size
-        return events
+            updated += len(chunk)
+        return updated
+
+    def delete_method_stats(self, slugs: Sequence[str]) -> int:
+        if not slugs:
+            return 0
+        for chunk in _chunk(slugs, size=100):
+            quoted = ",".join(_quote_filter_value(slug) for slug in chunk)
+            resp = self._client.delete(
+                f"{self.rest_url}/method_stats",
+                params={"method_slug": f"in.({quoted})"},
+                headers=self._headers(prefer="return=minimal"),
+            )
+            resp.raise_for_status()
+        return len(slugs)
 
     def upsert_method_stats(self, records: Sequence[dict]) -> int:
         if not records:
@@ -143,15 +394,211 @@ class SupabaseClient:
         resp.raise_for_status()
         return len(records)
 
+    def _insert(
+        self,
+        table: str,
+        records: Sequence[dict],
+        *,
+        params: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> int:
+        """Insert ignoring duplicates; several chunks go through the async uploader.
+
+        ``idempotent`` marks tables where replaying a chunk is harmless (a
+        conflict target absorbs the duplicate); other tables are only retried
+        when the request provably never reached the server.
+        """
+        if not records:
+            return 0
+        chunks = _encode_chunks(records, max_rows=self.max_chunk_rows, max_bytes=self.max_chunk_bytes)
+        if len(chunks) > 1 and not in_event_loop():
+            uploader, loop = self._ensure_uploader()
+            return asyncio.run_coroutine_threadsafe(
+                uploader.post_chunks(table, chunks, params=params, idempotent=idempotent), loop
+            ).result()
+        url = f"{self.rest_url}/{table}"
+        headers = self._headers(prefer="resolution=ignore-duplicates")
+        inserted = 0
+        for rows, body in chunks:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    resp = self._client.post(url, params=params, headers=headers, content=body)
+                except httpx.TransportError as e:
+                    if attempt >= self.max_retries or not _retryable_error(e, idempotent):
+                        raise
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                if attempt < self.max_retries and _retryable_status(resp.status_code, idempotent):
+                    time.sleep(backoff_delay(attempt, retry_after=retry_after_seconds(resp.headers)))
+                    continue
+                resp.raise_for_status()
+                break
+            inserted += rows
+        return inserted
+
+    def _ensure_uploader(self) -> Tuple["AsyncSupabaseClient", asyncio.AbstractEventLoop]:
+        """Start (once) the loop thread that owns the pooled async uploader."""
+        with self._uploader_lock:
+            if self._uploader is None or self._uploader_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="supabase-uploader", daemon=True
+                )
+                thread.start()
+
+                async def create() -> AsyncSupabaseClient:
+                    return AsyncSupabaseClient(
+                        url=self.base_url,
+                        service_role_key=self.service_role_key,
+                        max_in_flight=self.max_in_flight,
+                        max_chunk_rows=self.max_chunk_rows,
+                        max_chunk_bytes=self.max_chunk_bytes,
+                        max_retries=self.max_retries,
+                    )
+
+                self._uploader = asyncio.run_coroutine_threadsafe(create(), loop).result()
+                self._uploader_loop, self._uploader_thread = loop, thread
+            return self._uploader, self._uploader_loop
+
     def _headers(self, *, prefer: str | None = None) -> dict:
-        headers = {
-            "apikey": self.service_role_key,
-            "Authorization": f"Bearer {self.service_role_key}",
-            "Content-Type": "application/json",
-        }
-        if prefer:
-            headers["Prefer"] = prefer
-        return headers
+        return _auth_headers(self.service_role_key, prefer=prefer)
+
+
+class AsyncSupabaseClient:
+    """Async bulk inserter for large uploads and backfills.
+
+    Rows are packed into chunks of at most ``max_chunk_rows`` rows and
+    ``max_chunk_bytes`` of JSON, each encoded once. Up to ``max_in_flight``
+    chunks are posted concurrently over a pooled HTTP/2 connection (HTTP/1.1
+    keep-alive when ``h2`` is missing). For idempotent inserts (a conflict
+    target such as raw_posts.platform_id) transport errors, 429 and 5xx are
+    retried per chunk with jittered backoff; other tables are only retried on
+    connect failures, 429 and 503, where the server never applied the rows.
+    A 413 splits the chunk in half.
+    """
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        service_role_key: str,
+        max_in_flight: int = 4,
+        max_chunk_rows: int = 500,
+        max_chunk_bytes: int = 2_000_000,
+        max_retries: int = 4,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        if not url or not service_role_key:
+            raise ValueError("Supabase URL and service role key are required")
+        self.base_url = url.rstrip("/")
+        self.rest_url = f"{self.base_url}/rest/v1"
+        self.service_role_key = service_role_key
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_chunk_rows = max(1, max_chunk_rows)
+        self.max_chunk_bytes = max(1, max_chunk_bytes)
+        self.max_retries = max_retries
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            http2=HTTP2_AVAILABLE and transport is None,
+            limits=httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight,
+                keepalive_expiry=30.0,
+            ),
+            transport=transport,
+        )
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "AsyncSupabaseClient":
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        if not url or not key:
+            raise RuntimeError("SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY が設定されていません")
+        return cls(url=url, service_role_key=key, **kwargs)
+
+    async def __aenter__(self) -> "AsyncSupabaseClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def insert_raw_posts(self, records: Sequence[dict]) -> int:
+        return await self.insert(
+            "raw_posts", records, params={"on_conflict": "platform_id"}, idempotent=True
+        )
+
+    async def insert_method_events(self, records: Sequence[dict]) -> int:
+        return await self.insert("method_events", records)
+
+    async def insert(
+        self,
+        table: str,
+        records: Sequence[dict],
+        *,
+        params: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> int:
+        if not records:
+            return 0
+        chunks = _encode_chunks(records, max_rows=self.max_chunk_rows, max_bytes=self.max_chunk_bytes)
+        return await self.post_chunks(table, chunks, params=params, idempotent=idempotent)
+
+    async def post_chunks(
+        self,
+        table: str,
+        chunks: Sequence[Tuple[int, bytes]],
+        *,
+        params: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> int:
+        """Post pre-encoded ``(row_count, json_body)`` chunks, ``max_in_flight`` at a time."""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        url = f"{self.rest_url}/{table}"
+        headers = _auth_headers(self.service_role_key, prefer="resolution=ignore-duplicates")
+
+        async def send(rows: int, body: bytes) -> int:
+            async with semaphore:
+                return await self._post_chunk(url, params, headers, rows, body, idempotent)
+
+        results = await asyncio.gather(*(send(rows, body) for rows, body in chunks))
+        return sum(results)
+
+    async def _post_chunk(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]],
+        headers: Dict[str, str],
+        rows: int,
+        body: bytes,
+        idempotent: bool,
+    ) -> int:
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = await self._client.post(url, params=params, headers=headers, content=body)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries or not _retryable_error(e, idempotent):
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            if resp.status_code == 413 and rows > 1:
+                # Too large for the gateway: split and send the halves in turn.
+                inserted = 0
+                for half_rows, half_body in _split_chunk(body):
+                    inserted += await self._post_chunk(
+                        url, params, headers, half_rows, half_body, idempotent
+                    )
+                return inserted
+            if attempt < self.max_retries and _retryable_status(resp.status_code, idempotent):
+                await asyncio.sleep(
+                    backoff_delay(attempt, retry_after=retry_after_seconds(resp.headers))
+                )
+                continue
+            resp.raise_for_status()
+            return rows
+        return rows
 
 
 T = TypeVar("T")
@@ -166,3 +613,60 @@ def _chunk(items: Sequence[T], size: int) -> Iterable[List[T]]:
             bucket = []
     if bucket:
         yield bucket
+
+
+def _encode_chunks(
+    records: Sequence[dict], *, max_rows: int, max_bytes: int
+) -> List[Tuple[int, bytes]]:
+    """JSON-array bodies of at most ``max_rows`` rows and ``max_bytes`` bytes each.
+
+    A single row larger than ``max_bytes`` still gets a chunk of its own.
+    """
+    chunks: List[Tuple[int, bytes]] = []
+    parts: List[bytes] = []
+    size = 2
+    for record in records:
+        encoded = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if parts and (len(parts) >= max_rows or size + len(encoded) + 1 > max_bytes):
+            chunks.append((len(parts), b"[" + b",".join(parts) + b"]"))
+            parts = []
+            size = 2
+        parts.append(encoded)
+        size += len(encoded) + 1
+    if parts:
+        chunks.append((len(parts), b"[" + b",".join(parts) + b"]"))
+    return chunks
+
+
+def _split_chunk(body: bytes) -> List[Tuple[int, bytes]]:
+    rows = json.loads(body)
+    middle = len(rows) // 2
+    return [
+        (len(half), json.dumps(half, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        for half in (rows[:middle], rows[middle:])
+    ]
+
+
+def _retryable_error(error: httpx.TransportError, idempotent: bool) -> bool:
+    return idempotent or isinstance(error, _UNSENT_ERRORS)
+
+
+def _retryable_status(status_code: int, idempotent: bool) -> bool:
+    return status_code in (_RETRY_STATUSES if idempotent else _UNSENT_STATUSES)
+
+
+def _auth_headers(service_role_key: str, *, prefer: str | None = None) -> dict:
+    headers = {
+        "apikey": service_role_key,
+        "Authorization": f"Bearer {service_role_key}",
+        "Content-Type": "application/json",
+    }
+    if prefer:
+        headers["Prefer"] = prefer
+    return headers
+
+
+def _quote_filter_value(value: str) -> str:
+    """Quote a value for a PostgREST ``in.(...)`` list."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
@@ -0,0 +1,130 @@
+"""Normalize LLM-produced method slugs against the method_synonyms table."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import replace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from analyzer import ExtractedMethod
+
+
+_SEPARATORS = re.compile(r"[\s\-_・･/／()（）\[\]【】「」]+")
+_KATAKANA_START = 0x30A1
+_KATAKANA_END = 0x30F6
+_KANA_OFFSET = 0x60
+
+
+def fold_key(text: str) -> str:
+    """Fold width, case, kana and separators so spelling variants share a key.
+
+    ``"SSRI 再開"``, ``"ｓｓｒｉ-再開"`` and ``"ssri_再開"`` all fold to
+    ``"ssri再開"``; katakana folds to hiragana so ``"サプリ"`` matches ``"さぷり"``.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(
+        chr(ord(ch) - _KANA_OFFSET) if _KATAKANA_START <= ord(ch) <= _KATAKANA_END else ch
+        for ch in text
+    )
+    return _SEPARATORS.sub("", text)
+
+
+class SynonymNormalizer:
+    """In-memory synonym lookup with periodic hot reload.
+
+    ``loader`` returns ``method_synonyms`` rows (``method_slug``, ``synonym``,
+    ``locale``). They are compiled into a dict keyed by ``fold_key``; every
+    canonical slug also maps to itself. ``maybe_reload`` re-fetches the rows at
+    most every ``refresh_seconds`` and swaps the lookup only when their content
+    changed.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Iterable[Dict[str, Any]]],
+        *,
+        locale: str = "ja",
+        refresh_seconds: float = 300.0,
+    ) -> None:
+        self._loader = loader
+        self.locale = locale
+        self.refresh_seconds = refresh_seconds
+        self._lookup: Dict[str, str] = {}
+        self._fingerprint: Optional[str] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    @classmethod
+    def from_supabase(cls, client: Any, **kwargs: Any) -> "SynonymNormalizer":
+        return cls(client.fetch_method_synonyms, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def reload(self) -> bool:
+        """Fetch the table now; returns True if the lookup changed."""
+        rows = [
+            row
+            for row in self._loader()
+            if (row.get("locale") or self.locale) == self.locale
+        ]
+        fingerprint = hashlib.sha256(
+            json.dumps(
+                sorted((row["method_slug"], row["synonym"]) for row in rows),
+                ensure_ascii=False,
+            ).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            self._loaded_at = time.monotonic()
+            if fingerprint == self._fingerprint:
+                return False
+            lookup: Dict[str, str] = {}
+            for row in rows:
+                canonical = row["method_slug"]
+                lookup.setdefault(fold_key(canonical), canonical)
+                lookup[fold_key(row["synonym"])] = canonical
+            self._lookup = lookup
+            self._fingerprint = fingerprint
+        return True
+
+    def maybe_reload(self) -> bool:
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return False
+        return self.reload()
+
+    def canonical_slug(self, slug: str, display_name: Optional[str] = None) -> str:
+        """Canonical slug for ``slug`` (or, failing that, ``display_name``)."""
+        lookup = self._lookup
+        for candidate in (slug, display_name):
+            if not candidate:
+                continue
+            canonical = lookup.get(fold_key(candidate))
+            if canonical:
+                return canonical
+        return slug
+
+    def normalize(self, method: ExtractedMethod) -> ExtractedMethod:
+        canonical = self.canonical_slug(method.method_slug, method.method_display_name)
+        if canonical == method.method_slug:
+            return method
+        raw_response = {**method.raw_response, "original_method_slug": method.method_slug}
+        return replace(method, method_slug=canonical, raw_response=raw_response)
+
+    def normalize_all(self, methods: Iterable[ExtractedMethod]) -> List[ExtractedMethod]:
+        self.maybe_reload()
+        return [self.normalize(method) for method in methods]
+
+    def normalize_record(self, record: dict) -> dict:
+        """Normalize a ``method_events`` row (as built by ``to_event_record``)."""
+        slug = record.get("method_slug") or ""
+        canonical = self.canonical_slug(slug, record.get("method_display_name"))
+        if canonical == slug:
+            return record
+        raw_response = {**(record.get("raw_response") or {}), "original_method_slug": slug}
+        return {**record, "method_slug": canonical, "raw_response": raw_response}
@@ -0,0 +1,100 @@
+"""MethodAnalyzer handling of malformed model replies over httpx.MockTransport."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, List
+
+import httpx
+import pytest
+from openai import OpenAI
+
+from analyzer import AnalysisError, MethodAnalyzer
+
+
+METHOD = {
+    "method_slug": "morning-walk",
+    "method_display_name": "朝散歩",
+    "action_text": "毎朝20分歩いた",
+    "effect_text": "眠れるようになった",
+    "effect_label": "positive",
+    "sentiment_score": 0.8,
+}
+
+
+def make_analyzer(replies: List[Any]) -> MethodAnalyzer:
+    """An analyzer whose chat completions answer with ``replies`` in order."""
+    pending = list(replies)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        content = pending.pop(0)
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o-mini",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": json.dumps(content)},
+                    }
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            },
+        )
+
+    analyzer = MethodAnalyzer(api_key="test", max_retries=0)
+    analyzer.client = OpenAI(
+        api_key="test",
+        base_url="http://openai.test/v1",
+        max_retries=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    return analyzer
+
+
+@pytest.mark.parametrize(
+    "reply",
+    [
+        [],
+        ["not", "an", "object"],
+        {"methods": ["morning-walk"]},
+        {"methods": [METHOD, 42]},
+        {"methods": {"method_slug": "morning-walk"}},
+    ],
+)
+def test_malformed_reply_is_a_permanent_analysis_error(reply):
+    analyzer = make_analyzer([reply])
+
+    with pytest.raises(AnalysisError) as excinfo:
+        analyzer._analyze_checked("毎朝散歩したら眠れるようになった")
+
+    assert not excinfo.value.transient
+
+
+def test_analyze_batch_reports_malformed_posts_and_keeps_going():
+    analyzer = make_analyzer([[], {"methods": [METHOD]}, {"methods": ["morning-walk"]}])
+    posts = [{"id": f"post-{i}", "content": f"毎朝散歩 {i}"} for i in range(3)]
+
+    results = analyzer.analyze_batch(posts)
+
+    assert [m.method_slug for m in results["post-1"]] == ["morning-walk"]
+    assert sorted(results.failed) == ["post-0", "post-2"]
+
+
+def test_analyze_returns_no_methods_for_a_malformed_reply():
+    assert make_analyzer([{"methods": [METHOD, "extra"]}]).analyze("毎朝散歩") == []
+
+
+def test_packed_reply_that_is_not_an_object_falls_back_to_single_posts():
+    analyzer = make_analyzer([[], {"methods": [METHOD]}, {"methods": []}])
+    posts = [{"id": "post-0", "content": "毎朝散歩"}, {"id": "post-1", "content": "早寝"}]
+
+    results = analyzer.analyze_batch(posts, packed=True)
+
+    assert [m.method_slug for m in results["post-0"]] == ["morning-walk"]
+    assert results["post-1"] == []
+    assert not results.failed
@@ -0,0 +1,226 @@
+"""BatchJobRunner against in-process stand-ins for the OpenAI and Supabase APIs."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+from openai import OpenAI
+
+from analyzer import MethodAnalyzer
+from batch_jobs import BatchJobRunner, BatchJobState
+from supabase_client import SupabaseClient
+
+
+POSTS = [{"id": f"post-{i}", "content": f"毎朝散歩したら眠れるようになった {i}"} for i in range(4)]
+
+
+class FakeOpenAI:
+    """Files + Batches endpoints; the batch completes on the second poll."""
+
+    def __init__(self, job_dir: Path) -> None:
+        self.job_dir = job_dir
+        self.calls: List[str] = []
+        self.polls = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls.append(f"{request.method} {path}")
+        if request.method == "POST" and path == "/v1/files":
+            return httpx.Response(200, json=_file("file-in", "batch"))
+        if request.method == "POST" and path == "/v1/batches":
+            return httpx.Response(200, json=_batch("validating"))
+        if request.method == "GET" and path == "/v1/batches/batch-1":
+            self.polls += 1
+            if self.polls < 2:
+                return httpx.Response(200, json=_batch("in_progress"))
+            return httpx.Response(200, json=_batch("completed", output_file_id="file-out"))
+        if request.method == "GET" and path == "/v1/files/file-out/content":
+            return httpx.Response(200, content=self._output())
+        return httpx.Response(404, json={"error": {"message": f"unexpected {path}"}})
+
+    def _output(self) -> bytes:
+        lines = []
+        for raw in (self.job_dir / "requests.jsonl").read_text(encoding="utf-8").splitlines():
+            custom_id = json.loads(raw)["custom_id"]
+            methods = [_method(custom_id, "morning-walk"), _method(custom_id, "sleep-hygiene")]
+            body = {"choices": [{"message": {"content": json.dumps({"methods": methods})}}]}
+            lines.append(
+                json.dumps({"custom_id": custom_id, "response": {"status_code": 200, "body": body}})
+            )
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class FakeSupabase:
+    """PostgREST stand-in for inserting and reading method_events.
+
+    ``failures`` is consumed one entry per insert: ``"lost"`` stores the rows
+    but times out before the response, ``"rejected"`` answers 500 without
+    storing anything, ``None`` succeeds.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self.failures: List[Optional[str]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/rest/v1/method_events"
+        if request.method == "POST":
+            failure = self.failures.pop(0) if self.failures else None
+            if failure == "rejected":
+                return httpx.Response(500)
+            self.events.extend(json.loads(request.content))
+            if failure == "lost":
+                raise httpx.ReadTimeout("response lost", request=request)
+            return httpx.Response(201)
+        query = {key: values[0] for key, values in parse_qs(request.url.query.decode()).items()}
+        post_ids = set(query["post_id"][len("in.(") : -1].split(","))
+        version = query.get("analyzer_version", "eq.")[len("eq.") :]
+        columns = query["select"].split(",")
+        rows = [
+            {column: event.get(column) for column in columns}
+            for event in self.events
+            if event["post_id"] in post_ids and (not version or event["analyzer_version"] == version)
+        ]
+        return httpx.Response(200, json=rows)
+
+
+@pytest.fixture
+def job_dir(tmp_path: Path) -> Path:
+    return tmp_path / "job"
+
+
+@pytest.fixture
+def openai_api(job_dir: Path) -> FakeOpenAI:
+    return FakeOpenAI(job_dir)
+
+
+@pytest.fixture
+def supabase_api() -> FakeSupabase:
+    return FakeSupabase()
+
+
+@pytest.fixture
+def make_runner(
+    job_dir: Path, openai_api: FakeOpenAI, supabase_api: FakeSupabase
+) -> Callable[..., BatchJobRunner]:
+    def make(**kwargs: Any) -> BatchJobRunner:
+        analyzer = MethodAnalyzer(api_key="test")
+        analyzer.client = OpenAI(
+            api_key="test",
+            base_url="http://openai.test/v1",
+            max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(openai_api.handler)),
+        )
+        supabase = SupabaseClient(
+            url="http://supabase.test",
+            service_role_key="test",
+            transport=httpx.MockTransport(supabase_api.handler),
+        )
+        kwargs.setdefault("poll_interval", 0.0)
+        return BatchJobRunner(analyzer, supabase, job_dir, **kwargs)
+
+    return make
+
+
+def test_run_prepares_submits_polls_and_ingests(make_runner, job_dir, openai_api, supabase_api):
+    state = make_runner().run(POSTS)
+
+    assert state.status == "ingested"
+    assert state.post_count == len(POSTS)
+    assert state.inserted_events == 2 * len(POSTS)
+    assert openai_api.polls == 2
+    assert sorted(_keys(supabase_api.events)) == sorted(_expected_keys())
+    assert BatchJobState.load(job_dir / "state.json").status == "ingested"
+
+
+def test_resume_after_submit_does_not_resubmit(make_runner, openai_api, supabase_api):
+    runner = make_runner()
+    runner.prepare(POSTS)
+    runner.submit()
+
+    state = make_runner().run()
+
+    assert state.status == "ingested"
+    assert openai_api.calls.count("POST /v1/files") == 1
+    assert openai_api.calls.count("POST /v1/batches") == 1
+    assert len(supabase_api.events) == 2 * len(POSTS)
+
+
+def test_resume_skips_events_of_a_chunk_whose_response_was_lost(make_runner, job_dir, supabase_api):
+    supabase_api.failures = [None, "lost"]
+    with pytest.raises(httpx.ReadTimeout):
+        make_runner(ingest_chunk_size=2).run(POSTS)
+    interrupted = BatchJobState.load(job_dir / "state.json")
+    assert interrupted.ingested_lines == 1
+    assert interrupted.inflight_lines == 2
+
+    state = make_runner(ingest_chunk_size=2).run()
+
+    assert state.status == "ingested"
+    assert state.inflight_lines == 0
+    assert sorted(_keys(supabase_api.events)) == sorted(_expected_keys())
+
+
+def test_resume_inserts_a_chunk_that_never_landed(make_runner, supabase_api):
+    supabase_api.failures = [None, "rejected"]
+    with pytest.raises(httpx.HTTPStatusError):
+        make_runner(ingest_chunk_size=2).run(POSTS)
+
+    # Resuming with larger chunks still re-checks exactly the in-flight lines.
+    state = make_runner(ingest_chunk_size=100).run()
+
+    assert state.status == "ingested"
+    assert sorted(_keys(supabase_api.events)) == sorted(_expected_keys())
+
+
+def _keys(events: List[Dict[str, Any]]) -> List[tuple]:
+    return [(event["post_id"], event["method_slug"]) for event in events]
+
+
+def _expected_keys() -> List[tuple]:
+    return [(post["id"], slug) for post in POSTS for slug in ("morning-walk", "sleep-hygiene")]
+
+
+def _method(post_id: str, slug: str) -> Dict[str, Any]:
+    return {
+        "method_slug": slug,
+        "method_display_name": slug,
+        "action_text": f"{slug} ({post_id})",
+        "effect_text": "眠れるようになった",
+        "effect_label": "positive",
+        "sentiment_score": 0.8,
+        "confidence": 0.9,
+        "spam_flag": False,
+    }
+
+
+def _file(file_id: str, purpose: str) -> Dict[str, Any]:
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": 0,
+        "created_at": 0,
+        "filename": "requests.jsonl",
+        "purpose": purpose,
+        "status": "processed",
+    }
+
+
+def _batch(status: str, *, output_file_id: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": "batch-1",
+        "object": "batch",
+        "endpoint": "/v1/chat/completions",
+        "input_file_id": "file-in",
+        "completion_window": "24h",
+        "created_at": 0,
+        "status": status,
+        "output_file_id": output_file_id,
+        "error_file_id": None,
+        "request_counts": {"total": len(POSTS), "completed": len(POSTS), "failed": 0},
+    }
@@ -0,0 +1,35 @@
+"""NearDuplicateIndex clustering against a scratch SQLite file."""
+
+from __future__ import annotations
+
+from near_duplicates import NearDuplicateIndex
+
+
+TEXT = "毎朝20分散歩するようにしたら夜ぐっすり眠れるようになりました。続けてみてよかった。"
+
+
+def test_group_clusters_near_duplicates(tmp_path):
+    index = NearDuplicateIndex(tmp_path / "index.sqlite3")
+    posts = [
+        {"id": "a", "content": TEXT},
+        {"id": "b", "content": TEXT + "！"},
+        {"id": "c", "content": "寝る前にスマホを見ないようにしたら寝つきが良くなった。"},
+    ]
+
+    groups = index.group(posts)
+
+    assert [[post["id"] for post in members] for members in groups.values()] == [["a", "b"], ["c"]]
+    assert index.stats() == {"posts": 3, "clusters": 2}
+
+
+def test_group_without_persist_leaves_the_index_unchanged(tmp_path):
+    path = tmp_path / "index.sqlite3"
+    index = NearDuplicateIndex(path)
+    index.group([{"id": "a", "content": TEXT}])
+
+    groups = index.group([{"id": "b", "content": TEXT + "！"}, {"id": "c", "content": TEXT}], persist=False)
+
+    assert list(groups) == ["a"]
+    assert index.stats() == {"posts": 1, "clusters": 1}
+    index.close()
+    assert NearDuplicateIndex(path).stats() == {"posts": 1, "clusters": 1}
@@ -0,0 +1,116 @@
+"""NoteHashtagCollector watermark handling over httpx.MockTransport."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List, Tuple, Union
+
+import httpx
+import pytest
+
+from collectors import NoteHashtagCollector, WatermarkStore
+
+
+KEY = "note:不眠"
+
+
+class FakeHashtagNotes:
+    """note.com hashtag API stand-in serving notes newest first, ``per_page`` per page.
+
+    Each note is published ``minute`` minutes after midnight; a ``(minute,
+    key)`` pair gives several notes the same timestamp.
+    """
+
+    def __init__(self, minutes: List[Union[int, Tuple[int, str]]], per_page: int = 3) -> None:
+        self.notes: List[Tuple[int, str]] = []
+        self.per_page = per_page
+        self.pages: List[int] = []
+        self.add(*minutes)
+
+    def add(self, *minutes: Union[int, Tuple[int, str]]) -> None:
+        for entry in minutes:
+            self.notes.append(entry if isinstance(entry, tuple) else (entry, f"n{entry:04d}"))
+        self.notes.sort(reverse=True)
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        self.pages.append(page)
+        start = (page - 1) * self.per_page
+        chunk = self.notes[start : start + self.per_page]
+        more = start + self.per_page < len(self.notes)
+        return httpx.Response(
+            200,
+            json={
+                "data": {
+                    "notes": [_note(minute, key) for minute, key in chunk],
+                    "next_page": page + 1 if more else None,
+                }
+            },
+        )
+
+
+def _note(minute: int, key: str) -> Dict[str, object]:
+    return {
+        "key": key,
+        "body": f"眠れるようになった {minute}",
+        "publishAt": f"2026-10-01T{minute // 60:02d}:{minute % 60:02d}:00+09:00",
+        "user": {"urlname": "tester", "name": "Tester"},
+    }
+
+
+def _keys(posts) -> List[str]:
+    return [post.platform_id for post in posts]
+
+
+@pytest.fixture(params=["sync", "async"])
+def collect(request):
+    def run(api: FakeHashtagNotes, store: WatermarkStore, max_results: int) -> List[str]:
+        collector = NoteHashtagCollector(
+            max_results=max_results,
+            request_interval=0.0,
+            watermarks=store,
+            transport=httpx.MockTransport(api.handler),
+        )
+        if request.param == "sync":
+            return _keys(collector.collect(["不眠"]))
+        return _keys(asyncio.run(collector.collect_async(["不眠"])))
+
+    return run
+
+
+def test_complete_crawl_advances_mark(tmp_path, collect):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    api = FakeHashtagNotes([10, 20, 30, 40])
+
+    assert collect(api, store, 10) == ["n0040", "n0030", "n0020", "n0010"]
+    assert store.get(KEY) == "2026-10-01T00:40:00+09:00"
+    assert store.checkpoint(KEY) is None
+
+
+def test_max_results_cut_keeps_mark_until_the_gap_is_crawled(tmp_path, collect):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    store.advance(KEY, "2026-10-01T00:10:00+09:00")
+    api = FakeHashtagNotes([10, 20, 30, 40, 50, 60])
+
+    assert collect(api, store, 2) == ["n0060", "n0050"]
+    # 20-40 were not fetched yet, so the mark must not jump past them.
+    assert store.get(KEY) == "2026-10-01T00:10:00+09:00"
+
+    api.add(70)
+    assert collect(api, store, 2) == ["n0070", "n0040"]
+    assert store.get(KEY) == "2026-10-01T00:10:00+09:00"
+
+    assert collect(api, store, 2) == ["n0030", "n0020"]
+    assert collect(api, store, 2) == []
+    assert store.get(KEY) == "2026-10-01T01:10:00+09:00"
+    assert store.checkpoint(KEY) is None
+
+
+def test_single_result_crawls_make_progress_through_equal_timestamps(tmp_path, collect):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    api = FakeHashtagNotes([30, (20, "n0020a"), (20, "n0020b"), 10])
+
+    seen = [collect(api, store, 1) for _ in range(5)]
+
+    assert sorted(key for run in seen for key in run) == ["n0010", "n0020a", "n0020b", "n0030"]
+    assert store.get(KEY) == "2026-10-01T00:30:00+09:00"
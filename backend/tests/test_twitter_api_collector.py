@@ -0,0 +1,233 @@
+"""TwitterApiCollector rate-limit, checkpoint and since_id handling over httpx.MockTransport."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+
+from collectors import TwitterApiCollector, WatermarkStore
+from collectors import twitter_search
+
+
+NOW = 1_700_000_000.0
+KEY = "x_api:ja:不眠 克服"
+
+
+class FakeRecentSearch:
+    """Recent-search stand-in serving ``pages`` in order, linked by next_token.
+
+    ``rate_limits`` is consumed one entry per request: a number answers 429
+    with the window resetting that many seconds from now, ``None`` serves the
+    next page. ``texts`` overrides the text of individual tweets.
+    """
+
+    def __init__(self, pages: List[List[str]]) -> None:
+        self.pages = pages
+        self.rate_limits: List[Optional[float]] = []
+        self.texts: Dict[str, str] = {}
+        self.requests: List[Dict[str, str]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        params = dict(request.url.params)
+        self.requests.append(params)
+        reset_in = self.rate_limits.pop(0) if self.rate_limits else None
+        if reset_in is not None:
+            return httpx.Response(
+                429,
+                headers={
+                    "x-rate-limit-limit": "450",
+                    "x-rate-limit-remaining": "0",
+                    "x-rate-limit-reset": str(int(NOW + reset_in)),
+                },
+                json={"title": "Too Many Requests"},
+            )
+        index = int(params.get("next_token", "page-0").split("-")[1])
+        ids = self.pages[index]
+        meta: Dict[str, Any] = {"result_count": len(ids)}
+        if index + 1 < len(self.pages):
+            meta["next_token"] = f"page-{index + 1}"
+        return httpx.Response(
+            200,
+            headers={"x-rate-limit-limit": "450", "x-rate-limit-remaining": "449"},
+            json={
+                "data": [
+                    {
+                        "id": tweet_id,
+                        "text": self.texts.get(tweet_id, f"不眠 克服 {tweet_id}"),
+                        "author_id": "42",
+                    }
+                    for tweet_id in ids
+                ],
+                "includes": {"users": [{"id": "42", "name": "Test", "username": "test"}]},
+                "meta": meta,
+            },
+        )
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    slept: List[float] = []
+    monkeypatch.setattr(twitter_search.time, "time", lambda: NOW)
+    monkeypatch.setattr(twitter_search.time, "sleep", slept.append)
+    return slept
+
+
+def make_collector(api: FakeRecentSearch, watermarks: Optional[WatermarkStore] = None, **kwargs: Any):
+    kwargs.setdefault("max_results", 100)
+    return TwitterApiCollector(
+        bearer_token="test",
+        watermarks=watermarks,
+        transport=httpx.MockTransport(api.handler),
+        **kwargs,
+    )
+
+
+def test_short_429_sleeps_until_reset_and_retries(sleeps):
+    api = FakeRecentSearch([["105", "104"], ["103"]])
+    api.rate_limits = [None, 30]
+
+    posts = make_collector(api, max_rate_limit_wait=60).collect(["不眠 克服"])
+
+    assert [post.platform_id for post in posts] == ["105", "104", "103"]
+    assert sleeps == [31.0]
+    assert [request.get("next_token") for request in api.requests] == [None, "page-1", "page-1"]
+
+
+def test_long_429_parks_checkpoint_and_resume_finishes_pagination(tmp_path, sleeps):
+    path = tmp_path / "watermarks.json"
+    store = WatermarkStore(path)
+    store.advance(KEY, "100")
+    api = FakeRecentSearch([["105", "104"], ["103", "102"], ["101"]])
+    api.rate_limits = [None, 3600]
+
+    collector = make_collector(api, store, max_rate_limit_wait=60)
+    first = collector.collect(["不眠 克服"])
+
+    assert [post.platform_id for post in first] == ["105", "104"]
+    assert collector.pending == ["不眠 克服"]
+    assert sleeps == []
+    assert store.checkpoint(KEY) == {
+        "query": "不眠 克服",
+        "since_id": "100",
+        "next_token": "page-1",
+        "newest_id": "105",
+    }
+    # The mark only moves once the interrupted pagination has been completed.
+    assert store.get(KEY) == "100"
+    store.save()
+
+    resumed_store = WatermarkStore(path)
+    resumed = make_collector(api, resumed_store).collect(["不眠 克服"])
+
+    assert [post.platform_id for post in resumed] == ["103", "102", "101"]
+    assert api.requests[-2]["next_token"] == "page-1"
+    assert api.requests[-2]["since_id"] == "100"
+    assert resumed_store.checkpoint(KEY) is None
+    assert resumed_store.get(KEY) == "105"
+
+
+def test_rate_limited_run_leaves_later_keywords_pending(sleeps):
+    api = FakeRecentSearch([["105"]])
+    api.rate_limits = [3600]
+
+    collector = make_collector(api, max_rate_limit_wait=60)
+    posts = collector.collect(["不眠 克服", "うつ 治った"])
+
+    assert posts == []
+    assert collector.pending == ["不眠 克服", "うつ 治った"]
+    assert len(api.requests) == 1
+
+
+def test_since_id_is_sent_and_advanced_to_newest(tmp_path, sleeps):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    store.advance(KEY, "100")
+    api = FakeRecentSearch([["107", "103"]])
+
+    make_collector(api, store).collect(["不眠 克服"])
+
+    assert api.requests[0]["since_id"] == "100"
+    assert store.get(KEY) == "107"
+
+
+def test_empty_result_keeps_since_id(tmp_path, sleeps):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    store.advance(KEY, "100")
+    api = FakeRecentSearch([[]])
+
+    assert make_collector(api, store).collect(["不眠 克服"]) == []
+    assert store.get(KEY) == "100"
+    assert store.checkpoint(KEY) is None
+
+
+def test_batched_group_uses_oldest_member_mark_and_advances_each_keyword(tmp_path, sleeps):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    store.advance("x_api:ja:不眠", "100")
+    store.advance("x_api:ja:克服", "104")
+    api = FakeRecentSearch([["106", "103"]])
+
+    posts = make_collector(api, store, batch_keywords=True).collect(["不眠", "克服"])
+
+    assert api.requests[0]["query"] == "((不眠) OR (克服)) lang:ja"
+    assert api.requests[0]["since_id"] == "100"
+    # 103 is new for 不眠 but was already collected for 克服.
+    assert sorted((post.source_keyword, post.platform_id) for post in posts) == [
+        ("不眠", "103"),
+        ("不眠", "106"),
+        ("克服", "106"),
+    ]
+    assert store.get("x_api:ja:不眠") == "106"
+    assert store.get("x_api:ja:克服") == "106"
+    assert store.get("x_api:ja:(不眠) OR (克服)") is None
+
+
+def test_batched_post_matching_no_keyword_goes_to_the_first_keyword(tmp_path, sleeps):
+    api = FakeRecentSearch([["106", "105"]])
+    # Matched through a hashtag entity or URL rather than the text.
+    api.texts["105"] = "https://example.com/sleep"
+
+    posts = make_collector(api, batch_keywords=True).collect(["不眠", "克服"])
+
+    assert sorted((post.source_keyword, post.platform_id) for post in posts) == [
+        ("不眠", "105"),
+        ("不眠", "106"),
+        ("克服", "106"),
+    ]
+
+
+def test_regrouped_keywords_ignore_checkpoint_of_another_query(tmp_path, sleeps):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    api = FakeRecentSearch([["105"], ["104"]])
+    api.rate_limits = [None, 3600]
+
+    make_collector(api, store, batch_keywords=True, max_rate_limit_wait=60).collect(["不眠", "克服"])
+    assert store.checkpoint("x_api:ja:不眠")["next_token"] == "page-1"
+
+    make_collector(api, store, batch_keywords=True).collect(["不眠", "克服", "うつ"])
+
+    # The next_token belonged to the two-keyword query, so the new group starts over.
+    assert "next_token" not in api.requests[-2]
+    assert store.checkpoint("x_api:ja:不眠") is None
+
+
+def test_max_results_cut_parks_checkpoint_instead_of_advancing(tmp_path, sleeps):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    store.advance(KEY, "100")
+    api = FakeRecentSearch([["105", "104"], ["103", "102"], ["101"]])
+
+    first = make_collector(api, store, max_results=2).collect(["不眠 克服"])
+
+    assert [post.platform_id for post in first] == ["105", "104"]
+    # 101-103 were not fetched yet, so the mark must not jump past them.
+    assert store.get(KEY) == "100"
+    assert store.checkpoint(KEY)["next_token"] == "page-1"
+
+    second = make_collector(api, store, max_results=2).collect(["不眠 克服"])
+    assert [post.platform_id for post in second] == ["103", "102"]
+    assert store.get(KEY) == "100"
+
+    third = make_collector(api, store, max_results=2).collect(["不眠 克服"])
+    assert [post.platform_id for post in third] == ["101"]
+    assert store.get(KEY) == "105"
+    assert store.checkpoint(KEY) is None
@@ -0,0 +1,102 @@
+"""TwitterSearchCollector since_id and checkpoint handling over httpx.MockTransport."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from collectors import TwitterSearchCollector, WatermarkStore
+
+
+KEY = "x_graphql:ja:不眠"
+
+
+class FakeSearchTimeline:
+    """SearchTimeline stand-in serving ``pages`` in order, linked by Bottom cursors."""
+
+    def __init__(self, pages: List[List[str]]) -> None:
+        self.pages = pages
+        self.cursors: List[Optional[str]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        variables = json.loads(request.url.params["variables"])
+        cursor = variables.get("cursor")
+        self.cursors.append(cursor)
+        index = int(cursor.split("-")[1]) if cursor else 0
+        entries: List[Dict[str, Any]] = [_tweet(tweet_id) for tweet_id in self.pages[index]]
+        if index + 1 < len(self.pages):
+            entries.append(
+                {
+                    "content": {
+                        "entryType": "TimelineTimelineCursor",
+                        "cursorType": "Bottom",
+                        "value": f"cursor-{index + 1}",
+                    }
+                }
+            )
+        timeline = {"instructions": [{"type": "TimelineAddEntries", "entries": entries}]}
+        return httpx.Response(
+            200,
+            json={"data": {"search_by_raw_query": {"search_timeline": {"timeline": timeline}}}},
+        )
+
+
+def _tweet(tweet_id: str) -> Dict[str, Any]:
+    return {
+        "content": {
+            "itemContent": {
+                "tweet_results": {
+                    "result": {
+                        "rest_id": tweet_id,
+                        "legacy": {"id_str": tweet_id, "full_text": f"不眠 {tweet_id}"},
+                        "core": {
+                            "user_results": {
+                                "result": {"legacy": {"screen_name": "test", "name": "Test"}}
+                            }
+                        },
+                    }
+                }
+            }
+        }
+    }
+
+
+def _collect(api: FakeSearchTimeline, store: WatermarkStore, max_results: int) -> List[str]:
+    collector = TwitterSearchCollector(
+        max_results=max_results,
+        guest_token="guest",
+        watermarks=store,
+        transport=httpx.MockTransport(api.handler),
+    )
+    return [post.platform_id for post in collector.collect(["不眠"])]
+
+
+def test_complete_crawl_advances_mark(tmp_path):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    store.advance(KEY, "100")
+    api = FakeSearchTimeline([["105", "104"], ["103", "100"]])
+
+    assert _collect(api, store, 10) == ["105", "104", "103"]
+    assert store.get(KEY) == "105"
+    assert store.checkpoint(KEY) is None
+
+
+def test_max_results_cut_parks_cursor_instead_of_advancing(tmp_path):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    store.advance(KEY, "100")
+    api = FakeSearchTimeline([["105", "104"], ["103", "102"], ["101"]])
+
+    assert _collect(api, store, 2) == ["105", "104"]
+    # 101-103 were not fetched yet, so the mark must not jump past them.
+    assert store.get(KEY) == "100"
+    assert store.checkpoint(KEY) == {"since_id": "100", "cursor": "cursor-1", "newest_id": "105"}
+
+    assert _collect(api, store, 2) == ["103", "102"]
+    assert store.get(KEY) == "100"
+
+    assert _collect(api, store, 2) == ["101"]
+    assert api.cursors[-1] == "cursor-2"
+    assert store.get(KEY) == "105"
+    assert store.checkpoint(KEY) is None
@@ -54,6 +54,7 @@ CREATE TABLE IF NOT EXISTS public.method_events (
 
 CREATE INDEX IF NOT EXISTS method_events_method_slug_idx ON public.method_events (method_slug, created_at DESC);
 CREATE INDEX IF NOT EXISTS method_events_effect_label_idx ON public.method_events (effect_label);
+CREATE INDEX IF NOT EXISTS method_events_created_at_id_idx ON public.method_events (created_at, id);
 
 -- Method stats table
 CREATE TABLE IF NOT EXISTS public.method_stats (
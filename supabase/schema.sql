@@ -50,6 +50,7 @@ create table if not exists public.method_events (
 );
 create index if not exists method_events_method_slug_idx on public.method_events (method_slug, created_at desc);
 create index if not exists method_events_effect_label_idx on public.method_events (effect_label);
+create index if not exists method_events_created_at_id_idx on public.method_events (created_at, id);
 
 -- Aggregated stats for leaderboard --------------------------------------
 create table if not exists public.method_stats (